@@ -1,23 +1,34 @@
 import random
 import math
-import copy
+import time
+import tile_set
+import win_table
 import operator as op
 from functools import reduce
-from tile import get_all_tiles
 from tile import Tile
 from game_state import GameState
+from transposition import TranspositionTable
 from collections import defaultdict
 from dominoes_util import Dir, all_dirs, opposite
 
 def get_valid_moves(board, hand=None):
-    all_valid_moves = board.get_unique_valid_moves()
     if hand:
-        return [move for move in all_valid_moves if move[0] in hand]
+        return board.get_unique_valid_moves(tile_set.tiles_to_mask(hand))
     else:
-        return all_valid_moves
+        return board.get_unique_valid_moves()
+
+def get_valid_moves_in_mask(board, mask):
+    # Same as get_valid_moves, with the hand given as a tile_set mask
+    if mask:
+        return board.get_unique_valid_moves(mask)
+    else:
+        return board.get_unique_valid_moves()
+
+def get_other_tiles_mask(board, hand):
+    return board.remaining_tile_index.mask & ~tile_set.tiles_to_mask(hand)
 
 def get_other_tiles(board, hand):
-    return set(get_all_tiles()) - set(hand) - set(board.get_tiles_on_board())
+    return set(tile_set.mask_to_tiles(get_other_tiles_mask(board, hand)))
 
 def pick_random_move(board, hand):
     valid_moves = get_valid_moves(board, hand)
@@ -29,10 +40,8 @@ def pick_random_move(board, hand):
 def pick_greedy_move(board, hand):
     best_move = None, None
     best_score = 0
-    for tile, direction in get_valid_moves(board, hand):
-        board.make_move(tile, direction)
-        score = board.score()
-        board.undo_move(tile, direction)
+    valid_moves = get_valid_moves(board, hand)
+    for (tile, direction), score in zip(valid_moves, board.scores_if_played(valid_moves)):
         if not best_move[0]:
             best_move, best_score = (tile, direction), score
         elif score > best_score:
@@ -46,18 +55,14 @@ def pick_defensive_move(board, hand):
     if greedy_score:
         return greedy_move
     # Otherwise, play defensive move against scores on next turn
-    other_tiles = get_other_tiles(board, hand)
+    other_mask = get_other_tiles_mask(board, hand)
     lowest_score_off_move = 100
     for move in get_valid_moves(board, hand):
         best_score_off_move = 0
         board.make_move(*move)
-        other_valid_moves = get_valid_moves(board, other_tiles)
-        for other_move in other_valid_moves:
-             board.make_move(*other_move)
-             score = board.score()
-             board.undo_move(*other_move)
-             if score > best_score_off_move:
-                best_score_off_move = score
+        other_valid_moves = get_valid_moves_in_mask(board, other_mask)
+        if other_valid_moves:
+            best_score_off_move = max(board.scores_if_played(other_valid_moves))
         board.undo_move(*move)
         if best_score_off_move < lowest_score_off_move:
             lowest_score_off_move = best_score_off_move
@@ -65,7 +70,7 @@ def pick_defensive_move(board, hand):
     return best_move
 
 def total_points_in_hand(hand):
-    return sum([tile.total_points() for tile in hand])
+    return tile_set.mask_points(tile_set.tiles_to_mask(hand))
 
 # TODO: Update this to include num tiles left in each hand
 # * If tiles are same and on serve, bonus = 12
@@ -112,21 +117,28 @@ def prob_winning_from_scores(my_score, opp_score, play_to):
     Z_val = (X - N * P) / (N * P * (1-P))
     return z_score(Z_val)
 
-def game_state_value(gs):
-    # If game is over, return 1 or 0
-    my_score = gs.my_score
-    opp_score = gs.opp_score
-    if my_score >= gs.play_to:
+# Probability of winning from the scores at the start of a round, on serve
+# or not: looked up in the win table for play_to (see win_table.py), or
+# estimated from the scores with a serve bonus if there is none
+def prob_winning(my_score, opp_score, on_serve, play_to):
+    if my_score >= play_to:
         return 1.0
-    if opp_score >= gs.play_to:
+    elif opp_score >= play_to:
         return 0.0
-    # Adjust scores for serve 
-    if i_am_on_serve(len(gs.hand), gs.opp_hand_size, gs.my_turn):
-        my_score += serve_bonus(gs.my_score, gs.play_to)
+    prob = win_table.lookup(my_score, opp_score, on_serve, play_to)
+    if prob is not None:
+        return prob
+    if on_serve:
+        my_score += serve_bonus(my_score, play_to)
     else:
-        opp_score += serve_bonus(gs.opp_score, gs.play_to)
-    # Convert scores to probability of winning
-    return prob_winning_from_scores(my_score, opp_score, gs.play_to)
+        opp_score += serve_bonus(opp_score, play_to)
+    return prob_winning_from_scores(my_score, opp_score, play_to)
+
+# Values a position mid round as the start of a round, with the player
+# ahead on tiles on serve
+def game_state_value(gs):
+    on_serve = i_am_on_serve(len(gs.hand), gs.opp_hand_size, gs.my_turn)
+    return prob_winning(gs.my_score, gs.opp_score, on_serve, gs.play_to)
 
 # TODO: speed this up
 def board_is_boxed_out(board):
@@ -139,83 +151,145 @@ def playable_moves(board, tile):
             playable_moves.append((tile, direction))
     return playable_moves
 
-def simulate_draws(board, hand, boneyard_size):
-    # Returns tiles IN ORDER of draws
-    other_tiles = get_other_tiles(board, hand)
-    extra_tiles = []
-    playable_moves_from_draw = []
-    while boneyard_size and not playable_moves_from_draw:
-        draw_tile = random.sample(other_tiles, 1)[0]
-        extra_tiles.append(draw_tile)
-        other_tiles.remove(draw_tile)
-        boneyard_size -= 1
-        playable_moves_from_draw = playable_moves(board, draw_tile)
-    return extra_tiles
-
 # TODO: This assumes opp is doing no pt management of hand
 def boxed_out_value(gs):
-    other_tiles = get_other_tiles(gs.board, gs.hand)
+    other_mask = get_other_tiles_mask(gs.board, gs.hand)
     pts_in_hand = total_points_in_hand(gs.hand)
-    pts_in_other_tiles = total_points_in_hand(other_tiles)
-    exp_pts_in_opp_hand = 1.0 * pts_in_other_tiles * gs.opp_hand_size / len(other_tiles)
+    pts_in_other_tiles = tile_set.mask_points(other_mask)
+    exp_pts_in_opp_hand = (1.0 * pts_in_other_tiles * gs.opp_hand_size /
+                           tile_set.popcount(other_mask))
     # Assumes lowest score gets to serve next
     my_score = gs.my_score
     opp_score = gs.opp_score
     if pts_in_hand < exp_pts_in_opp_hand:
         my_score += (int(exp_pts_in_opp_hand) / 5) * 5
-        my_score += serve_bonus(my_score, gs.play_to)
+        return prob_winning(my_score, opp_score, True, gs.play_to)
     elif exp_pts_in_opp_hand < pts_in_hand:
         opp_score += (pts_in_hand / 5) * 5
-        opp_score += serve_bonus(opp_score, gs.play_to)
-    return prob_winning_from_scores(my_score, opp_score, gs.play_to)
+        return prob_winning(my_score, opp_score, False, gs.play_to)
+    return (prob_winning(my_score, opp_score, True, gs.play_to) +
+            prob_winning(my_score, opp_score, False, gs.play_to)) / 2
 
-def get_valid_moves_and_extra_tiles(board, hand, opp_hand_size, sims=5):
-    valid_moves = get_valid_moves(board, hand)
-    if valid_moves:
-        # Add empty set to each representing no extra tiles
-        return zip(valid_moves, [set() for i in range(len(valid_moves))])
-    else:
-        # If no valid moves, simulate 5 random draws
-        other_tiles = get_other_tiles(board, hand)
-        boneyard_size = len(other_tiles) - opp_hand_size
-        valid_moves_and_extra_tiles = []
-        for i in range(sims):
-            extra_tiles = simulate_draws(board, hand, boneyard_size)
-            valid_moves_after_draw = []
-            if extra_tiles:
-                last_tile = extra_tiles[-1]
-                valid_moves_after_draw = playable_moves(board, last_tile)
-            for move in valid_moves_after_draw or [(None, None)]:
-                valid_moves_and_extra_tiles.append((move, set(extra_tiles)))
-        return valid_moves_and_extra_tiles
+# The draw and reply probabilities below only ever see counts of tiles, at
+# most NUM_TILES, so each is worked out once per set of arguments and then
+# looked up: ncr from a table built here, the others from dicts filled in
+# as they're asked for. The lookups return exactly what the computations do.
 
-def ncr(n, r):
+def _ncr(n, r):
     if n <= 0 or r < 0 or n < r: return 0
     r = min(r, n-r)
     numer = reduce(op.mul, range(n, n-r, -1), 1)
     denom = reduce(op.mul, range(1, r+1), 1)
     return numer / denom
 
+_NCR = [[_ncr(n, r) for r in range(tile_set.NUM_TILES + 1)]
+        for n in range(tile_set.NUM_TILES + 1)]
+
+def ncr(n, r):
+    if 0 <= r <= n <= tile_set.NUM_TILES:
+        return _NCR[n][r]
+    return _ncr(n, r)
+
+_PROB_DRAW = {}
+
 def compute_prob_draw(num_valid_tiles, hand_size, num_total_tiles):
-    # Num possible hands = Choose(num_total_tiles, hand_size)
-    # Num hands with only invalid tiles = Choose(num_invalid_tiles, hand_size)
-    num_possible_hands = ncr(num_total_tiles, hand_size)
-    num_hands_only_invalid = ncr(num_total_tiles - num_valid_tiles, hand_size)
-    prob = 1.0 * num_hands_only_invalid / num_possible_hands
+    key = (num_valid_tiles, hand_size, num_total_tiles)
+    prob = _PROB_DRAW.get(key)
+    if prob is None:
+        # Num possible hands = Choose(num_total_tiles, hand_size)
+        # Num hands with only invalid tiles = Choose(num_invalid_tiles, hand_size)
+        num_possible_hands = ncr(num_total_tiles, hand_size)
+        num_hands_only_invalid = ncr(num_total_tiles - num_valid_tiles, hand_size)
+        prob = _PROB_DRAW[key] = 1.0 * num_hands_only_invalid / num_possible_hands
     return prob
 
-def compute_exp_num_draws_given_drawing(num_valid_moves, boneyard_size):
-    if num_valid_moves == 0:
-        return boneyard_size
-    exp = 0.0
+# Draw outcomes searched at each chance node: the opponent's numbers of
+# draws (the two most likely and the rest folded together) and my playable
+# draws. With the opponent's less likely outcomes searched a ply shallower
+# (see _opp_draw_value), these keep depth-3 searches to no more nodes than
+# sampling five draws and playing the expected number of opponent draws
+# did.
+OPP_DRAW_OUTCOMES = 3
+MY_DRAW_OUTCOMES = 4
+
+_DRAW_COUNT_PROBS = {}
+
+# Distribution of the number of tiles drawn until one of num_valid_tiles
+# playable tiles comes up, out of boneyard_size tiles, or of all of them
+# if none are playable, as (num_draws, prob) pairs. Each draw is at most
+# as likely to be the last as the one before, so past max_outcomes the
+# first max_outcomes - 1 are kept, the most likely, and the rest are
+# folded into one outcome of their (rounded) mean number of draws.
+def draw_count_probs(num_valid_tiles, boneyard_size, max_outcomes=None):
+    key = (num_valid_tiles, boneyard_size, max_outcomes)
+    if key not in _DRAW_COUNT_PROBS:
+        _DRAW_COUNT_PROBS[key] = _draw_count_probs(num_valid_tiles, boneyard_size, max_outcomes)
+    return list(_DRAW_COUNT_PROBS[key])
+
+def _draw_count_probs(num_valid_tiles, boneyard_size, max_outcomes):
+    if num_valid_tiles == 0:
+        return [(boneyard_size, 1.0)]
+    probs = []
+    prob_none_yet = 1.0
     num_tiles_left = boneyard_size
-    sum_prev_probs = 0.0
-    for i in range(boneyard_size - num_valid_moves + 1):
-        prob = (1. - sum_prev_probs) * (1. * num_valid_moves / num_tiles_left)
-        exp += (i+1) * prob
+    for i in range(boneyard_size - num_valid_tiles + 1):
+        prob = prob_none_yet * num_valid_tiles / num_tiles_left
+        probs.append((i + 1, prob))
+        prob_none_yet -= prob
         num_tiles_left -= 1
-        sum_prev_probs += prob
-    return int(round(exp))
+    if max_outcomes and len(probs) > max_outcomes:
+        rest = probs[max_outcomes - 1:]
+        prob_rest = sum(prob for num_draws, prob in rest)
+        mean_draws = sum(num_draws * prob for num_draws, prob in rest) / prob_rest
+        probs = probs[:max_outcomes - 1] + [(int(round(mean_draws)), prob_rest)]
+    return probs
+
+# Chance outcomes of my draws when I have no valid move, as (extra_tiles,
+# prob) pairs with extra_tiles in the order drawn. I draw until I get a
+# playable tile, and each playable tile I can't see is as likely as the
+# others to be the first, so the outcomes are grouped by that tile, each
+# with its chance of coming first. If the boneyard has no playable tile I
+# draw all of it and knock. The unplayable tiles drawn before aren't
+# enumerated, so outcomes aren't exact: each draws the expected number of
+# them, picking those closest to their average points. Past max_outcomes
+# playable tiles, they're split by points into max_outcomes runs, and the
+# middle tile of each run stands for it with the chance of the whole run.
+def my_draw_outcomes(board, hand, opp_hand_size, max_outcomes=None):
+    other_tiles = tile_set.mask_to_tiles(get_other_tiles_mask(board, hand))
+    boneyard_size = len(other_tiles) - opp_hand_size
+    if boneyard_size <= 0:
+        return [([], 1.0)]
+    playable_tiles = [tile for tile in other_tiles if playable_moves(board, tile)]
+    dead_tiles = [tile for tile in other_tiles if tile not in playable_tiles]
+    dead_points = sum(tile.total_points() for tile in dead_tiles)
+    dead_tiles.sort(key=lambda tile: abs(tile.total_points() * len(dead_tiles) - dead_points))
+    prob_knock = (1.0 * ncr(len(dead_tiles), boneyard_size) /
+                  ncr(len(other_tiles), boneyard_size))
+    outcomes = []
+    if playable_tiles:
+        # Chance of k dead tiles, then a playable one
+        num_dead_probs = []
+        prob_dead_so_far = 1.0
+        for k in range(min(boneyard_size - 1, len(dead_tiles)) + 1):
+            num_tiles_left = len(other_tiles) - k
+            num_dead_probs.append(
+                prob_dead_so_far * len(playable_tiles) / num_tiles_left)
+            prob_dead_so_far *= 1.0 * (len(dead_tiles) - k) / num_tiles_left
+        num_dead = int(round(
+            sum(k * prob for k, prob in enumerate(num_dead_probs)) / sum(num_dead_probs)))
+        num_playable = len(playable_tiles)
+        runs = [[tile] for tile in playable_tiles]
+        if max_outcomes and num_playable > max_outcomes:
+            playable_tiles.sort(key=lambda tile: tile.total_points())
+            runs = [playable_tiles[i * num_playable / max_outcomes:
+                                   (i + 1) * num_playable / max_outcomes]
+                    for i in range(max_outcomes)]
+        prob_tile = (1.0 - prob_knock) / num_playable
+        for run in runs:
+            outcomes.append((dead_tiles[:num_dead] + [run[len(run) / 2]], prob_tile * len(run)))
+    if prob_knock > 0:
+        outcomes.append((dead_tiles[:boneyard_size], prob_knock))
+    return outcomes
 
 def move_dict_to_sorted_list_by_tiles(move_vals, pick_max=True):
     tile_vals = {}
@@ -242,24 +316,72 @@ def expected_value_opp_moves(tile_vals, hand_size, num_total_tiles):
             break
     return exp
 
-def prob_opp_moves(move_vals_dict, hand_size, num_total_tiles):
+# With tile_probs (see belief.Belief.tile_probs), the opponent holds each
+# tile with its probability instead of all being as likely. Going from
+# their best reply down, each tile's chance is given they hold none of
+# the tiles before it (see _prob_holds_given_not).
+def prob_opp_moves(move_vals_dict, hand_size, num_total_tiles, tile_probs=None):
     seen_tiles = set()
-    exp = 0.0
+    probs = {}
+    if tile_probs is None:
+        max_probs = iter(_uniform_max_probs(hand_size, num_total_tiles))
+        for (move, val) in sorted(move_vals_dict.items(), key=lambda x: x[1]):
+            tile = move[0]
+            if tile in seen_tiles:
+                probs[move] = 0.0
+                continue
+            seen_tiles.add(tile)
+            probs[move] = next(max_probs, 0.0)
+        return probs
     sum_probs = 0.0
     num_tiles_left = num_total_tiles
-    probs = {}
+    probs_left = sum(tile_probs)
     for (move, val) in sorted(move_vals_dict.items(), key=lambda x: x[1]):
         tile = move[0]
-        if tile in seen_tiles or num_tiles_left < hand_size:
+        if tile in seen_tiles:
             probs[move] = 0.0
             continue
         seen_tiles.add(tile)
-        prob_is_max = (1 - sum_probs) * (1. * hand_size / num_tiles_left)
+        if tile is not None:
+            prob_is_max = (1 - sum_probs) * _prob_holds_given_not(
+                tile_probs[tile.id], hand_size, probs_left)
+            probs_left -= tile_probs[tile.id]
+        else:
+            prob_is_max = (1 - sum_probs) * (1. * hand_size / num_tiles_left)
         probs[move] = prob_is_max
         sum_probs += prob_is_max
         num_tiles_left -= 1
     return probs
 
+_UNIFORM_MAX_PROBS = {}
+
+# Chance the i-th best tile for the opponent, of num_total_tiles all as
+# likely to be in a hand of hand_size, is the best they hold, by i. Stops
+# at the last one they can hold as their best.
+def _uniform_max_probs(hand_size, num_total_tiles):
+    key = (hand_size, num_total_tiles)
+    if key not in _UNIFORM_MAX_PROBS:
+        max_probs = []
+        sum_probs = 0.0
+        num_tiles_left = num_total_tiles
+        while num_tiles_left >= hand_size and num_tiles_left > 0:
+            prob_is_max = (1 - sum_probs) * (1. * hand_size / num_tiles_left)
+            max_probs.append(prob_is_max)
+            sum_probs += prob_is_max
+            num_tiles_left -= 1
+        _UNIFORM_MAX_PROBS[key] = max_probs
+    return _UNIFORM_MAX_PROBS[key]
+
+# Chance a hand of hand_size tiles holds a tile of probability prob (see
+# belief.Belief.tile_probs), given it holds none of the tiles ruled out so
+# far: prob scaled so the probabilities of the tiles left, probs_left in
+# all, again sum to hand_size, and at most 1. With every tile as likely,
+# this is hand_size over the number of tiles left.
+def _prob_holds_given_not(prob, hand_size, probs_left):
+    if probs_left <= 0:
+        return 0.0
+    return min(1.0, hand_size * prob / probs_left)
+
 def prob_opp_moves_draw(move_vals_dict, prob_draw):
     seen_tiles = set()
     probs = {}
@@ -290,51 +412,167 @@ def expected_value_opp_draw(tile_vals, prob_draw):
 class TreeNode(object):
     def __init__(self, game_state, move):
         self.children = []
-        self.game_state = copy.deepcopy(game_state)
+        self.game_state = game_state.copy()
         self.move = move
         self.ev = None
         self.prob = None
         self.simulated = False
 
+class SearchTimeout(Exception):
+    pass
+
+# Options and counters shared by every node of one tree_search.
+# * table: transposition.TranspositionTable to look up positions already
+#   searched at least as deep
+# * prune: stop evaluating opponent replies to a move once the move
+#   provably can't beat the best move found so far (see _opp_replies_value)
+# orderer, a MoveOrderer, picks the order moves are tried in. deadline (a
+# time.time() value) and node_limit bound the search: once either is used
+# up, the next node raises SearchTimeout. belief, a belief.Belief, weighs
+# the opponent's replies by how likely they are to hold each tile, and
+# replies with tiles they can't hold aren't searched; positions searched
+# with it are keyed by its digest too. leaf_evaluator, a
+# rollout.RolloutEvaluator, values the positions at depth 0 by playing
+# them out instead of by game_state_value.
+class SearchContext(object):
+    def __init__(self, table=None, prune=False, deadline=None, node_limit=None,
+                 orderer=None, belief=None, leaf_evaluator=None):
+        self.table = table
+        self.prune = prune
+        self.orderer = orderer
+        self.belief = belief
+        self.belief_digest = belief.digest() if belief else 0
+        self.leaf_evaluator = leaf_evaluator
+        self.deadline = deadline
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.opp_nodes = 0
+        self.cutoffs = 0
+
+    # Value of game_state, in play, at depth 0
+    def leaf_value(self, game_state):
+        if self.leaf_evaluator is None:
+            return game_state_value(game_state)
+        return self.leaf_evaluator.value(game_state, self.belief)
+
+    def check_budget(self):
+        if self.node_limit is not None and self.nodes + self.opp_nodes > self.node_limit:
+            raise SearchTimeout()
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+
 # Searches through tree of moves up to depth given, then uses
 # game_state_value
 # Assumes making move for whoever's turn it is.
 # Returns a dict of expected value of each valid move
 # If no valid moves, returns dict from (None, None) to EV
 # from drawing.
+# With context.prune, moves that can't be the best get an upper bound on
+# their EV instead of the EV itself. The best move and its EV are exact.
+# Positions the table has from a shallower search are searched again,
+# trying the moves that search found best first.
+# If moves is given, only those of my valid moves are searched, and the
+# result isn't cached.
 # TODO:
 # * Add E2E tests for this function
-# * Refactor into smaller chunks, to fit in 50 lines
 # * If draw, don't run algo
 # NOTE: This assumes that the opponent has perfect information
 # of my hand when choosing moves!
-def tree_search(depth, game_state, tree_node=None):
+def tree_search(depth, game_state, tree_node=None, context=None, moves=None):
     game_state.my_turn = True
+    if context is None:
+        context = SearchContext()
+    table = context.table
+    if table is None or tree_node or moves is not None:
+        return _tree_search(depth, game_state, tree_node, context, moves=moves)
+    key = game_state.key()
+    if context.belief:
+        key ^= context.belief_digest
+    ev_dict = table.lookup(key, depth)
+    if ev_dict is None:
+        entry = table.get_entry(key)
+        move_hints = entry.ev_dict if entry else None
+        ev_dict = _tree_search(depth, game_state, None, context, move_hints)
+        table.store(key, depth, ev_dict)
+    return ev_dict
+
+# Anytime search: runs tree_search to depth 0, 1, ..., max_depth until
+# time_limit seconds or node_limit nodes are used up, and returns the EV
+# dict of the deepest search that finished along with its depth. Results
+# go into context's table (a new one if it has none), so each search tries
+# the moves the previous one found best first. Depth 0 is always finished.
+def iterative_deepening_search(game_state, max_depth, time_limit=None, node_limit=None,
+                               context=None):
+    if context is None:
+        context = SearchContext()
+    if context.table is None:
+        context.table = TranspositionTable()
+    if time_limit is not None:
+        context.deadline = time.time() + time_limit
+    ev_dict = tree_search(0, game_state.copy(), context=SearchContext(context.table))
+    completed_depth = 0
+    context.node_limit = node_limit
+    for depth in range(1, max_depth + 1):
+        try:
+            # Searched on a copy, as a search that runs out of budget stops
+            # with moves still made on the board
+            ev_dict = tree_search(depth, game_state.copy(), context=context)
+        except SearchTimeout:
+            break
+        completed_depth = depth
+    return ev_dict, completed_depth
+
+def _tree_search(depth, game_state, tree_node, context, move_hints=None, moves=None):
+    context.nodes += 1
+    context.check_budget()
     board = game_state.board
     hand = game_state.hand
 
     # If boxed out, score the game
-    other_tiles = get_other_tiles(board, hand)
+    other_mask = get_other_tiles_mask(board, hand)
     if board_is_boxed_out(board):
         ev = boxed_out_value(game_state)
         if tree_node:
             tree_node.ev = ev
         return {(None, None): ev}
 
-    # Get valid moves, along with extra tiles form simulation
-    valid_moves_and_extra_tiles = get_valid_moves_and_extra_tiles(
-        board, hand, game_state.opp_hand_size)
+    # My valid moves, or if I have none, each move after each of my draws:
+    # (move, extra tiles drawn, index of the draw outcome)
+    valid_moves = get_valid_moves(board, hand)
+    draw_probs = None
+    if valid_moves:
+        if moves is not None:
+            valid_moves = [move for move in valid_moves if move in moves]
+        if context.orderer:
+            valid_moves = [move for move, score in context.orderer.order_moves(
+                valid_moves, board.scores_if_played(valid_moves), depth, True,
+                move_hints)]
+        elif move_hints:
+            valid_moves.sort(key=lambda move: move_hints.get(move, 0.0), reverse=True)
+        moves_and_extra_tiles = [(move, [], None) for move in valid_moves]
+    else:
+        draw_outcomes = my_draw_outcomes(board, hand, game_state.opp_hand_size,
+                                         MY_DRAW_OUTCOMES)
+        draw_probs = [prob for extra_tiles, prob in draw_outcomes]
+        moves_and_extra_tiles = []
+        for outcome, (extra_tiles, prob) in enumerate(draw_outcomes):
+            moves_after_draw = playable_moves(board, extra_tiles[-1]) if extra_tiles else []
+            for move in moves_after_draw or [(None, None)]:
+                moves_and_extra_tiles.append((move, extra_tiles, outcome))
+    drawing = draw_probs is not None
+    ordered = context.orderer and not drawing
 
     # Initialize EV_dict and loop through each valid move for keys
     EV_dict = {}
-    used_simulations = False
-    for move, extra_tiles in valid_moves_and_extra_tiles:
-        if extra_tiles:
-            used_simulations = True
+    # Best EV of the moves after each draw outcome
+    outcome_evs = {}
+    best_ev = None
+    for rank, (move, extra_tiles, outcome) in enumerate(moves_and_extra_tiles):
         tile, direction = move
         # Incorporate extra tiles if had to draw before
         hand.update(extra_tiles)
-        other_tiles -= extra_tiles
+        extra_mask = tile_set.tiles_to_mask(extra_tiles)
+        other_mask &= ~extra_mask
         # Make move, update scoreboard
         if tile:
             move_score = board.make_move(tile, direction)
@@ -342,111 +580,258 @@ def tree_search(depth, game_state, tree_node=None):
             hand.remove(tile)
         game_state.my_turn = False
 
+        move_tree_node = None
         if tree_node:
             move_tree_node = TreeNode(game_state, move)
             tree_node.children.append(move_tree_node)
-            move_tree_node.simulated = used_simulations
-            if used_simulations:
-                move_tree_node.prob = 1.0 / len(valid_moves_and_extra_tiles)
+            move_tree_node.simulated = drawing
+            if drawing:
+                move_tree_node.prob = draw_probs[outcome]
 
         # If game over, round over, boxed out OR depth == 0, use game value
-        if depth == 0 or len(hand) == 0 or game_state.my_score >= game_state.play_to:
-            EV_dict[move] = game_state_value(game_state)
+        if len(hand) == 0 or game_state.my_score >= game_state.play_to:
+            ev = game_state_value(game_state)
+        elif depth == 0 and context.leaf_evaluator is None:
+            ev = game_state_value(game_state)
         elif board_is_boxed_out(board):
-            EV_dict[move] = boxed_out_value(game_state)
+            ev = boxed_out_value(game_state)
+        elif depth == 0:
+            ev = context.leaf_value(game_state)
+        else:
+            # Draws are averaged, not maxed, so can't be pruned
+            alpha = best_ev if context.prune and not drawing else None
+            ev = _opp_replies_value(
+                depth, game_state, other_mask, move_tree_node, context, alpha)
+        if drawing:
+            outcome_evs[outcome] = max(outcome_evs.get(outcome, ev), ev)
         else:
-            # If prob draw, try each move with and without exp num extra opp tiles
-            opp_valid_moves = get_valid_moves(board, other_tiles)
-            num_opp_valid_tiles = len(set([m[0] for m in opp_valid_moves]))
-            prob_draw = compute_prob_draw(
-                num_opp_valid_tiles, game_state.opp_hand_size, len(other_tiles))
-            exp_num_draws_if_drawing = compute_exp_num_draws_given_drawing(
-                num_opp_valid_tiles, len(other_tiles) - game_state.opp_hand_size)
-
-            # Loop through opponent's moves, keeping track of value of each
-            opp_move_vals = {}
-            opp_move_vals_draw = {}
-            opp_tree_node_from_move = {}
-            opp_tree_node_draw_from_move = {}
-            for opp_move in opp_valid_moves or [(None, None)]:
-                opp_tile, opp_direction = opp_move
-                depth -= 1
-                if opp_tile:
-                    # Make move, update
-                    opp_move_score = board.make_move(opp_tile, opp_direction)
-                    game_state.opp_score += opp_move_score
-                    game_state.opp_hand_size -= 1
-                game_state.my_turn = True
-
-                opp_move_tree_node = None
-                if tree_node:
-                    opp_move_tree_node = TreeNode(game_state, opp_move)
-                    move_tree_node.children.append(opp_move_tree_node)
-                    opp_tree_node_from_move[opp_move] = opp_move_tree_node
-                # Score move
-                # TODO: Handle case when board is boxed out?
-                if game_state.opp_hand_size == 0 or depth == 0:
-                    val = game_state_value(game_state)
-                    opp_move_vals[opp_move] = val
-                else:
-                    tree_results = tree_search(depth - 1, game_state, opp_move_tree_node)
-                    opp_move_vals[opp_move] = max(tree_results.values())
-                if tree_node:
-                    opp_move_tree_node.ev = opp_move_vals[opp_move]
-                # Add draw situation
-                if prob_draw > 0:
-                    game_state.opp_hand_size += exp_num_draws_if_drawing
-                    opp_move_draw_tree_node = None
-                    if tree_node:
-                        opp_move_draw_tree_node = TreeNode(game_state, opp_move)
-                        opp_move_draw_tree_node.simulated = True
-                        move_tree_node.children.append(opp_move_draw_tree_node)
-                        opp_tree_node_draw_from_move[opp_move] = opp_move_draw_tree_node
-                    if depth == 0:
-                        val_draw = game_state_value(game_state)
-                        opp_move_vals_draw[opp_move] = val_draw
-                    else:
-                        tree_results_draw = tree_search(depth - 1, game_state, opp_move_draw_tree_node)
-                        opp_move_vals_draw[opp_move] = max(tree_results_draw.values())
-                    if tree_node:
-                        opp_move_draw_tree_node.ev = opp_move_vals_draw[opp_move]
-                    game_state.opp_hand_size -= exp_num_draws_if_drawing
-
-                # Undo opp move to board, scoreboard, hands, boneyard
-                if opp_tile:
-                    game_state.opp_hand_size += 1
-                    game_state.opp_score -= opp_move_score
-                    board.undo_move(opp_tile, opp_direction)
-                depth += 1
-
-            prob_moves = prob_opp_moves(opp_move_vals, game_state.opp_hand_size, len(other_tiles))
-            prob_moves_draw = prob_opp_moves_draw(opp_move_vals_draw, prob_draw)
-            ev = expected_value_moves(opp_move_vals, prob_moves)
-            ev += expected_value_moves(opp_move_vals_draw, prob_moves_draw)
-            if tree_node:
-                for opp_move, prob in prob_moves.iteritems():
-                    opp_move_node = opp_tree_node_from_move[opp_move]
-                    opp_move_node.prob = prob
-                for opp_move, prob in prob_moves_draw.iteritems():
-                    opp_move_node = opp_tree_node_draw_from_move[opp_move]
-                    opp_move_node.prob = prob
             EV_dict[move] = ev
+            if best_ev is None or ev > best_ev:
+                best_ev = ev
+                best_move, best_rank = move, rank
         # Add child tree node for this move
         if tree_node:
-            move_tree_node.ev = EV_dict[move]
+            move_tree_node.ev = ev
         # Undo move to board, scoreboard, hand, extra tiles
         if tile:
             board.undo_move(tile, direction)
             hand.add(tile)
             game_state.my_score -= move_score
         game_state.my_turn = True
-        hand -= extra_tiles
-        other_tiles.update(extra_tiles)
-
-    # If my moves were sims of draws, return the average of all of them
-    if used_simulations:
-        # TODO: treats all moves as equally likely, even  though some are duplicates of tiles
-        return {(None, None): mean(EV_dict.values())}
+        hand.difference_update(extra_tiles)
+        other_mask |= extra_mask
+
+    if ordered and EV_dict:
+        context.orderer.record_best(best_move, best_rank, depth, True)
+    # If I had to draw, return the EV over the draw outcomes, each played
+    # as well as it can be
+    if drawing:
+        return {(None, None): sum(draw_probs[outcome] * ev
+                                  for outcome, ev in outcome_evs.iteritems())}
     else:
         return EV_dict
 
+def _opp_replies_ev(opp_move_vals, opp_move_vals_draw, prob_draw, opp_hand_size,
+                    num_other_tiles, tile_probs=None):
+    prob_moves = prob_opp_moves(opp_move_vals, opp_hand_size, num_other_tiles, tile_probs)
+    prob_moves_draw = prob_opp_moves_draw(opp_move_vals_draw, prob_draw)
+    ev = expected_value_moves(opp_move_vals, prob_moves)
+    ev += expected_value_moves(opp_move_vals_draw, prob_moves_draw)
+    return ev, prob_moves, prob_moves_draw
+
+# The EV of the opponent's replies only ever grows when a reply's value
+# grows: it is a sum of sorted values with non-negative weights that only
+# depend on the rank. Filling in the replies not searched yet with the
+# highest possible value, 1.0, therefore bounds the EV from above.
+def _opp_replies_upper_bound(opp_moves, opp_move_vals, opp_move_vals_draw, prob_draw,
+                             opp_hand_size, num_other_tiles, tile_probs=None):
+    bound_vals = dict((move, 1.0) for move in opp_moves)
+    bound_vals.update(opp_move_vals)
+    bound_vals_draw = {}
+    if prob_draw > 0:
+        bound_vals_draw = dict((move, 1.0) for move in opp_moves)
+        bound_vals_draw.update(opp_move_vals_draw)
+    return _opp_replies_ev(bound_vals, bound_vals_draw, prob_draw, opp_hand_size,
+                           num_other_tiles, tile_probs)[0]
+
+# Chances of the opponent's replies to my move, already made on the board:
+# the number of tiles I can't see, the opponent's valid moves, the
+# probability they have none of those tiles and draw, and the most likely
+# numbers of tiles they draw if so, as (num_draws, prob) pairs.
+def _opp_reply_chances(board, other_mask, opp_hand_size, tile_probs=None):
+    num_other_tiles = tile_set.popcount(other_mask)
+    opp_valid_moves = get_valid_moves_in_mask(board, other_mask)
+    num_opp_valid_tiles = len(set([m[0] for m in opp_valid_moves]))
+    boneyard_size = num_other_tiles - opp_hand_size
+    if boneyard_size <= 0:
+        # They hold every tile I can't see, so there's nothing to draw
+        prob_draw = 0.0
+    elif tile_probs is None:
+        prob_draw = compute_prob_draw(
+            num_opp_valid_tiles, opp_hand_size, num_other_tiles)
+    else:
+        # Chance they hold none of the tiles, one tile at a time
+        prob_draw = 1.0
+        probs_left = sum(tile_probs)
+        for tile in set([m[0] for m in opp_valid_moves]):
+            prob_draw *= 1.0 - _prob_holds_given_not(tile_probs[tile.id], opp_hand_size,
+                                                     probs_left)
+            probs_left -= tile_probs[tile.id]
+    draw_counts = draw_count_probs(num_opp_valid_tiles, boneyard_size, OPP_DRAW_OUTCOMES)
+    return num_other_tiles, opp_valid_moves, prob_draw, draw_counts
+
+# Value of the opponent's reply opp_move, searched to depth, and of the
+# same reply after drawing (None if prob_draw is 0), over draw_counts.
+# Also returns the tree node of the reply and (node, prob) pairs for each
+# number of draws, if move_tree_node is given. If the opponent can't hold
+# the tile (held is False), the reply is only searched after drawing.
+def _opp_reply_value(depth, game_state, opp_move, opp_move_score, prob_draw,
+                     draw_counts, move_tree_node, context, held=True):
+    board = game_state.board
+    opp_tile, opp_direction = opp_move
+    # The board is only needed to search deeper or snapshot it
+    opp_move_on_board = opp_tile and (depth > 0 or move_tree_node or context.leaf_evaluator)
+    if opp_tile:
+        # Make move, update
+        if opp_move_on_board:
+            board.make_move(opp_tile, opp_direction)
+        game_state.opp_score += opp_move_score
+        game_state.opp_hand_size -= 1
+    game_state.my_turn = True
+
+    val = None
+    opp_move_tree_node = None
+    if held:
+        if move_tree_node:
+            opp_move_tree_node = TreeNode(game_state, opp_move)
+            move_tree_node.children.append(opp_move_tree_node)
+        # Score move
+        # TODO: Handle case when board is boxed out?
+        if game_state.opp_hand_size == 0:
+            val = game_state_value(game_state)
+        elif depth == 0:
+            val = context.leaf_value(game_state)
+        else:
+            tree_results = tree_search(depth - 1, game_state, opp_move_tree_node, context)
+            val = max(tree_results.values())
+        if move_tree_node:
+            opp_move_tree_node.ev = val
+    # Add draw situation
+    val_draw = None
+    opp_move_draw_tree_nodes = []
+    if prob_draw > 0:
+        # The tiles drawn aren't covered by the belief
+        belief, context.belief = context.belief, None
+        try:
+            val_draw = _opp_draw_value(depth, game_state, opp_move, draw_counts,
+                                       move_tree_node, context, opp_move_draw_tree_nodes)
+        finally:
+            context.belief = belief
+
+    # Undo opp move to board, scoreboard, hands, boneyard
+    if opp_tile:
+        game_state.opp_hand_size += 1
+        game_state.opp_score -= opp_move_score
+    if opp_move_on_board:
+        board.undo_move(opp_tile, opp_direction)
+    return val, val_draw, opp_move_tree_node, opp_move_draw_tree_nodes
+
+# Value of the opponent's reply opp_move, already made, after drawing,
+# over draw_counts. Adds (node, prob) pairs for each number of draws to
+# draw_tree_nodes, if move_tree_node is given. Only the most likely number
+# of draws, the first, is searched to depth; the others are searched a ply
+# shallower.
+def _opp_draw_value(depth, game_state, opp_move, draw_counts, move_tree_node, context,
+                    draw_tree_nodes):
+    val_draw = 0.0
+    for i, (num_draws, draw_prob) in enumerate(draw_counts):
+        game_state.opp_hand_size += num_draws
+        draw_tree_node = None
+        if move_tree_node:
+            draw_tree_node = TreeNode(game_state, opp_move)
+            draw_tree_node.simulated = True
+            move_tree_node.children.append(draw_tree_node)
+        draw_depth = depth if i == 0 else depth - 1
+        if draw_depth <= 0:
+            val_num_draws = context.leaf_value(game_state)
+        else:
+            tree_results_draw = tree_search(draw_depth - 1, game_state, draw_tree_node, context)
+            val_num_draws = max(tree_results_draw.values())
+        if move_tree_node:
+            draw_tree_node.ev = val_num_draws
+            draw_tree_nodes.append((draw_tree_node, draw_prob))
+        val_draw += draw_prob * val_num_draws
+        game_state.opp_hand_size -= num_draws
+    return val_draw
+
+# Expected value of the opponent's replies to my move, already made on the
+# board. If alpha is given, stops (Star1-style) as soon as the upper bound
+# on the EV falls below alpha and returns that bound.
+def _opp_replies_value(depth, game_state, other_mask, move_tree_node, context, alpha=None):
+    board = game_state.board
+    tile_probs = None
+    if context.belief:
+        tile_probs = context.belief.tile_probs(other_mask, game_state.opp_hand_size)
+    # If prob draw, try each move with and without extra opp tiles
+    num_other_tiles, opp_valid_moves, prob_draw, draw_counts = \
+        _opp_reply_chances(board, other_mask, game_state.opp_hand_size, tile_probs)
+
+    # Loop through opponent's moves, keeping track of value of each
+    opp_move_vals = {}
+    opp_move_vals_draw = {}
+    opp_tree_node_from_move = {}
+    opp_tree_node_draw_from_move = {}
+    opp_moves = opp_valid_moves or [(None, None)]
+    opp_move_scores = board.scores_if_played(opp_valid_moves) or [0]
+    orderer = context.orderer if opp_valid_moves else None
+    if orderer:
+        opp_moves, opp_move_scores = zip(*orderer.order_moves(
+            opp_moves, opp_move_scores, depth, False))
+    reply_depth = depth
+    best_reply_val = None
+    depth -= 1
+    for i, (opp_move, opp_move_score) in enumerate(zip(opp_moves, opp_move_scores)):
+        # Replies with tiles the opponent can't hold only come up after drawing
+        held = tile_probs is None or not opp_move[0] or tile_probs[opp_move[0].id] > 0
+        if not held and prob_draw == 0:
+            continue
+        context.opp_nodes += 1
+        context.check_budget()
+        val, val_draw, opp_move_tree_node, opp_move_draw_tree_nodes = _opp_reply_value(
+            depth, game_state, opp_move, opp_move_score, prob_draw,
+            draw_counts, move_tree_node, context, held)
+        if held:
+            opp_move_vals[opp_move] = val
+            opp_tree_node_from_move[opp_move] = opp_move_tree_node
+            # The opponent's best reply is the worst for me
+            if best_reply_val is None or val < best_reply_val:
+                best_reply_val = val
+                best_reply, best_reply_rank = opp_move, i
+        if prob_draw > 0:
+            opp_move_vals_draw[opp_move] = val_draw
+            opp_tree_node_draw_from_move[opp_move] = opp_move_draw_tree_nodes
+
+        # Only worth bounding when the remaining replies are searched
+        if alpha is not None and depth > 0 and i + 1 < len(opp_moves):
+            upper_bound = _opp_replies_upper_bound(
+                opp_moves, opp_move_vals, opp_move_vals_draw, prob_draw,
+                game_state.opp_hand_size, num_other_tiles, tile_probs)
+            if upper_bound < alpha:
+                context.cutoffs += 1
+                if orderer and best_reply_val is not None:
+                    orderer.record_best(best_reply, best_reply_rank, reply_depth, False)
+                return upper_bound
+
+    if orderer and best_reply_val is not None:
+        orderer.record_best(best_reply, best_reply_rank, reply_depth, False)
+    ev, prob_moves, prob_moves_draw = _opp_replies_ev(
+        opp_move_vals, opp_move_vals_draw, prob_draw, game_state.opp_hand_size,
+        num_other_tiles, tile_probs)
+    if move_tree_node:
+        for opp_move, prob in prob_moves.iteritems():
+            opp_move_node = opp_tree_node_from_move[opp_move]
+            opp_move_node.prob = prob
+        for opp_move, prob in prob_moves_draw.iteritems():
+            for opp_move_node, draw_prob in opp_tree_node_draw_from_move[opp_move]:
+                opp_move_node.prob = prob * draw_prob
+    return ev
@@ -1,9 +1,14 @@
 import unittest
 import algos
 import operator as op
+import random
 from board import Board
 from game_state import GameState
 from tile import Tile, get_all_tiles
+import tile_set
+from belief import Belief
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
 from collections import defaultdict
 from dominoes_util import Dir, all_dirs, opposite
 
@@ -124,7 +129,7 @@ class TestAlgos(unittest.TestCase):
         self.assertEquals(value, 1.0)
         value = algos.game_state_value(build_gs(100, 155, 150, 3, 3, True))
         self.assertEquals(value, 0.0)
-        value = algos.game_state_value(build_gs(100, 110, 150, 3, 3, True))
+        value = algos.game_state_value(build_gs(100, 105, 150, 3, 3, True))
         self.assertGreater(value, 0.5)
         value = algos.game_state_value(build_gs(100, 110, 150, 3, 2, True))
         self.assertLess(value, 0.5)
@@ -138,6 +143,18 @@ class TestAlgos(unittest.TestCase):
         value = algos.game_state_value(build_gs(145, 115, 150, 1, 3, True))
         self.assertLess(value, 1.0)
 
+    def test_prob_winning(self):
+        self.assertEqual(algos.prob_winning(150, 140, False, 150), 1.0)
+        self.assertEqual(algos.prob_winning(140, 150, True, 150), 0.0)
+        self.assertGreater(algos.prob_winning(100, 100, True, 150), 0.5)
+        self.assertAlmostEqual(algos.prob_winning(100, 120, True, 150),
+                               1.0 - algos.prob_winning(120, 100, False, 150))
+        self.assertGreater(algos.prob_winning(140, 130, True, 150),
+                           algos.prob_winning(130, 130, True, 150))
+        # Without a table, a serve bonus is added to the scores
+        self.assertEqual(algos.prob_winning(50, 50, True, 101),
+                         algos.prob_winning_from_scores(62, 50, 101))
+
     def test_serve_bonus(self):
         return
         self.assertEquals(100 + algos.serve_bonus(100, 150), 112)
@@ -194,84 +211,6 @@ class TestAlgos(unittest.TestCase):
         self.assertEqual(algos.playable_moves(self.board, Tile(1,6)),
                          moves_for_1_6)
 
-    def test_simulate_draws(self):
-        hand = set([Tile(1,1), Tile(1,2), Tile(1,4), Tile(1,5)])
-        boneyard_size = 14
-        all_other_tiles = set([
-            Tile(0,0), Tile(0,1), Tile(0,2), Tile(0,3), Tile(0,4),
-            Tile(0,5), Tile(1,3), Tile(1,6), Tile(2,2), Tile(2,3),
-            Tile(2,4), Tile(2,5), Tile(2,6), Tile(3,4), Tile(3,5),
-            Tile(4,4), Tile(5,5)])
-        # num not playable tiles: 5
-        # num playable tiles: 9
-        # approximate expected num draws: 1.5
-        num_simulations = 100
-        sum_draws= 0
-        for i in range(num_simulations):
-            extra_tiles = algos.simulate_draws(self.board, hand, boneyard_size)
-            self.assertGreaterEqual(len(extra_tiles), 0)
-            self.assertLessEqual(len(extra_tiles), 6)
-            sum_draws += len(extra_tiles)
-            for tile in extra_tiles[:-1]:
-                self.assertIn(tile, all_other_tiles)
-                for direction in all_dirs():
-                    self.assertFalse(self.board.valid_move(tile, direction))
-            last_tile = extra_tiles[-1]
-            self.assertIn(last_tile, all_other_tiles)
-            tile_has_valid_move = False
-            for direction in all_dirs():
-                if self.board.valid_move(last_tile, direction):
-                    tile_has_valid_move = True
-            self.assertTrue(tile_has_valid_move)
-        avg_num_draws = 1.0 * sum_draws / num_simulations
-        self.assertLess(avg_num_draws, 1.7)
-        self.assertGreater(avg_num_draws, 1.2)
-
-    def test_simulate_draws_until_knock(self):
-        # Test case where could draw all tiles
-        board = Board()
-        moves = [
-            (Tile(6,6), Dir.RIGHT),
-            (Tile(6,0), Dir.RIGHT),
-            (Tile(1,0), Dir.RIGHT),
-            (Tile(1,6), Dir.RIGHT),
-            (Tile(6,2), Dir.RIGHT),
-            (Tile(2,3), Dir.RIGHT),
-            (Tile(6,3), Dir.RIGHT),
-            (Tile(6,4), Dir.LEFT),
-            (Tile(5,4), Dir.LEFT),
-            (Tile(5,5), Dir.LEFT),
-            (Tile(5,3), Dir.LEFT),
-            (Tile(3,0), Dir.LEFT),
-            (Tile(0,5), Dir.LEFT),
-            (Tile(5,1), Dir.LEFT),
-            (Tile(1,2), Dir.LEFT),
-            (Tile(2,5), Dir.LEFT),
-        ]
-        # The only playable tile after this is (5,6)
-        for tile, direction in moves:
-            board.make_move(tile, direction)
-        # 16 tiles out, 12 left over, 4 in each hand, 4 in boneyard
-        hand = set([Tile(1,1), Tile(2,2), Tile(3,3), Tile(4,4)])
-        boneyard_size = 4
-        # 50 / 50 chance of drawing it
-        num_knocks = 0
-        for i in range(100):
-            extra_tiles = algos.simulate_draws(board, hand, boneyard_size)
-            can_play = False
-            for direction in all_dirs():
-                if board.valid_move(extra_tiles[-1], direction):
-                    can_play = True
-            if can_play:
-                self.assertEquals(extra_tiles[-1], Tile(5,6))
-                self.assertLessEqual(len(extra_tiles), 4)
-            else:
-                num_knocks += 1
-                self.assertEquals(len(extra_tiles), 4)
-        self.assertGreater(num_knocks, 38)
-        self.assertLess(num_knocks, 62)
-
-
     def test_boxed_out_value(self):
         def build_gs(hand, other_tiles, opp_hand_size, my_score, opp_score, play_to):
             board = Board()
@@ -285,77 +224,16 @@ class TestAlgos(unittest.TestCase):
         other_tiles = set([Tile(1,1), Tile(0,0), Tile(6,6), Tile(5,5)])
         opp_hand_size = 2
         val = algos.boxed_out_value(build_gs(hand, other_tiles, opp_hand_size, 0, 0, 150))
-        self.assertEquals(val, algos.prob_winning_from_scores(0, 22, 150))
+        self.assertEquals(val, algos.prob_winning(0, 10, False, 150))
         # We win
         hand = set([Tile(2,1), Tile(4,4)])
         val = algos.boxed_out_value(build_gs(hand, other_tiles, opp_hand_size, 0, 0, 150))
-        self.assertEquals(val, algos.prob_winning_from_scores(22, 0, 150))
+        self.assertEquals(val, algos.prob_winning(10, 0, True, 150))
         # Tie
         hand = set([Tile(2,2), Tile(4,4)])
         val = algos.boxed_out_value(build_gs(hand, other_tiles, opp_hand_size, 0, 0, 150))
         self.assertEquals(val, 0.5)
 
-    def test_get_valid_moves_and_extra_tiles_when_valid_moves(self):
-        # With valid moves
-        hand = [Tile(6, 2), Tile(2, 2), Tile(3, 1), Tile(0, 0)]
-        expected_valid_moves = [(Tile(6, 2), Dir.LEFT), (Tile(6, 2), Dir.DOWN),
-                                (Tile(3, 1), Dir.RIGHT), (Tile(0, 0), Dir.UP)]
-        valid_moves_and_extra_tiles = algos.get_valid_moves_and_extra_tiles(
-            self.board, hand, 3)
-        extra_tiles = [x[1] for x in valid_moves_and_extra_tiles]
-        valid_moves = [x[0] for x in valid_moves_and_extra_tiles]
-        self.assertEquals(extra_tiles, [set() for i in range(len(extra_tiles))])
-        self.assertEquals(set(valid_moves), set(expected_valid_moves))
-
-    def test_get_valid_moves_and_extra_tiles_when_no_valid_moves(self):
-        # With no valid moves
-        hand = set([Tile(1,1), Tile(1,2), Tile(1,4), Tile(1,5)])
-        valid_moves_and_extra_tiles = algos.get_valid_moves_and_extra_tiles(
-            self.board, hand, 3, sims=100)
-        self.assertGreaterEqual(len(valid_moves_and_extra_tiles), 100)
-        for valid_move, extra_tiles in valid_moves_and_extra_tiles:
-            self.assertTrue(valid_move[0])
-            self.assertTrue(self.board.valid_move(*valid_move))
-            self.assertGreaterEqual(len(extra_tiles), 1)
-            num_playable_extra_tiles = 0
-            for tile in extra_tiles:
-                for direction in all_dirs():
-                    if self.board.valid_move(tile, direction):
-                        num_playable_extra_tiles += 1
-                        break
-                        self.assertEquals(tile, valid_move[0])
-            self.assertEqual(num_playable_extra_tiles, 1)
-
-    def test_get_valid_moves_and_extra_tiles_when_could_knock(self):
-        # Test case where could draw all tiles
-        board = Board()
-        moves = [
-            (Tile(6,6), Dir.RIGHT), (Tile(6,0), Dir.RIGHT), (Tile(1,0), Dir.RIGHT),
-            (Tile(1,6), Dir.RIGHT), (Tile(6,2), Dir.RIGHT), (Tile(2,3), Dir.RIGHT),
-            (Tile(6,3), Dir.RIGHT), (Tile(6,4), Dir.LEFT), (Tile(5,4), Dir.LEFT),
-            (Tile(5,5), Dir.LEFT), (Tile(5,3), Dir.LEFT), (Tile(3,0), Dir.LEFT),
-            (Tile(0,5), Dir.LEFT), (Tile(5,1), Dir.LEFT), (Tile(1,2), Dir.LEFT),
-            (Tile(2,5), Dir.LEFT),
-        ] # The only playable tile after this is (5,6)
-        for tile, direction in moves:
-            board.make_move(tile, direction)
-        # 16 tiles out, 12 left over, 4 in each hand, 4 in boneyard
-        hand = set([Tile(1,1), Tile(2,2), Tile(3,3), Tile(4,4)])
-        boneyard_size = 4
-        valid_moves_and_extra_tiles = algos.get_valid_moves_and_extra_tiles(
-            board, hand, boneyard_size, sims=100)
-        self.assertGreaterEqual(len(valid_moves_and_extra_tiles), 100)
-        no_valid_moves_cnt = 0
-        for valid_move, extra_tiles in valid_moves_and_extra_tiles:
-            if valid_move[0]:
-                self.assertEqual(valid_move[0], Tile(5,6))
-                self.assertIn(valid_move[0], extra_tiles)
-            else:
-                self.assertEqual(len(extra_tiles), 4)
-                no_valid_moves_cnt += 1
-        self.assertGreaterEqual(no_valid_moves_cnt, 38)
-        self.assertLessEqual(no_valid_moves_cnt, 62)
-
     def test_compute_prob_draw(self):
         # Easy cases
         self.assertEqual(algos.compute_prob_draw(10, 5, 10), 0.0)
@@ -371,20 +249,84 @@ class TestAlgos(unittest.TestCase):
         prob_miss *= 3.0 / 6
         self.assertAlmostEqual(algos.compute_prob_draw(3, 5, 10), prob_miss)
 
-    def test_compute_exp_num_draws_given_drawing(self):
+    def test_draw_count_probs(self):
         # Easy cases
-        self.assertEqual(algos.compute_exp_num_draws_given_drawing(5, 5), 1)
-        self.assertEqual(algos.compute_exp_num_draws_given_drawing(0, 5), 5)
-        # For 1, 3
-        exp = (1. / 3) * 1
-        exp += (1 - 1. / 3) * (1. / 2) * 2
-        exp += (1 - 1. / 3) * (1 - 1. / 2) * (1. / 1) * 3
-        self.assertEqual(algos.compute_exp_num_draws_given_drawing(1, 3), int(round(exp)))
+        self.assertEqual(algos.draw_count_probs(5, 5), [(1, 1.0)])
+        self.assertEqual(algos.draw_count_probs(0, 5), [(5, 1.0)])
+        # For 1, 3 each number of draws is as likely
+        for (num_draws, prob), expected in zip(algos.draw_count_probs(1, 3), [1, 2, 3]):
+            self.assertEqual(num_draws, expected)
+            self.assertAlmostEqual(prob, 1. / 3)
         # For 8, 10
-        exp = (8. / 10) * 1
-        exp += (1 - 8. / 10) * (8. / 9) * 2
-        exp += (1 - 8. / 10) * (1 - 8. / 9) * (8. / 8) * 3
-        self.assertEqual(algos.compute_exp_num_draws_given_drawing(8, 10), int(round(exp)))
+        probs = [8. / 10, (1 - 8. / 10) * (8. / 9), (1 - 8. / 10) * (1 - 8. / 9)]
+        for (num_draws, prob), expected in zip(algos.draw_count_probs(8, 10), probs):
+            self.assertAlmostEqual(prob, expected)
+        # Keeping the most likely and folding the rest into their mean
+        (num_draws_1, prob_1), (num_draws_2, prob_2) = algos.draw_count_probs(8, 10, 2)
+        self.assertEqual((num_draws_1, num_draws_2), (1, 2))
+        self.assertAlmostEqual(prob_1, probs[0])
+        self.assertAlmostEqual(prob_2, probs[1] + probs[2])
+        # All of them folded: 2 draws on average
+        self.assertEqual(algos.draw_count_probs(1, 3, 1), [(2, 1.0)])
+        # The 2 most likely, and the rest at 4 draws on average
+        counts = algos.draw_count_probs(1, 5, 3)
+        self.assertEqual([num_draws for num_draws, prob in counts], [1, 2, 4])
+        for (num_draws, prob), expected in zip(counts, [1. / 5, 1. / 5, 3. / 5]):
+            self.assertAlmostEqual(prob, expected)
+
+    def test_my_draw_outcomes(self):
+        hand = set([Tile(1,1), Tile(1,2), Tile(1,4), Tile(1,5)])
+        outcomes = algos.my_draw_outcomes(self.board, hand, 3)
+        self.assertAlmostEqual(sum(prob for extra_tiles, prob in outcomes), 1.0)
+        # One outcome for each playable tile, which is drawn last
+        playable_tiles = set()
+        for extra_tiles, prob in outcomes:
+            self.assertTrue(algos.playable_moves(self.board, extra_tiles[-1]))
+            for tile in extra_tiles[:-1]:
+                self.assertFalse(algos.playable_moves(self.board, tile))
+            playable_tiles.add(extra_tiles[-1])
+        self.assertEqual(len(playable_tiles), 12)
+        self.assertEqual(len(outcomes), 12)
+        # Keeping 4 of them, spread over their points
+        kept = algos.my_draw_outcomes(self.board, hand, 3, 4)
+        self.assertEqual(len(kept), 4)
+        self.assertAlmostEqual(sum(prob for extra_tiles, prob in kept), 1.0)
+        kept_points = [extra_tiles[-1].total_points() for extra_tiles, prob in kept]
+        all_points = sorted(tile.total_points() for tile in playable_tiles)
+        self.assertEqual(kept_points, [all_points[1], all_points[4], all_points[7],
+                                       all_points[10]])
+        # Uneven runs carry the chance of every tile in them
+        kept = algos.my_draw_outcomes(self.board, hand, 3, 5)
+        prob_tile = outcomes[0][1]
+        self.assertEqual([round(prob / prob_tile) for extra_tiles, prob in kept],
+                         [2, 2, 3, 2, 3])
+
+    def test_my_draw_outcomes_when_could_knock(self):
+        board = Board()
+        moves = [
+            (Tile(6,6), Dir.RIGHT), (Tile(6,0), Dir.RIGHT), (Tile(1,0), Dir.RIGHT),
+            (Tile(1,6), Dir.RIGHT), (Tile(6,2), Dir.RIGHT), (Tile(2,3), Dir.RIGHT),
+            (Tile(6,3), Dir.RIGHT), (Tile(6,4), Dir.LEFT), (Tile(5,4), Dir.LEFT),
+            (Tile(5,5), Dir.LEFT), (Tile(5,3), Dir.LEFT), (Tile(3,0), Dir.LEFT),
+            (Tile(0,5), Dir.LEFT), (Tile(5,1), Dir.LEFT), (Tile(1,2), Dir.LEFT),
+            (Tile(2,5), Dir.LEFT),
+        ] # The only playable tile after this is (5,6)
+        for tile, direction in moves:
+            board.make_move(tile, direction)
+        # 8 tiles I can't see, 4 in the opponent's hand, 4 in the boneyard
+        hand = set([Tile(1,1), Tile(2,2), Tile(3,3), Tile(4,4)])
+        (draw_tiles, prob_draw), (knock_tiles, prob_knock) = algos.my_draw_outcomes(
+            board, hand, 4)
+        # (5,6) is in the boneyard half the time, after 1.5 dead tiles on average
+        self.assertAlmostEqual(prob_draw, 0.5)
+        self.assertEqual(draw_tiles[-1], Tile(5,6))
+        self.assertEqual(len(draw_tiles), 3)
+        # Otherwise the whole boneyard is drawn
+        self.assertAlmostEqual(prob_knock, 0.5)
+        self.assertEqual(len(knock_tiles), 4)
+        self.assertNotIn(Tile(5,6), knock_tiles)
+        # With nothing to draw, I knock
+        self.assertEqual(algos.my_draw_outcomes(board, hand, 8), [([], 1.0)])
 
     def test_expected_value_opp_moves_all_valid(self):
         move_vals = [0.7, 0.5, 0.2, 0.2, 0.1]
@@ -411,10 +353,160 @@ class TestAlgos(unittest.TestCase):
         exp += prob_second * 0.5
         self.assertAlmostEqual(algos.expected_value_opp_moves(move_vals, 2, 5), exp)
 
+    def test_prob_opp_moves_with_tile_probs(self):
+        a, b, c = (Tile(0,1), Dir.LEFT), (Tile(0,2), Dir.LEFT), (Tile(0,3), Dir.LEFT)
+        move_vals = {a: 0.2, b: 0.5, c: 0.7}
+        # Same as without them when they're all the same
+        tile_probs = [0.0] * 28
+        for tile in [Tile(0,1), Tile(0,2), Tile(0,3), Tile(0,4), Tile(0,5)]:
+            tile_probs[tile.id] = 2. / 5
+        probs = algos.prob_opp_moves(move_vals, 2, 5)
+        weighted_probs = algos.prob_opp_moves(move_vals, 2, 5, tile_probs)
+        for move in move_vals:
+            self.assertAlmostEqual(weighted_probs[move], probs[move])
+        # Can't be held
+        for tile in [Tile(0,1), Tile(0,3), Tile(0,4), Tile(0,5)]:
+            tile_probs[tile.id] = 2. / 4
+        tile_probs[Tile(0,2).id] = 0.0
+        probs = algos.prob_opp_moves(move_vals, 2, 5, tile_probs)
+        # Best for the opponent first
+        self.assertAlmostEqual(probs[a], 2. / 4)
+        self.assertEqual(probs[b], 0.0)
+        self.assertAlmostEqual(probs[c], (1 - 2. / 4) * (2. / 3))
+
+    def test_opp_reply_chances_empty_boneyard(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        other_mask = algos.get_other_tiles_mask(self.board, hand)
+        opp_hand_size = tile_set.popcount(other_mask)
+        belief = Belief()
+        for tile in [Tile(0, 0), Tile(2, 6), Tile(5, 5)]:
+            belief.weights[tile.id] = 0.1
+        tile_probs = belief.tile_probs(other_mask, opp_hand_size)
+        # They hold every tile, so they never draw
+        num_other_tiles, opp_valid_moves, prob_draw, draw_counts = \
+            algos._opp_reply_chances(self.board, other_mask, opp_hand_size, tile_probs)
+        self.assertTrue(opp_valid_moves)
+        self.assertEqual(prob_draw, 0.0)
+        self.assertEqual(algos._opp_reply_chances(self.board, other_mask,
+                                                  opp_hand_size)[2], 0.0)
+
+    def test_tree_search_with_belief(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        full = algos.SearchContext()
+        full_evs = algos.tree_search(2, gs, context=full)
+        # Knowing nothing changes nothing
+        evs = algos.tree_search(2, gs, context=algos.SearchContext(belief=Belief()))
+        for move, ev in full_evs.iteritems():
+            self.assertAlmostEqual(evs[move], ev)
+        # Void in 6s: their replies with 6s are only searched after drawing
+        belief = Belief()
+        belief.void_mask = tile_set.PIP_MASKS[6]
+        void = algos.SearchContext(belief=belief)
+        void_evs = algos.tree_search(2, gs, context=void)
+        self.assertEqual(set(void_evs.keys()), set(full_evs.keys()))
+        self.assertLess(void.nodes, full.nodes)
+        self.assertIs(void.belief, belief)
+
     def test_expected_value_opp_draw(self):
         move_vals = [0.7, 0.5]
         self.assertEqual(algos.expected_value_opp_draw(move_vals, 0.2), 0.6 * 0.2)
 
+    def test_game_state_key(self):
+        hand = set([Tile(3, 4), Tile(0, 3)])
+        gs = GameState(self.board, 10, 5, 150, hand, 4)
+        key = gs.key()
+        self.assertEqual(gs.copy().key(), key)
+        keys = set([key])
+        for other in [GameState(self.board, 10, 5, 150, set([Tile(3, 4)]), 4),
+                      GameState(self.board, 5, 10, 150, hand, 4),
+                      GameState(self.board, 10, 5, 150, hand, 5),
+                      GameState(self.board, 10, 5, 150, hand, 4, False)]:
+            keys.add(other.key())
+        self.assertEqual(len(keys), 5)
+
+    def test_tree_search_with_table(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        table = TranspositionTable(1000)
+        context = algos.SearchContext(table)
+        ev_dict = algos.tree_search(2, gs)
+        self.assertEqual(algos.tree_search(2, gs, context=context), ev_dict)
+        self.assertEqual(table.hits, 0)
+        self.assertEqual(algos.tree_search(2, gs, context=context), ev_dict)
+        self.assertEqual(table.hits, 1)
+        # Shallower searches are answered from the deeper entry
+        self.assertEqual(algos.tree_search(1, gs, context=context), ev_dict)
+        self.assertEqual(table.hits, 2)
+
+    def test_tree_search_with_table_and_belief(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        table = TranspositionTable(1000)
+        evs = algos.tree_search(2, gs, context=algos.SearchContext(table, belief=Belief()))
+        # A belief learned since isn't answered from the entries of the old one
+        belief = Belief()
+        belief.void_mask = tile_set.PIP_MASKS[6]
+        void_evs = algos.tree_search(2, gs, context=algos.SearchContext(belief=belief))
+        self.assertNotEqual(void_evs, evs)
+        self.assertEqual(algos.tree_search(2, gs, context=algos.SearchContext(
+            table, belief=belief)), void_evs)
+        hits = table.hits
+        self.assertEqual(algos.tree_search(2, gs, context=algos.SearchContext(
+            table, belief=belief)), void_evs)
+        self.assertEqual(table.hits, hits + 1)
+
+    def test_tree_search_pruned(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        for depth in [1, 2, 3]:
+            full = algos.SearchContext()
+            pruned = algos.SearchContext(prune=True)
+            full_evs = algos.tree_search(depth, gs, context=full)
+            pruned_evs = algos.tree_search(depth, gs, context=pruned)
+            best_move = max(full_evs.iteritems(), key=op.itemgetter(1))[0]
+            self.assertEqual(max(pruned_evs.iteritems(), key=op.itemgetter(1))[0],
+                             best_move)
+            # The best move's EV is exact, the others are upper bounds
+            self.assertAlmostEqual(pruned_evs[best_move], full_evs[best_move])
+            for move, ev in full_evs.iteritems():
+                self.assertLessEqual(ev, pruned_evs[move] + 1e-9)
+            self.assertLessEqual(pruned.opp_nodes, full.opp_nodes)
+            ordered = algos.SearchContext(prune=True, orderer=MoveOrderer())
+            ordered_evs = algos.tree_search(depth, gs, context=ordered)
+            self.assertEqual(max(ordered_evs.iteritems(), key=op.itemgetter(1))[0],
+                             best_move)
+            self.assertAlmostEqual(ordered_evs[best_move], full_evs[best_move])
+
+    def test_tree_search_when_drawing(self):
+        hand = set([Tile(1,1), Tile(1,2), Tile(1,4), Tile(1,5)])
+        gs = GameState(self.board, 0, 0, 150, hand, 3)
+        board_repr = repr(gs.board)
+        ev_dict = algos.tree_search(2, gs)
+        self.assertEqual(ev_dict.keys(), [(None, None)])
+        # Draws are chance nodes, not random samples
+        self.assertEqual(algos.tree_search(2, gs), ev_dict)
+        self.assertEqual(gs.hand, hand)
+        self.assertEqual(repr(gs.board), board_repr)
+
+    def test_iterative_deepening_search(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        ev_dict, depth = algos.iterative_deepening_search(gs, 2)
+        self.assertEqual(depth, 2)
+        self.assertEqual(set(ev_dict.keys()), set(algos.tree_search(2, gs).keys()))
+        # Runs out of nodes during depth 2, leaving the game state untouched
+        board_repr, key = repr(gs.board), gs.key()
+        ev_dict, depth = algos.iterative_deepening_search(gs, 3, node_limit=100)
+        self.assertEqual(depth, 1)
+        self.assertEqual(ev_dict, algos.tree_search(1, gs))
+        self.assertEqual(repr(gs.board), board_repr)
+        self.assertEqual(gs.key(), key)
+        # Depth 0 is always finished
+        ev_dict, depth = algos.iterative_deepening_search(gs, 3, time_limit=0)
+        self.assertEqual(depth, 0)
+        self.assertEqual(ev_dict, algos.tree_search(0, gs))
+
     def test_tree_search(self):
         hand = set([
             Tile(3, 4), # Scores 10 Right
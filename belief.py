@@ -0,0 +1,132 @@
+import tile_set
+import zobrist
+from board import Board
+
+# What the opponent is likely to hold, deduced from the moves of the round
+# so far (GameState.history):
+# * A player who draws or knocks has no tile with the side of an open end.
+#   These sides are the opponent's voids. Tiles they draw later are new,
+#   so a draw replaces the voids, and a knock (with nothing left to draw)
+#   adds to them.
+# * A player who makes a move when another tile would have scored more
+#   probably doesn't have that tile, so it gets less likely.
+# The history is read incrementally, one event at a time, as it grows.
+
+# Relative likelihood of holding a tile that would have scored more than
+# the move the opponent made
+SKIPPED_SCORE_WEIGHT = 0.5
+
+# Tiles left to draw after dealing two hands of 7
+INITIAL_BONEYARD_SIZE = tile_set.NUM_TILES - 2 * 7
+
+class Belief(object):
+    def __init__(self):
+        self.reset()
+
+    # Forgets everything, for a new round
+    def reset(self):
+        self.board = Board()
+        self.first_event = None
+        self.num_events = 0
+        self.num_draws = 0
+        # Tiles with a side the opponent is void in
+        self.void_mask = 0
+        # Tile id -> relative likelihood the opponent holds it, voids aside
+        self.weights = [1.0] * tile_set.NUM_TILES
+
+    # Reads the events of game_state.history not read yet. A history that
+    # is shorter or starts differently is from a new round.
+    def update(self, game_state):
+        history = game_state.history
+        if len(history) < self.num_events or (history and history[0] != self.first_event):
+            self.reset()
+        for event in history[self.num_events:]:
+            self._apply(event)
+        self.num_events = len(history)
+        if history:
+            self.first_event = history[0]
+
+    def _apply(self, event):
+        tile, direction, by_me, score = event
+        if tile is not None:
+            if not by_me and self.board.get_num_tiles_on_board():
+                self._skip_scores(tile, direction)
+            self.board.make_move(tile, direction)
+        elif self.num_draws < INITIAL_BONEYARD_SIZE:
+            self.num_draws += 1
+            if not by_me:
+                # Their hand now has a tile nothing is known about
+                self.void_mask = self._open_end_mask()
+                self.weights = [1.0] * tile_set.NUM_TILES
+        elif not by_me:
+            self.void_mask |= self._open_end_mask()
+
+    def _open_end_mask(self):
+        mask = 0
+        for side in self.board.get_open_end_sides():
+            mask |= tile_set.PIP_MASKS[side]
+        return mask
+
+    def _skip_scores(self, tile, direction):
+        score = self.board.score_if_played(tile, direction)
+        moves = self.board.get_unique_valid_moves()
+        skipped_ids = set(t.id for (t, d), move_score in
+                          zip(moves, self.board.scores_if_played(moves))
+                          if move_score > score)
+        for tile_id in skipped_ids:
+            self.weights[tile_id] *= SKIPPED_SCORE_WEIGHT
+
+    # Relative likelihood the opponent holds each tile of other_mask (the
+    # tiles the player to move can't see), as a list by tile id, 0 for
+    # tiles not in it. If the voids leave fewer tiles than the opponent
+    # holds, the history misled them, and they're ignored.
+    def tile_weights(self, other_mask, opp_hand_size):
+        mask = other_mask & ~self.void_mask
+        if tile_set.popcount(mask) < opp_hand_size:
+            mask = other_mask
+        weights = [0.0] * tile_set.NUM_TILES
+        for i in tile_set.mask_to_ids(mask):
+            weights[i] = self.weights[i]
+        return weights
+
+    # Probability the opponent holds each tile of other_mask, as a list by
+    # tile id: the tile weights scaled to sum to opp_hand_size, with none
+    # over 1
+    def tile_probs(self, other_mask, opp_hand_size):
+        probs = [0.0] * tile_set.NUM_TILES
+        weights = self.tile_weights(other_mask, opp_hand_size)
+        tile_ids = [i for i in range(tile_set.NUM_TILES) if weights[i] > 0]
+        num_left = float(opp_hand_size)
+        while tile_ids and num_left > 0:
+            scale = num_left / sum(weights[i] for i in tile_ids)
+            sure_ids = [i for i in tile_ids if weights[i] * scale >= 1.0]
+            if not sure_ids:
+                for i in tile_ids:
+                    probs[i] = weights[i] * scale
+                break
+            for i in sure_ids:
+                probs[i] = 1.0
+            num_left -= len(sure_ids)
+            tile_ids = [i for i in tile_ids if weights[i] * scale < 1.0]
+        return probs
+
+    # Hash of what the search needs, mixed into transposition table keys so
+    # positions searched under another belief aren't reused
+    def digest(self):
+        return hash(self.search_state()) & zobrist.MASK_64
+
+    # What the search needs, to pass to worker processes
+    def search_state(self):
+        return self.void_mask, tuple(self.weights)
+
+    @classmethod
+    def from_search_state(cls, state):
+        belief = cls()
+        belief.void_mask, weights = state
+        belief.weights = list(weights)
+        return belief
+
+    def __repr__(self):
+        return 'Belief(voids=%s, weights=%s)' % (
+            tile_set.mask_to_tiles(self.void_mask),
+            dict((tile, w) for tile, w in zip(tile_set.ALL_TILES, self.weights) if w != 1.0))
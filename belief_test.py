@@ -0,0 +1,94 @@
+import unittest
+import tile_set
+import belief
+from belief import Belief
+from board import Board
+from game_state import GameState
+from tile import Tile
+from dominoes_util import Dir
+
+class TestBelief(unittest.TestCase):
+    def game_state(self, history, hand=(), opp_hand_size=7):
+        board = Board()
+        for tile, direction, by_me, score in history:
+            if tile:
+                board.make_move(tile, direction)
+        return GameState(board, 0, 0, 150, set(hand), opp_hand_size, history=history)
+
+    def test_draw_sets_voids(self):
+        b = Belief()
+        b.update(self.game_state([(Tile(6,6), Dir.RIGHT, True, 0),
+                                  (None, None, False, 0)]))
+        self.assertEqual(b.void_mask, tile_set.PIP_MASKS[6])
+        # My own draws say nothing about the opponent
+        b = Belief()
+        b.update(self.game_state([(Tile(6,6), Dir.RIGHT, False, 0),
+                                  (None, None, True, 0)]))
+        self.assertEqual(b.void_mask, 0)
+
+    def test_knock_adds_voids(self):
+        history = [(Tile(6,6), Dir.RIGHT, True, 0), (None, None, False, 0),
+                   (Tile(6,3), Dir.RIGHT, False, 15)]
+        # I draw the rest of the boneyard
+        history += [(None, None, True, 0)] * (belief.INITIAL_BONEYARD_SIZE - 1)
+        history += [(Tile(3,1), Dir.RIGHT, True, 0), (None, None, False, 0)]
+        b = Belief()
+        b.update(self.game_state(history))
+        self.assertEqual(b.void_mask, tile_set.PIP_MASKS[6] | tile_set.PIP_MASKS[1])
+
+    def test_skipped_score(self):
+        # [6|3] would have scored 15
+        b = Belief()
+        b.update(self.game_state([(Tile(6,6), Dir.RIGHT, True, 0),
+                                  (Tile(6,2), Dir.RIGHT, False, 0)]))
+        self.assertEqual(b.weights[Tile(6,3).id], belief.SKIPPED_SCORE_WEIGHT)
+        self.assertEqual(sum(w != 1.0 for w in b.weights), 1)
+
+    def test_incremental_update(self):
+        history = [(Tile(6,6), Dir.RIGHT, True, 0), (Tile(6,2), Dir.RIGHT, False, 0),
+                   (Tile(2,2), Dir.RIGHT, True, 0), (None, None, False, 0)]
+        b = Belief()
+        for i in range(1, len(history) + 1):
+            b.update(self.game_state(history[:i]))
+        at_once = Belief()
+        at_once.update(self.game_state(history))
+        self.assertEqual(b.search_state(), at_once.search_state())
+        self.assertEqual(b.num_events, len(history))
+        # A new round starts over
+        b.update(self.game_state([(Tile(5,5), Dir.RIGHT, False, 10)]))
+        self.assertEqual(b.void_mask, 0)
+        self.assertEqual(b.num_events, 1)
+
+    def test_tile_probs(self):
+        b = Belief()
+        other_mask = tile_set.tiles_to_mask([Tile(0,0), Tile(0,1), Tile(1,1)])
+        probs = b.tile_probs(other_mask, 2)
+        for tile in [Tile(0,0), Tile(0,1), Tile(1,1)]:
+            self.assertAlmostEqual(probs[tile.id], 2. / 3)
+        self.assertEqual(probs[Tile(2,2).id], 0.0)
+        # None over 1
+        b.weights[Tile(0,1).id] = b.weights[Tile(1,1).id] = 0.1
+        probs = b.tile_probs(other_mask, 2)
+        self.assertEqual(probs[Tile(0,0).id], 1.0)
+        self.assertAlmostEqual(probs[Tile(0,1).id], 0.5)
+        # Voids
+        b.void_mask = tile_set.PIP_MASKS[0]
+        probs = b.tile_probs(other_mask, 1)
+        self.assertEqual(probs[Tile(0,0).id], 0.0)
+        self.assertEqual(probs[Tile(1,1).id], 1.0)
+        # Ignored if they leave too few tiles
+        probs = b.tile_probs(other_mask, 2)
+        self.assertEqual(probs[Tile(0,0).id], 1.0)
+
+    def test_search_state(self):
+        b = Belief()
+        b.update(self.game_state([(Tile(6,6), Dir.RIGHT, True, 0),
+                                  (Tile(6,2), Dir.RIGHT, False, 0),
+                                  (None, None, False, 0)]))
+        copy = Belief.from_search_state(b.search_state())
+        other_mask = tile_set.FULL_MASK & ~tile_set.tiles_to_mask([Tile(6,6), Tile(6,2)])
+        self.assertEqual(copy.tile_probs(other_mask, 8), b.tile_probs(other_mask, 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,28 +1,34 @@
 import random
-from tile import get_all_tiles, MAX_SIDE_VALUE
+import tile_set
+import zobrist
+from collections import deque
+from tile import MAX_SIDE_VALUE
 from dominoes_util import Dir, Orientation, opposite, all_dirs
 
 class TileIndex(object):
+  # Remaining tiles are kept as a tile_set bitmask
   def __init__(self):
     self.reset()
 
   def reset(self):
-    self.index = {side: set() for side in range(MAX_SIDE_VALUE + 1)}
-    self.tiles = set()
-    for tile in get_all_tiles():
-      self.add_tile(tile)
+    self.mask = tile_set.FULL_MASK
+
+  def copy(self):
+    tile_index = TileIndex.__new__(TileIndex)
+    tile_index.mask = self.mask
+    return tile_index
 
   def remove_tile(self, tile):
-    self.index[tile.small_side].remove(tile)
-    if not tile.is_double():
-      self.index[tile.big_side].remove(tile)
-    self.tiles.remove(tile)
+    self.mask &= ~tile_set.tile_bit(tile)
 
   def add_tile(self, tile):
-    self.index[tile.small_side].add(tile)
-    if not tile.is_double():
-        self.index[tile.big_side].add(tile)
-    self.tiles.add(tile)
+    self.mask |= tile_set.tile_bit(tile)
+
+  def tiles_in_mask(self, mask):
+    return tile_set.mask_to_tiles(self.mask & mask)
+
+  def tiles_with_side(self, side, mask=tile_set.FULL_MASK):
+    return self.tiles_in_mask(tile_set.PIP_MASKS[side] & mask)
 
 class Board(object):
   def __init__(self):
@@ -30,21 +36,71 @@ class Board(object):
     self.reset()
 
   def reset(self):
-    self.main_row = []
+    # The main row grows at both ends, the up and down arms only at one
+    self.main_row = deque()
     self.up = []
     self.down = []
     self.spinner = None
     self.bone_yard = set()
     self.history = []
     self.end_sides = {Dir.LEFT: None, Dir.RIGHT: None, Dir.UP: None, Dir.DOWN: None}
+    self.orientations = [Orientation.NOT_ON_BOARD] * tile_set.NUM_TILES
+    self.end_points = {Dir.LEFT: 0, Dir.RIGHT: 0, Dir.UP: 0, Dir.DOWN: 0}
+    # Whether the tile at each end is a double, for the hash
+    self.end_doubles = {Dir.LEFT: False, Dir.RIGHT: False, Dir.UP: False, Dir.DOWN: False}
+    self.total_count = 0
+    self.current_score = 0
+    # Zobrist hash of the tiles on each arm, the end sides, which ends are
+    # doubles and the spinner
+    self.hash = 0
     self.remaining_tile_index.reset()
 
-  def _valid_starting_moves(self):
-    return [(t, Dir.RIGHT) for t in get_all_tiles()]
-
-  def get_unique_valid_moves(self):
+  def copy(self):
+    # Tiles are immutable, so a copy only needs new containers
+    board = Board.__new__(Board)
+    board.remaining_tile_index = self.remaining_tile_index.copy()
+    board.main_row = deque(self.main_row)
+    board.up = list(self.up)
+    board.down = list(self.down)
+    board.spinner = self.spinner
+    board.bone_yard = set(self.bone_yard)
+    board.history = list(self.history)
+    board.end_sides = dict(self.end_sides)
+    board.orientations = list(self.orientations)
+    board.end_points = dict(self.end_points)
+    board.end_doubles = dict(self.end_doubles)
+    board.total_count = self.total_count
+    board.current_score = self.current_score
+    board.hash = self.hash
+    return board
+
+  def get_orientation(self, tile):
+    return self.orientations[tile.id]
+
+  def get_moves_to_rebuild(self):
+    # Moves that rebuild this board when made on an empty one. The first
+    # tile is the spinner, or else a tile placed as the first tile would
+    # be, then the main row outwards, then the up and down arms.
     if not self.main_row:
-      return self._valid_starting_moves()
+      return []
+    main_row = list(self.main_row)
+    if self.spinner:
+      first = main_row.index(self.spinner)
+    else:
+      first = [self.get_orientation(t) for t in main_row].index(Orientation.BIG_RIGHT)
+    return ([(main_row[first], Dir.RIGHT)] +
+            self._tiles_to_moves(reversed(main_row[:first]), Dir.LEFT) +
+            self._tiles_to_moves(main_row[first + 1:], Dir.RIGHT) +
+            self._tiles_to_moves(self.up, Dir.UP) +
+            self._tiles_to_moves(self.down, Dir.DOWN))
+
+  def _valid_starting_moves(self, mask=tile_set.FULL_MASK):
+    return [(t, Dir.RIGHT) for t in self.remaining_tile_index.tiles_in_mask(mask)]
+
+  # mask restricts the moves to tiles in that tile_set, e.g. a hand
+  def get_unique_valid_moves(self, mask=tile_set.FULL_MASK):
+    if not self.main_row:
+      return self._valid_starting_moves(mask)
     # Handle case of two moves off a double: only spinner on board
     if len(self.main_row) == 1 and self.spinner:
       dirs = [Dir.RIGHT]
@@ -66,7 +122,7 @@ class Board(object):
           continue
         else:
           single_sides_seen.add(side)
-      for tile in self.remaining_tile_index.index[side]:
+      for tile in self.remaining_tile_index.tiles_with_side(side, mask):
         valid_moves.append((tile, direction))
     return valid_moves
 
@@ -79,10 +135,19 @@ class Board(object):
     valid_moves = []
     for direction in dirs:
       side = self.end_sides[direction]
-      for tile in self.remaining_tile_index.index[side]:
+      for tile in self.remaining_tile_index.tiles_with_side(side):
         valid_moves.append((tile, direction))
     return valid_moves
 
+  # Sides of the ends that can be played on, empty if the board is
+  def get_open_end_sides(self):
+    if not self.main_row:
+      return set()
+    dirs = [Dir.RIGHT, Dir.LEFT]
+    if self._can_play_up_or_down():
+      dirs += [Dir.UP, Dir.DOWN]
+    return set(self.end_sides[direction] for direction in dirs)
+
   def can_play_tile(self, tile):
     for direction in all_dirs():
       if self.valid_move(tile, direction):
@@ -90,38 +155,92 @@ class Board(object):
     return False
 
   def get_tiles_on_board(self):
-    return self.main_row + self.up + self.down
+    return list(self.main_row) + self.up + self.down
+
+  def get_tiles_on_board_mask(self):
+    return tile_set.FULL_MASK & ~self.remaining_tile_index.mask
 
   def get_num_tiles_on_board(self):
-    return len(self.get_tiles_on_board())
+    return tile_set.NUM_TILES - tile_set.popcount(self.remaining_tile_index.mask)
 
   def _update_spinner(self, tile):
     if not self.spinner and tile.is_double():
       self.spinner = tile
+      self.hash ^= zobrist.SPINNER[tile.id]
       side = tile.small_side
-      self.end_sides[Dir.UP] = side
-      self.end_sides[Dir.DOWN] = side
-
-  def get_total_count(self):
+      self._set_end_side(Dir.UP, side)
+      self._set_end_side(Dir.DOWN, side)
+
+  def _end_tile_points(self, direction):
+    # Points the tile at the end of direction adds to the count, 0 if none
+    if direction == Dir.LEFT or direction == Dir.RIGHT:
+      if not self.main_row:
+        return 0
+      if direction == Dir.LEFT:
+        tile = self.main_row[0]
+        return tile.left_points(self.orientations[tile.id])
+      tile = self.main_row[-1]
+      return tile.right_points(self.orientations[tile.id])
+    elif direction == Dir.UP:
+      if not self.up:
+        return 0
+      return self.up[-1].up_points(self.orientations[self.up[-1].id])
+    elif direction == Dir.DOWN:
+      if not self.down:
+        return 0
+      return self.down[-1].down_points(self.orientations[self.down[-1].id])
+
+  def _end_tile_is_double(self, direction):
+    # Whether there is a tile at the end of direction and it is a double
+    if direction == Dir.LEFT or direction == Dir.RIGHT:
+      if not self.main_row:
+        return False
+      return self.main_row[0 if direction == Dir.LEFT else -1].is_double()
+    arm = self.up if direction == Dir.UP else self.down
+    return bool(arm) and arm[-1].is_double()
+
+  def _update_end(self, direction):
+    self.end_points[direction] = self._end_tile_points(direction)
+    is_double = self._end_tile_is_double(direction)
+    if is_double != self.end_doubles[direction]:
+      self.hash ^= zobrist.END_DOUBLE[direction]
+      self.end_doubles[direction] = is_double
+
+  def _update_count(self, direction):
+    # Only the end in direction changed, unless the main row is (now) a
+    # single tile, whose left and right ends are the same tile
+    self._update_end(direction)
+    if len(self.main_row) <= 1:
+      self._update_end(Dir.LEFT)
+      self._update_end(Dir.RIGHT)
     if not self.main_row:
-      return 0
+      count = 0
     elif len(self.main_row) == 1:
-      return self.main_row[0].total_points()
+      count = self.main_row[0].total_points()
     else:
-      up_points = 0 if not self.up else self.up[-1].up_points()
-      down_points = 0 if not self.down else self.down[-1].down_points()
-      return (up_points + down_points + self.main_row[0].left_points() +
-              self.main_row[-1].right_points())
+      count = sum(self.end_points.values())
+    self.total_count = count
+    self.current_score = count if count and count % 5 == 0 else 0
+
+  def get_total_count(self):
+    return self.total_count
+
+  def total_count_of_ends(self):
+    # Sum of the points at the four ends. Differs from the total count only
+    # while the main row is a single tile.
+    return sum(self.end_points.values())
 
   def score(self):
-    total_count = self.get_total_count()
-    if total_count and total_count % 5 == 0:
-      return total_count
-    return 0
+    return self.current_score
 
   def _get_end_side(self, direction):
     return self.end_sides[direction]
 
+  def _set_end_side(self, direction, side):
+    self.hash ^= (zobrist.end_side_key(direction, self.end_sides[direction]) ^
+                  zobrist.end_side_key(direction, side))
+    self.end_sides[direction] = side
+
   def end_is_double(self, direction):
     if not self.main_row:
       return False
@@ -168,14 +287,14 @@ class Board(object):
       return self._orientation_big_side_out(direction)
 
   def _set_orientation(self, tile, direction):
-    tile.orientation = self._get_orientation(tile, direction)
+    self.orientations[tile.id] = self._get_orientation(tile, direction)
 
   def _tiles_to_moves(self, tiles, direction):
     return [(t, direction) for t in tiles]
 
   def _add_to_row(self, tile, direction):
     if direction == Dir.LEFT:
-      self.main_row = [tile] + self.main_row
+      self.main_row.appendleft(tile)
     elif direction == Dir.RIGHT:
       self.main_row.append(tile)
     elif direction == Dir.UP:
@@ -184,65 +303,68 @@ class Board(object):
       self.down.append(tile)
 
   def _get_tile_sides(self, tile, direction):
+    orientation = self.orientations[tile.id]
     if direction == Dir.LEFT:
-      return tile.left_side(), tile.right_side()
+      return tile.left_side(orientation), tile.right_side(orientation)
     elif direction == Dir.RIGHT:
-      return tile.right_side(), tile.left_side()
+      return tile.right_side(orientation), tile.left_side(orientation)
     elif direction == Dir.UP:
-      return tile.up_side(), tile.down_side()
+      return tile.up_side(orientation), tile.down_side(orientation)
     elif direction == Dir.DOWN:
-      return tile.down_side(), tile.up_side()
+      return tile.down_side(orientation), tile.up_side(orientation)
 
   def add_tile_to_board(self, tile, direction):
     self._set_orientation(tile, direction)
     self._add_to_row(tile, direction)
+    self.hash ^= zobrist.TILE_ON_ARM[direction][tile.id]
     self._update_spinner(tile)
     tile_side, opp_side = self._get_tile_sides(tile, direction)
-    self.end_sides[direction] = tile_side
+    self._set_end_side(direction, tile_side)
     self.remaining_tile_index.remove_tile(tile)
     if len(self.main_row) == 1:
-      self.end_sides[opposite(direction)] = opp_side
+      self._set_end_side(opposite(direction), opp_side)
+    self._update_count(direction)
 
   def _remove_tile_from_side(self, direction):
     if direction == Dir.LEFT:
-      removed_tile = self.main_row[0]
-      self.main_row = self.main_row[1:]
+      removed_tile = self.main_row.popleft()
       new_end = None
       if self.main_row:
-        new_end = self.main_row[0].left_side()
+        new_end = self.main_row[0].left_side(self.get_orientation(self.main_row[0]))
     elif direction == Dir.RIGHT:
-      removed_tile = self.main_row[-1]
-      self.main_row = self.main_row[:-1]
+      removed_tile = self.main_row.pop()
       new_end = None
       if self.main_row:
-        new_end = self.main_row[-1].right_side()
+        new_end = self.main_row[-1].right_side(self.get_orientation(self.main_row[-1]))
     elif direction == Dir.UP:
-      removed_tile = self.up[-1]
-      self.up = self.up[:-1]
+      removed_tile = self.up.pop()
       new_end = self.spinner.small_side
       if self.up:
-        new_end = self.up[-1].up_side()
+        new_end = self.up[-1].up_side(self.get_orientation(self.up[-1]))
     elif direction == Dir.DOWN:
-      removed_tile = self.down[-1]
-      self.down = self.down[:-1]
+      removed_tile = self.down.pop()
       new_end = self.spinner.small_side
       if self.down:
-        new_end = self.down[-1].down_side()
+        new_end = self.down[-1].down_side(self.get_orientation(self.down[-1]))
     return removed_tile, new_end
 
   def _remove_spinner(self):
+    self.hash ^= zobrist.SPINNER[self.spinner.id]
     self.spinner = None
-    self.end_sides[Dir.UP] = None
-    self.end_sides[Dir.DOWN] = None
+    self._set_end_side(Dir.UP, None)
+    self._set_end_side(Dir.DOWN, None)
 
   def remove_from_board(self, direction):
     tile, new_end = self._remove_tile_from_side(direction)
-    self.end_sides[direction] = new_end
+    self.hash ^= zobrist.TILE_ON_ARM[direction][tile.id]
+    self._set_end_side(direction, new_end)
     if self.spinner and tile == self.spinner:
       self._remove_spinner()
     self.remaining_tile_index.add_tile(tile)
+    self.orientations[tile.id] = Orientation.NOT_ON_BOARD
     if not self.main_row:
-      self.end_sides[opposite(direction)] = None
+      self._set_end_side(opposite(direction), None)
+    self._update_count(direction)
 
   def _spinner_on_end(self):
     return self.spinner and self.main_row and (
@@ -271,7 +393,34 @@ class Board(object):
     if tile is None:
       return last_move
     self.remove_from_board(direction)
-    tile.orientation = Orientation.NOT_ON_BOARD
+
+  def _played_end_points(self, tile, direction):
+    # Points the end in direction would add to the count after playing tile
+    if tile.is_double():
+      return tile.total_points()
+    return tile.total_points() - self.end_sides[direction]
+
+  def score_if_played(self, tile, direction):
+    # Score make_move(tile, direction) would return, without changing the
+    # board. Assumes the move is valid.
+    if not self.main_row:
+      count = tile.total_points()
+    else:
+      count = (self.total_count_of_ends() - self.end_points[direction] +
+               self._played_end_points(tile, direction))
+    return count if count and count % 5 == 0 else 0
+
+  def scores_if_played(self, moves):
+    # Batched score_if_played: the count of the other ends is computed once
+    # per direction, then each move only adds its own end.
+    if not self.main_row:
+      counts = [tile.total_points() for tile, direction in moves]
+    else:
+      total = self.total_count_of_ends()
+      other_ends = dict((d, total - points) for d, points in self.end_points.items())
+      counts = [other_ends[direction] + self._played_end_points(tile, direction)
+                for tile, direction in moves]
+    return [count if count and count % 5 == 0 else 0 for count in counts]
 
   def tiles_in_bone_yard(self):
     return len(self.bone_yard) > 0
@@ -281,15 +430,19 @@ class Board(object):
     self.bone_yard.remove(tile)
     return tile
 
+  def _row_repr(self, row):
+    return '[' + ', '.join(
+        [tile.oriented_repr(self.get_orientation(tile)) for tile in row]) + ']'
+
   def _down_repr(self):
     if not self.down:
       return str(self.down)
     down_repr = '['
     for tile in self.down:
-      down_repr += tile.switched_repr() + ', '
+      down_repr += tile.switched_repr(self.get_orientation(tile)) + ', '
     return down_repr[:-2] + ']'
 
   def __repr__(self):
     return ('Board:\nSpinner: ' +  str(self.spinner) + '\nMain row: ' +
-            str(self.main_row) + '\nUp: ' + str(self.up) + '\nDown: ' +
-            self._down_repr() + '\nCount: ' + str(self.get_total_count()))
+            self._row_repr(self.main_row) + '\nUp: ' + self._row_repr(self.up) +
+            '\nDown: ' + self._down_repr() + '\nCount: ' + str(self.get_total_count()))
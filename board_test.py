@@ -1,7 +1,12 @@
 import unittest
+import copy
+import pickle
+import random
+import tile_set
+import zobrist
 from board import Board
 from tile import Tile, get_all_tiles
-from dominoes_util import Dir, all_dirs, opposite
+from dominoes_util import Dir, Orientation, all_dirs, opposite
 
 class TestBoard(unittest.TestCase):
     def setUp(self):
@@ -113,6 +118,177 @@ class TestBoard(unittest.TestCase):
         self.assertEqual(set(unique_valid_moves), set(expected))
         # TODO: more tests
 
+    def test_get_unique_valid_moves_in_mask(self):
+        hand = [Tile(6, 1), Tile(0, 4), Tile(2, 5)]
+        valid_moves = self.board.get_unique_valid_moves(tile_set.tiles_to_mask(hand))
+        expected = [
+            (Tile(6, 1), Dir.LEFT),
+            (Tile(6, 1), Dir.DOWN),
+            (Tile(0, 4), Dir.UP),
+        ]
+        self.assertEqual(set(valid_moves), set(expected))
+
+    def test_tiles_on_board_mask(self):
+        mask = self.board.get_tiles_on_board_mask()
+        self.assertEqual(set(tile_set.mask_to_tiles(mask)),
+                         set(self.board.get_tiles_on_board()))
+        self.assertEqual(self.board.get_num_tiles_on_board(), 7)
+        self.assertEqual(tile_set.popcount(self.board.remaining_tile_index.mask), 21)
+        self.assertEqual(tile_set.mask_points(tile_set.PIP_MASKS[0]),
+                         sum(t.total_points() for t in get_all_tiles() if t.small_side == 0))
+
+    def test_tiles_are_interned(self):
+        self.assertIs(Tile(2, 5), Tile(5, 2))
+        self.assertIs(copy.deepcopy(Tile(2, 5)), Tile(2, 5))
+        self.assertIs(pickle.loads(pickle.dumps(Tile(2, 5), 2)), Tile(2, 5))
+        self.assertEqual([t.id for t in get_all_tiles()], range(28))
+        with self.assertRaises(AttributeError):
+            Tile(2, 5).small_side = 3
+
+    def test_orientation_kept_on_board(self):
+        self.assertEqual(self.board.get_orientation(Tile(4, 5)), Orientation.BIG_LEFT)
+        self.assertEqual(self.board.get_orientation(Tile(6, 6)), Orientation.DOUBLE)
+        self.assertEqual(self.board.get_orientation(Tile(1, 2)), Orientation.NOT_ON_BOARD)
+        self.board.undo_move(Tile(5, 6), Dir.LEFT)
+        self.assertEqual(self.board.get_orientation(Tile(5, 6)), Orientation.NOT_ON_BOARD)
+
+    def test_copy(self):
+        board = self.board.copy()
+        self.assertIs(board.main_row[0], self.board.main_row[0])
+        board.make_move(Tile(6, 1), Dir.LEFT)
+        self.assertEqual(self.board.get_total_count(), 12)
+        self.assertEqual(self.board.get_valid_moves(), self.board.copy().get_valid_moves())
+        self.assertNotEqual(board.get_total_count(), self.board.get_total_count())
+
+    def test_total_count_matches_ends(self):
+        def count_from_ends(board):
+            if not board.main_row:
+                return 0
+            if len(board.main_row) == 1:
+                return board.main_row[0].total_points()
+            o = board.get_orientation
+            count = (board.main_row[0].left_points(o(board.main_row[0])) +
+                     board.main_row[-1].right_points(o(board.main_row[-1])))
+            if board.up:
+                count += board.up[-1].up_points(o(board.up[-1]))
+            if board.down:
+                count += board.down[-1].down_points(o(board.down[-1]))
+            return count
+
+        rng = random.Random(7)
+        for game in range(50):
+            board = Board()
+            moves = []
+            for i in range(40):
+                valid_moves = board.get_valid_moves()
+                if valid_moves and (not moves or rng.random() < 0.8):
+                    move = rng.choice(valid_moves)
+                    board.make_move(*move)
+                    moves.append(move)
+                elif moves:
+                    board.undo_move(*moves.pop())
+                count = count_from_ends(board)
+                self.assertEqual(board.get_total_count(), count)
+                self.assertEqual(board.score(), count if count % 5 == 0 else 0)
+
+    def test_score_if_played(self):
+        rng = random.Random(11)
+        for game in range(30):
+            board = Board()
+            for i in range(20):
+                valid_moves = board.get_valid_moves()
+                if not valid_moves:
+                    break
+                count = board.get_total_count()
+                scores = board.scores_if_played(valid_moves)
+                for move, batched_score in zip(valid_moves, scores):
+                    score = board.score_if_played(*move)
+                    self.assertEqual(board.get_total_count(), count)
+                    self.assertEqual(score, batched_score)
+                    self.assertEqual(score, board.make_move(*move))
+                    board.undo_move(*move)
+                board.make_move(*rng.choice(valid_moves))
+
+    def test_hash_transposition(self):
+        board = Board()
+        for tile, direction in [(Tile(6,6), Dir.RIGHT), (Tile(6,4), Dir.LEFT),
+                                (Tile(6,3), Dir.RIGHT), (Tile(6,0), Dir.UP),
+                                (Tile(4,5), Dir.LEFT), (Tile(3,3), Dir.RIGHT),
+                                (Tile(5,6), Dir.LEFT)]:
+            board.make_move(tile, direction)
+        self.assertEqual(board.hash, self.board.hash)
+        self.assertEqual(board.hash, zobrist.board_hash(board))
+        board.make_move(Tile(6,1), Dir.DOWN)
+        self.assertNotEqual(board.hash, self.board.hash)
+        board.undo_move(Tile(6,1), Dir.DOWN)
+        self.assertEqual(board.hash, self.board.hash)
+        # Same tiles, different ends
+        other = Board()
+        other.make_move(Tile(1,2), Dir.RIGHT)
+        other.make_move(Tile(2,3), Dir.RIGHT)
+        board = Board()
+        board.make_move(Tile(2,3), Dir.RIGHT)
+        board.make_move(Tile(1,2), Dir.LEFT)
+        self.assertEqual(board.hash, other.hash)
+        board.undo_move(Tile(1,2), Dir.LEFT)
+        board.make_move(Tile(1,2), Dir.RIGHT)
+        self.assertNotEqual(board.hash, other.hash)
+
+    def test_hash_end_doubles(self):
+        # Same tiles and end pips, but a double at the left end of one
+        first = [(Tile(5,5), Dir.RIGHT), (Tile(5,4), Dir.RIGHT), (Tile(1,5), Dir.LEFT)]
+        board = Board()
+        for tile, direction in first + [(Tile(3,1), Dir.LEFT), (Tile(2,3), Dir.LEFT),
+                                        (Tile(1,2), Dir.LEFT), (Tile(1,1), Dir.LEFT)]:
+            board.make_move(tile, direction)
+        other = Board()
+        for tile, direction in first + [(Tile(1,1), Dir.LEFT), (Tile(3,1), Dir.LEFT),
+                                        (Tile(2,3), Dir.LEFT), (Tile(1,2), Dir.LEFT)]:
+            other.make_move(tile, direction)
+        self.assertEqual(board.end_sides, other.end_sides)
+        self.assertEqual(board.get_total_count(), 6)
+        self.assertEqual(other.get_total_count(), 5)
+        self.assertNotEqual(board.hash, other.hash)
+        self.assertEqual(board.hash, zobrist.board_hash(board))
+        self.assertEqual(other.hash, zobrist.board_hash(other))
+
+    def test_hash_matches_recomputed(self):
+        rng = random.Random(5)
+        for game in range(30):
+            board = Board()
+            moves = []
+            for i in range(30):
+                valid_moves = board.get_valid_moves()
+                if valid_moves and (not moves or rng.random() < 0.8):
+                    move = rng.choice(valid_moves)
+                    board.make_move(*move)
+                    moves.append(move)
+                elif moves:
+                    board.undo_move(*moves.pop())
+                self.assertEqual(board.hash, zobrist.board_hash(board))
+            while moves:
+                board.undo_move(*moves.pop())
+            self.assertEqual(board.hash, 0)
+
+    def test_moves_to_rebuild(self):
+        self.assertEqual(Board().get_moves_to_rebuild(), [])
+        rng = random.Random(6)
+        for game in range(30):
+            board = Board()
+            for i in range(rng.randint(1, 20)):
+                valid_moves = board.get_valid_moves()
+                if not valid_moves:
+                    break
+                board.make_move(*rng.choice(valid_moves))
+            rebuilt = Board()
+            for tile, direction in board.get_moves_to_rebuild():
+                rebuilt.make_move(tile, direction)
+            self.assertEqual(repr(rebuilt), repr(board))
+            self.assertEqual(rebuilt.orientations, board.orientations)
+            self.assertEqual(rebuilt.end_sides, board.end_sides)
+            self.assertEqual(rebuilt.hash, board.hash)
+            self.assertEqual(rebuilt.score(), board.score())
+
 
 if __name__ == '__main__':
     unittest.main()
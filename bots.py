@@ -1,13 +1,44 @@
 import algos
+import multiprocessing
 import operator as op
+import endgame
+from belief import Belief
+from ismcts import ISMCTS
+from move_ordering import MoveOrderer
+from parallel_search import ParallelSearcher
+from pimc import PIMC
+from rollout import RolloutEvaluator, GREEDY_ROLLOUT
+from transposition import TranspositionTable
 
 class Bot(object):
-    def __init__(self, player_name=None):
+    # endgame_tiles > 0 solves the round exactly once the boneyard is
+    # empty and both hands hold that many tiles or fewer
+    def __init__(self, player_name=None, endgame_tiles=0):
         self.player_name = player_name
+        self.endgame_tiles = endgame_tiles
+        self.endgame_solver = endgame.EndgameSolver() if endgame_tiles else None
+        self.num_tiles_on_board = 0
 
     def pick_move(self, game_state):
         pass
 
+    # Stops any worker processes the bot started; call once it's done
+    # playing
+    def close(self):
+        pass
+
+    # Best move from the endgame solver, or None if it shouldn't be used
+    def endgame_move(self, game_state):
+        if not self.endgame_tiles or not endgame.can_solve(game_state, self.endgame_tiles):
+            return None
+        # Positions of earlier rounds won't come up again
+        num_tiles_on_board = game_state.board.get_num_tiles_on_board()
+        if num_tiles_on_board < self.num_tiles_on_board:
+            self.endgame_solver.clear()
+        self.num_tiles_on_board = num_tiles_on_board
+        ev_dict = self.endgame_solver.move_values(game_state)
+        return max(ev_dict.iteritems(), key=op.itemgetter(1))[0]
+
 class RandomBot(Bot):
     # ~45 secs for 1k
     def pick_move(self, game_state):
@@ -29,9 +60,41 @@ class GreedyDefensiveBot(Bot):
         return algos.pick_defensive_move(game_state.board, game_state.hand)
 
 class TreeBot(Bot):
-    def __init__(self, depth, player_name=None):
-        super(TreeBot, self).__init__(player_name)
+    # table_size > 0 keeps a transposition table of that many positions
+    # across moves. prune skips opponent replies that can't change the
+    # best move, which picks the same move with fewer nodes searched; it
+    # also orders moves to try the likely best ones first.
+    # With a time_limit (secs) or node_limit per move, searches deeper and
+    # deeper up to depth and plays the best move of the deepest search
+    # finished within the limits.
+    # With processes > 1, searches my moves and the opponent's replies in
+    # that many worker processes instead (each with its own table).
+    # use_belief weighs the opponent's replies by what the moves of the
+    # round say about their hand (see belief.py).
+    # leaf_playouts > 0 values the positions at the end of the search by
+    # that many playouts each with the rollout policy (see rollout.py).
+    def __init__(self, depth, player_name=None, table_size=0, prune=False,
+                 time_limit=None, node_limit=None, processes=None, endgame_tiles=0,
+                 use_belief=False, leaf_playouts=0, rollout=GREEDY_ROLLOUT):
+        super(TreeBot, self).__init__(player_name, endgame_tiles)
         self.depth = depth
+        self.table = TranspositionTable(table_size) if table_size else None
+        self.prune = prune
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.last_depth = None
+        self.belief = Belief() if use_belief else None
+        self.leaf_evaluator = None
+        if leaf_playouts:
+            self.leaf_evaluator = RolloutEvaluator(leaf_playouts, rollout)
+        self.searcher = None
+        if processes > 1:
+            self.searcher = ParallelSearcher(processes, table_size, prune,
+                                             leaf_evaluator=self.leaf_evaluator)
+
+    def close(self):
+        if self.searcher:
+            self.searcher.close()
 
     def pick_move(self, game_state):
         board = game_state.board
@@ -41,9 +104,25 @@ class TreeBot(Bot):
             return (None, None)
         elif len(unique_valid_moves) == 1:
             return list(unique_valid_moves)[0]
+        endgame_move = self.endgame_move(game_state)
+        if endgame_move:
+            return endgame_move
+        if self.belief:
+            self.belief.update(game_state)
+        orderer = MoveOrderer() if self.prune else None
+        context = algos.SearchContext(self.table, self.prune, orderer=orderer,
+                                      belief=self.belief,
+                                      leaf_evaluator=self.leaf_evaluator)
+        if self.searcher:
+            ev_dict = self.searcher.tree_search(self.depth, game_state, self.belief)
+            self.last_depth = self.depth
+        elif self.time_limit is None and self.node_limit is None:
+            ev_dict = algos.tree_search(self.depth, game_state, context=context)
+            self.last_depth = self.depth
         else:
-            ev_dict = algos.tree_search(self.depth, game_state)
-            return max(ev_dict.iteritems(), key=op.itemgetter(1))[0]
+            ev_dict, self.last_depth = algos.iterative_deepening_search(
+                game_state, self.depth, self.time_limit, self.node_limit, context)
+        return max(ev_dict.iteritems(), key=op.itemgetter(1))[0]
 
 # 95% CI for 100 trials = 8.5%
 # 95% CI for 1k trials = 2.7%
@@ -73,13 +152,88 @@ class D3TreeBot(TreeBot):
     # vs GreedyDefensiveBot: 65% of 1k
     # vs GreedyBot: 69% of 100
     # ~2 secs per game, 25 secs for 10, 4 mins for 100
+    # Pruning: ~3% fewer nodes searched (search_bench.py --depth 3)
     def __init__(self, player_name=None):
-        super(D3TreeBot, self).__init__(3, player_name)
+        super(D3TreeBot, self).__init__(3, player_name, prune=True)
 
 class D4TreeBot(TreeBot):
     # vs GreedyDefensiveBot: 74% of 100
     # vs GreedyBot: X% of 100
     # ~30 secs per game, 5 mins per 10, 1:25 per 100
+    # Transposition table: ~25% hits, ~20% faster per move
+    def __init__(self, player_name=None):
+        super(D4TreeBot, self).__init__(4, player_name, table_size=50000,
+                                        prune=True)
+
+class D4ParallelTreeBot(TreeBot):
+    # D4TreeBot searching on every core
+    def __init__(self, player_name=None):
+        super(D4ParallelTreeBot, self).__init__(4, player_name, table_size=50000,
+                                                prune=True,
+                                                processes=multiprocessing.cpu_count())
+
+class AnytimeTreeBot(TreeBot):
+    # Searches up to depth 6 for at most 1 sec per move
     def __init__(self, player_name=None):
-        super(D4TreeBot, self).__init__(4, player_name)
+        super(AnytimeTreeBot, self).__init__(6, player_name, table_size=50000,
+                                             prune=True, time_limit=1.0)
 
+class ISMCTSBot(Bot):
+    # Information set MCTS with iterations or time_limit (secs) per move
+    # At 300 iterations:
+    # vs GreedyDefensiveBot: 50% of 20
+    # vs D2TreeBot: 50% of 20
+    # ~3 secs per game
+    # use_belief deals the opponent's hand by what the moves of the round
+    # say about it (see belief.py)
+    def __init__(self, player_name=None, iterations=1000, time_limit=None,
+                 rollout='greedy', seed=None, endgame_tiles=10, use_belief=True):
+        super(ISMCTSBot, self).__init__(player_name, endgame_tiles)
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.engine = ISMCTS(rollout=rollout, seed=seed)
+        self.belief = Belief() if use_belief else None
+
+    def pick_move(self, game_state):
+        unique_valid_moves = algos.get_valid_moves(game_state.board, game_state.hand)
+        if len(unique_valid_moves) == 0:
+            return (None, None)
+        elif len(unique_valid_moves) == 1:
+            return list(unique_valid_moves)[0]
+        endgame_move = self.endgame_move(game_state)
+        if endgame_move:
+            return endgame_move
+        if self.belief:
+            self.belief.update(game_state)
+        return self.engine.best_move(game_state, self.iterations, self.time_limit,
+                                     self.belief)
+
+class PIMCBot(Bot):
+    # Perfect information Monte Carlo: alpha-beta to depth over 16 to
+    # max_deals sampled deals, solved in processes worker processes
+    # vs GreedyDefensiveBot: 63% of 30
+    # vs D2TreeBot: 57% of 30
+    # ~3 secs per game
+    # use_belief deals the opponent's hand as ISMCTSBot does
+    def __init__(self, player_name=None, depth=4, max_deals=64, processes=1, seed=None,
+                 endgame_tiles=10, use_belief=True):
+        super(PIMCBot, self).__init__(player_name, endgame_tiles)
+        self.engine = PIMC(depth, max_deals=max_deals, processes=processes, seed=seed)
+        self.belief = Belief() if use_belief else None
+
+    def close(self):
+        self.engine.close()
+
+    def pick_move(self, game_state):
+        unique_valid_moves = algos.get_valid_moves(game_state.board, game_state.hand)
+        if len(unique_valid_moves) == 0:
+            return (None, None)
+        elif len(unique_valid_moves) == 1:
+            return list(unique_valid_moves)[0]
+        endgame_move = self.endgame_move(game_state)
+        if endgame_move:
+            return endgame_move
+        if self.belief:
+            self.belief.update(game_state)
+        ev_dict = self.engine.move_values(game_state, self.belief)
+        return max(ev_dict.iteritems(), key=op.itemgetter(1))[0]
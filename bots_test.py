@@ -1,9 +1,23 @@
 import unittest
+import random
+import multiprocessing
 import bots
 from game import Game
 from player import Player
 from tournament import play_game
 
+# First move of a TreeBot searching with 2 processes, from a seeded deal
+def parallel_tree_bot_move(seed):
+    random.seed(seed)
+    game = Game([Player('a'), Player('b')], 150)
+    game.start_first_game()
+    bot = bots.TreeBot(2, processes=2)
+    try:
+        tile, direction = bot.pick_move(game.create_game_state())
+        return (tile.id, direction.value) if tile else None, bot.searcher.pool is None
+    finally:
+        bot.close()
+
 class TestBots(unittest.TestCase):
     def self_play(self, bot_name):
         players = [Player('a'), Player('b')]
@@ -11,6 +25,8 @@ class TestBots(unittest.TestCase):
         bot2 = getattr(bots, bot_name)('b')
         game = Game(players, 150)
         end_scores = play_game(game, bot1, bot2)
+        bot1.close()
+        bot2.close()
 
     def test_random_bot(self):
         self.self_play('RandomBot')
@@ -30,6 +46,43 @@ class TestBots(unittest.TestCase):
     def test_d2_tree_bot(self):
         self.self_play('D2TreeBot')
 
+    def test_ismcts_bot(self):
+        self.self_play('ISMCTSBot')
+
+    def test_pimc_bot(self):
+        self.self_play('PIMCBot')
+
+    def test_tree_bot_belief(self):
+        # The Dn bots search as they did before belief tracking
+        self.assertIsNone(bots.D2TreeBot().belief)
+        self.assertIsNotNone(bots.TreeBot(2, use_belief=True).belief)
+
+    def test_close(self):
+        bot = bots.TreeBot(2, processes=2)
+        # Bots that never search start no processes
+        self.assertIsNone(bot.searcher.pool)
+        random.seed(1)
+        game = Game([Player('a'), Player('b')], 150)
+        game.start_first_game()
+        while len(bots.algos.get_valid_moves(game.board, game.current_player().hand)) < 2:
+            game.make_move_or_knock(*bots.GreedyBot().pick_move(game.create_game_state()))
+        bot.pick_move(game.create_game_state())
+        self.assertIsNotNone(bot.searcher.pool)
+        bot.close()
+        self.assertIsNone(bot.searcher.pool)
+
+    def test_in_pool_worker(self):
+        # Pool workers can't start processes, so search in the worker
+        pool = multiprocessing.Pool(1)
+        try:
+            results = pool.map(parallel_tree_bot_move, [1, 2])
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual([move for move, serial in results],
+                         [parallel_tree_bot_move(seed)[0] for seed in [1, 2]])
+        self.assertTrue(all(serial for move, serial in results))
+
     #def test_d3_tree_bot(self):
     #    self.self_play('D3TreeBot')
 
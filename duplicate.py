@@ -0,0 +1,185 @@
+import sys, getopt
+import array
+import random
+import struct
+import multiprocessing
+from collections import Counter
+import match_stats
+import tile_set
+import tournament
+from player import Player
+from game import Game
+
+# Duplicate matches: every game is dealt from a deal sequence of a corpus,
+# the tiles of each round's deal in order, boneyard draws included, and
+# each sequence is played twice, with the bots swapping seats. Both games
+# of a pair seed random the same way too, so bots with the same hands see
+# the same luck, and comparing the two games of a pair takes most of the
+# luck of the deal out of the result.
+#
+# A corpus file holds a header (magic, number of sequences, rounds per
+# sequence), then per sequence a seed and each round's deal as 28 tile
+# ids, one byte each. Games that outlast a sequence's rounds are dealt
+# from its seed.
+
+ROUNDS_PER_SEQUENCE = 32
+
+_MAGIC = 'DEAL'
+_HEADER = struct.Struct('<4sII')
+_SEED = struct.Struct('<I')
+
+def _deal_with_double(rng):
+    deal = range(tile_set.NUM_TILES)
+    rng.shuffle(deal)
+    # The first round starts with a double, redealt as start_first_game does
+    while not any(tile_set.ALL_TILES[tile_id].is_double() for tile_id in deal[:14]):
+        rng.shuffle(deal)
+    return deal
+
+
+class DealCorpus(object):
+    # seeds[i] and the rounds deals from deal_ids[i * rounds * 28:] are
+    # sequence i
+    def __init__(self, seeds, deal_ids, rounds=ROUNDS_PER_SEQUENCE):
+        assert len(deal_ids) == len(seeds) * rounds * tile_set.NUM_TILES
+        self.seeds = list(seeds)
+        self.deal_ids = array.array('B', deal_ids)
+        self.rounds = rounds
+
+    @classmethod
+    def create(cls, num_sequences, rounds=ROUNDS_PER_SEQUENCE, seed=0):
+        rng = random.Random(seed)
+        seeds = []
+        deal_ids = array.array('B')
+        for i in range(num_sequences):
+            seeds.append(rng.getrandbits(32))
+            deal_ids.extend(_deal_with_double(rng))
+            for j in range(rounds - 1):
+                deal = range(tile_set.NUM_TILES)
+                rng.shuffle(deal)
+                deal_ids.extend(deal)
+        return cls(seeds, deal_ids, rounds)
+
+    def __len__(self):
+        return len(self.seeds)
+
+    # Seed of sequence i and its deals, as lists of tile ids
+    def sequence(self, i):
+        size = self.rounds * tile_set.NUM_TILES
+        deal_ids = self.deal_ids[i * size:(i + 1) * size].tolist()
+        return self.seeds[i], [deal_ids[j:j + tile_set.NUM_TILES]
+                               for j in range(0, size, tile_set.NUM_TILES)]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(self.seeds), self.rounds))
+            size = self.rounds * tile_set.NUM_TILES
+            for i, seed in enumerate(self.seeds):
+                f.write(_SEED.pack(seed))
+                self.deal_ids[i * size:(i + 1) * size].tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, num_sequences, rounds = _HEADER.unpack(f.read(_HEADER.size))
+            assert magic == _MAGIC, '%s is not a deal corpus' % path
+            seeds = []
+            deal_ids = array.array('B')
+            for i in range(num_sequences):
+                seeds.append(_SEED.unpack(f.read(_SEED.size))[0])
+                deal_ids.fromfile(f, rounds * tile_set.NUM_TILES)
+        return cls(seeds, deal_ids, rounds)
+
+# Tiles of each round's deal: those of deals, then shuffled by seed
+def dealt_tiles(seed, deals):
+    for deal in deals:
+        yield [tile_set.ALL_TILES[tile_id] for tile_id in deal]
+    rng = random.Random(seed)
+    while True:
+        tiles = list(tile_set.ALL_TILES)
+        rng.shuffle(tiles)
+        yield tiles
+
+# End scores of bot1 and bot2, in that order, in a game dealt from the
+# sequence of task = (bot1_name, bot2_name, play_to, seed, deals, swapped),
+# with bot2 in the first seat if swapped
+def play_dealt_game(task):
+    bot1_name, bot2_name, play_to, seed, deals, swapped = task
+    random.seed(seed)
+    bot1, bot2 = tournament.create_bots(bot1_name, bot2_name)
+    players = [Player(bot1.player_name), Player(bot2.player_name)]
+    if swapped:
+        players.reverse()
+    game = Game(players, play_to, dealt_tiles(seed, deals))
+    try:
+        end_scores = tournament.play_game(game, bot1, bot2)
+    finally:
+        bot1.close()
+        bot2.close()
+    return end_scores[::-1] if swapped else end_scores
+
+# End scores of the pair of games of each sequence of corpus, bot1 seated
+# first then second, as (bot1 score, bot2 score) each
+def play_duplicate(bot1_name, bot2_name, corpus, play_to=150, processes=1):
+    tasks = []
+    for i in range(len(corpus)):
+        seed, deals = corpus.sequence(i)
+        for swapped in [False, True]:
+            tasks.append((bot1_name, bot2_name, play_to, seed, deals, swapped))
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        end_scores = tournament.map_games(pool, processes, play_dealt_game, tasks)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return zip(end_scores[::2], end_scores[1::2])
+
+# Games bot1 won, and how many pairs it won 0, 1 and 2 games of
+def summarize_pairs(pairs, play_to):
+    won_by_pair = Counter(sum(scores[0] >= play_to for scores in pair) for pair in pairs)
+    return sum(n * count for n, count in won_by_pair.iteritems()), won_by_pair
+
+def main(argv):
+    if len(argv) < 1:
+        print 'duplicate.py <corpus_file> [--make=<num_sequences>]'
+        return 1
+    path = argv[0]
+    opts, args = getopt.getopt(argv[1:], "", ["make=","rounds=","seed=","bot1=","bot2=",
+                                              "play_to=","processes="])
+    num_sequences, rounds, seed = None, ROUNDS_PER_SEQUENCE, 0
+    bot1_name, bot2_name = "RandomBot", "RandomBot"
+    play_to, processes = 150, 1
+    for opt, arg in opts:
+        if opt == "--make":
+            num_sequences = int(arg)
+        if opt == "--rounds":
+            rounds = int(arg)
+        if opt == "--seed":
+            seed = int(arg)
+        if opt == "--bot1":
+            bot1_name = arg
+        if opt == "--bot2":
+            bot2_name = arg
+        if opt == "--play_to":
+            play_to = int(arg)
+        if opt == "--processes":
+            processes = int(arg)
+
+    if num_sequences:
+        DealCorpus.create(num_sequences, rounds, seed).save(path)
+        print 'Saved %d deal sequences of %d rounds to %s' % (num_sequences, rounds, path)
+        return
+
+    corpus = DealCorpus.load(path)
+    print bot1_name, bot2_name, '%d pairs from %s' % (len(corpus), path)
+    pairs = play_duplicate(bot1_name, bot2_name, corpus, play_to, processes)
+    wins, won_by_pair = summarize_pairs(pairs, play_to)
+    print '%s %s' % (bot1_name, match_stats.report(wins, 2 * len(pairs)))
+    print 'Pairs won: %d, split: %d, lost: %d' % (won_by_pair[2], won_by_pair[1],
+                                                  won_by_pair[0])
+    low, high = match_stats.mean_interval([won / 2.0 for won in won_by_pair.elements()])
+    print 'Paired win rate interval: %.1f%%-%.1f%%' % (100.0 * low, 100.0 * high)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+import tile_set
+import duplicate
+from duplicate import DealCorpus
+from game import Game
+from player import Player
+
+class TestDuplicate(unittest.TestCase):
+    def setUp(self):
+        self.corpus = DealCorpus.create(4, rounds=3, seed=1)
+
+    def test_create(self):
+        self.assertEqual(len(self.corpus), 4)
+        for i in range(4):
+            seed, deals = self.corpus.sequence(i)
+            self.assertEqual(len(deals), 3)
+            for deal in deals:
+                self.assertEqual(sorted(deal), range(tile_set.NUM_TILES))
+            self.assertTrue(any(tile_set.ALL_TILES[t].is_double() for t in deals[0][:14]))
+        self.assertEqual(DealCorpus.create(4, rounds=3, seed=1).deal_ids, self.corpus.deal_ids)
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'deals.dat')
+            self.corpus.save(path)
+            self.assertEqual(os.path.getsize(path), 12 + 4 * (4 + 3 * 28))
+            corpus = DealCorpus.load(path)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(corpus.seeds, self.corpus.seeds)
+        self.assertEqual(corpus.deal_ids, self.corpus.deal_ids)
+        self.assertEqual(corpus.rounds, 3)
+
+    def test_dealt_game(self):
+        seed, deals = self.corpus.sequence(0)
+        players = [Player('a'), Player('b')]
+        game = Game(players, 150, duplicate.dealt_tiles(seed, deals))
+        game.deal_tiles()
+        tiles = [tile_set.ALL_TILES[t] for t in deals[0]]
+        self.assertEqual(players[0].hand, set(tiles[:7]))
+        self.assertEqual(players[1].hand, set(tiles[7:14]))
+        game.turn_index = 0
+        for tile in tiles[14:16]:
+            game.draw()
+            self.assertIn(tile, players[0].hand)
+        self.assertEqual(game.board.bone_yard, set(tiles[16:]))
+        # Past the sequence, rounds are dealt from its seed
+        for i in range(3):
+            game.deal_tiles()
+        self.assertEqual(len(game.board.bone_yard), 14)
+
+    def test_duplicate(self):
+        pairs = duplicate.play_duplicate('GreedyBot', 'GreedyBot', self.corpus)
+        self.assertEqual(len(pairs), 4)
+        # The same bot in either seat plays the same games
+        for scores, swapped_scores in pairs:
+            self.assertEqual(scores, swapped_scores[::-1])
+        wins, won_by_pair = duplicate.summarize_pairs(pairs, 150)
+        self.assertEqual((wins, won_by_pair), (4, {1: 4}))
+        self.assertEqual(duplicate.play_duplicate('GreedyBot', 'GreedyBot', self.corpus,
+                                                  processes=2), pairs)
+
+
+if __name__ == '__main__':
+    unittest.main()
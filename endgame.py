@@ -0,0 +1,89 @@
+import algos
+import tile_set
+from round_state import RoundState
+
+# Exact endgame solver. Once the boneyard is empty, the opponent's hand is
+# every tile not on the board or in my hand, so the rest of the round is a
+# full information game. It is solved with alpha-beta down to the end of
+# the round, where RoundState scores the domino or block out as Game does
+# and values the scores. Positions are cached by both hands, the board (its
+# Zobrist hash, which covers the ends), whose turn it is and the scores.
+
+def boneyard_is_empty(game_state):
+    other_mask = algos.get_other_tiles_mask(game_state.board, game_state.hand)
+    return tile_set.popcount(other_mask) == game_state.opp_hand_size
+
+# Whether the solver should take over: the boneyard is empty and both hands
+# hold max_tiles or fewer tiles between them
+def can_solve(game_state, max_tiles):
+    return (len(game_state.hand) + game_state.opp_hand_size <= max_tiles and
+            boneyard_is_empty(game_state))
+
+
+class EndgameSolver(object):
+    def __init__(self):
+        # Position key -> (lower, upper) bounds on its value
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.cache.clear()
+
+    # Value for seat 0 of state, played out perfectly by both seats, if it
+    # is within (alpha, beta). Otherwise a bound on it past alpha or beta,
+    # as alpha-beta gives. The cache keeps the bounds found.
+    def solve(self, state, alpha=0.0, beta=1.0):
+        if state.is_terminal():
+            return state.value(0)
+        key = (state.hands[0], state.hands[1], state.board.hash, state.turn,
+               state.scores[0], state.scores[1])
+        lower, upper = self.cache.get(key, (0.0, 1.0))
+        if lower == upper or lower >= beta:
+            self.hits += 1
+            return lower
+        if upper <= alpha:
+            self.hits += 1
+            return upper
+        self.misses += 1
+        alpha, beta = max(alpha, lower), min(beta, upper)
+        moves = state.legal_moves()
+        if len(moves) > 1:
+            scores = state.board.scores_if_played(moves)
+            moves = [move for score, move in sorted(zip(scores, moves), key=lambda x: -x[0])]
+        maximizing = state.turn == 0
+        value = None
+        window_alpha, window_beta = alpha, beta
+        for move in moves:
+            undo = state.make_move(*move)
+            move_value = self.solve(state, window_alpha, window_beta)
+            state.undo_move(undo)
+            if maximizing:
+                value = move_value if value is None else max(value, move_value)
+                window_alpha = max(window_alpha, value)
+            else:
+                value = move_value if value is None else min(value, move_value)
+                window_beta = min(window_beta, value)
+            if window_alpha >= window_beta:
+                break
+        if value <= alpha:
+            upper = value
+        elif value >= beta:
+            lower = value
+        else:
+            lower = upper = value
+        self.cache[key] = (lower, upper)
+        return value
+
+    # Exact value of each of my valid moves in game_state, whose boneyard
+    # must be empty
+    def move_values(self, game_state):
+        assert boneyard_is_empty(game_state)
+        opp_hand = algos.get_other_tiles_mask(game_state.board, game_state.hand)
+        state = RoundState.from_game_state(game_state, opp_hand, [])
+        ev_dict = {}
+        for move in state.legal_moves():
+            undo = state.make_move(*move)
+            ev_dict[move] = self.solve(state)
+            state.undo_move(undo)
+        return ev_dict
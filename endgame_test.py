@@ -0,0 +1,84 @@
+import unittest
+import random
+import algos
+import bots
+import tile_set
+from board import Board
+from endgame import EndgameSolver, boneyard_is_empty, can_solve
+from game_state import GameState
+from round_state import RoundState
+
+# Value for seat 0 of state, played out to the end of the round
+def minimax(state):
+    if state.is_terminal():
+        return state.value(0)
+    values = []
+    for move in state.legal_moves():
+        undo = state.make_move(*move)
+        values.append(minimax(state))
+        state.undo_move(undo)
+    return max(values) if state.turn == 0 else min(values)
+
+# Game state with hand_size tiles in my hand and every other tile not on
+# the board in the opponent's hand, after random moves
+def random_endgame(rng, num_moves, hand_size):
+    board = Board()
+    for i in range(num_moves):
+        valid_moves = board.get_valid_moves()
+        if not valid_moves:
+            break
+        board.make_move(*rng.choice(valid_moves))
+    other_tiles = tile_set.mask_to_tiles(board.remaining_tile_index.mask)
+    rng.shuffle(other_tiles)
+    hand = set(other_tiles[:hand_size])
+    return GameState(board, rng.randrange(0, 150, 5), rng.randrange(0, 150, 5), 150,
+                     hand, len(other_tiles) - hand_size)
+
+class TestEndgame(unittest.TestCase):
+    def test_boneyard_is_empty(self):
+        rng = random.Random(1)
+        gs = random_endgame(rng, 20, 4)
+        self.assertTrue(boneyard_is_empty(gs))
+        self.assertTrue(can_solve(gs, 8))
+        self.assertFalse(can_solve(gs, 7))
+        gs.opp_hand_size -= 1
+        self.assertFalse(boneyard_is_empty(gs))
+        self.assertFalse(can_solve(gs, 8))
+
+    def test_matches_minimax(self):
+        rng = random.Random(2)
+        for i in range(20):
+            gs = random_endgame(rng, rng.randint(19, 22), 3)
+            opp_hand = algos.get_other_tiles_mask(gs.board, gs.hand)
+            state = RoundState.from_game_state(gs, opp_hand, [])
+            ev_dict = EndgameSolver().move_values(gs)
+            self.assertEqual(set(ev_dict), set(state.legal_moves()))
+            for move, ev in ev_dict.iteritems():
+                undo = state.make_move(*move)
+                self.assertAlmostEqual(ev, minimax(state))
+                state.undo_move(undo)
+
+    def test_cache(self):
+        rng = random.Random(3)
+        gs = random_endgame(rng, 18, 5)
+        board_repr = repr(gs.board)
+        solver = EndgameSolver()
+        ev_dict = solver.move_values(gs)
+        self.assertGreater(len(solver.cache), 0)
+        self.assertEqual(repr(gs.board), board_repr)
+        misses = solver.misses
+        self.assertEqual(solver.move_values(gs), ev_dict)
+        self.assertEqual(solver.misses, misses)
+
+    def test_bot_uses_solver(self):
+        rng = random.Random(4)
+        bot = bots.TreeBot(0, endgame_tiles=10)
+        for i in range(20):
+            gs = random_endgame(rng, rng.randint(19, 22), 3)
+            if len(algos.get_valid_moves(gs.board, gs.hand)) < 2:
+                continue
+            ev_dict = EndgameSolver().move_values(gs)
+            self.assertEqual(ev_dict[bot.pick_move(gs)], max(ev_dict.values()))
+
+if __name__ == '__main__':
+    unittest.main()
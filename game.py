@@ -1,12 +1,13 @@
 import random
-import copy
 from tile import Tile, get_all_tiles, MAX_SIDE_VALUE
 from game_state import GameState
 from board import Board
-from dominoes_util import Dir, Orientation
+from dominoes_util import Dir
 
 class Game:
-  def __init__(self, players, play_to):
+  # deals, if given, is an iterator over the tiles of each round's deal:
+  # 7 for each player in turn, then the boneyard in the order it's drawn
+  def __init__(self, players, play_to, deals=None):
     assert len(players) >= 2 and len(players) <= 4
     names = [player.name for player in players]
     assert len(set(names)) == len(names)
@@ -19,6 +20,9 @@ class Game:
     self.game_over = False
     self.round_over = False
     self.history = []
+    self.deals = deals
+    # Boneyard tiles left to draw, from the end, if dealt from deals
+    self.draw_order = None
 
   def _reset_players(self):
     for player in self.players:
@@ -41,33 +45,38 @@ class Game:
             return player, i
 
   def create_game_state(self):
-    board = copy.deepcopy(self.board)
+    board = self.board.copy()
     # Assumes 2P
     for player in self.players:
         if player == self.current_player():
-            hand = copy.deepcopy(player.hand)
+            hand = set(player.hand)
             my_score = player.total_score
         else:
             opp_hand_size = len(player.hand)
             opp_score = player.total_score
     play_to = self.play_to
-    return GameState(board, my_score, opp_score, play_to, hand, opp_hand_size)
+    name = self.current_player().name
+    history = [(tile, direction, player_name == name, score)
+               for tile, direction, player_name, score in self.history]
+    return GameState(board, my_score, opp_score, play_to, hand, opp_hand_size,
+                     history=history)
 
   def undo_last_move(self):
     if not self.history:
         return
     tile, direction, player_name, score = self.history.pop()
-    self.board.undo_move(tile, direction)
     player, idx = self._get_player_and_index_by_name(player_name)
-    tile.orientation = Orientation.NOT_ON_BOARD
-    player.hand.add(tile)
+    if tile:
+        self.board.undo_move(tile, direction)
+        player.hand.add(tile)
     player.total_score -= score
     self.turn_index = idx
     if tile:
         self.last_move = 'Undid move %s %s by %s' % (str(tile), direction.name, player.name)
     else:
         # TODO: Handle this better
-        self.last_move = 'WARNING: Undid draw by %s, tiles may be wrong!' % player.name
+        self.last_move = ('WARNING: Undid draw or knock by %s, tiles may be wrong!' %
+                          player.name)
     if score:
         self.last_move += ', which scored %d' % score
     self.game_over = False
@@ -79,13 +88,18 @@ class Game:
     self.board.reset()
     self.last_move = ''
     self.history = []
-    all_tiles = get_all_tiles()
-    random.shuffle(all_tiles)
+    if self.deals is None:
+      all_tiles = get_all_tiles()
+      random.shuffle(all_tiles)
+    else:
+      all_tiles = list(next(self.deals))
     starting_index = 0
     for player in self.players:
       player.add_tiles(all_tiles[starting_index:starting_index+7])
       starting_index += 7
     self.board.bone_yard = set(all_tiles[starting_index:])
+    if self.deals is not None:
+      self.draw_order = all_tiles[:starting_index - 1:-1]
 
   def start_first_game(self):
     self.deal_tiles()
@@ -184,7 +198,11 @@ class Game:
 
   def draw(self):
     player = self.current_player()
-    tile = self.board.draw_from_bone_yard(player.name)
+    if self.draw_order is None:
+      tile = self.board.draw_from_bone_yard(player.name)
+    else:
+      tile = self.draw_order.pop()
+      self.board.bone_yard.remove(tile)
     player.add_tile(tile)
     self.last_move = '%s drew a tile' % player.name #%s' % (player.name, str(tile))
     self.history.append((None, None, player.name, 0))
@@ -192,6 +210,7 @@ class Game:
   def knock(self):
     player = self.current_player()
     self.last_move = '%s knocked' % player.name
+    self.history.append((None, None, player.name, 0))
     if self.game_is_blocked_out():
       self._score_block_out()
     else:
@@ -1,5 +1,11 @@
+import tile_set
+import zobrist
+
 class GameState(object):
-    def __init__(self, board, my_score, opp_score, play_to, hand, opp_hand_size, my_turn=True):
+    # history holds the moves of the round so far, oldest first, as
+    # (tile, direction, by_me, score); draws and knocks have no tile
+    def __init__(self, board, my_score, opp_score, play_to, hand, opp_hand_size, my_turn=True,
+                 history=None):
         self.board = board
         self.my_score = my_score
         self.opp_score = opp_score
@@ -7,6 +13,25 @@ class GameState(object):
         self.hand = hand
         self.opp_hand_size = opp_hand_size
         self.my_turn = my_turn
+        self.history = history if history is not None else []
+
+    # The history isn't copied, as nothing changes it
+    def copy(self):
+        return GameState(self.board.copy(), self.my_score, self.opp_score, self.play_to,
+                         set(self.hand), self.opp_hand_size, self.my_turn, self.history)
+
+    def hand_mask(self):
+        return tile_set.tiles_to_mask(self.hand)
+
+    # 64-bit Zobrist key of the position: the board hash extended with the
+    # hand, both scores, the opponent's hand size and whose turn it is
+    def key(self):
+        key = (self.board.hash ^ zobrist.hand_hash(self.hand_mask()) ^
+               zobrist.score_hash(self.my_score, self.opp_score) ^
+               zobrist.OPP_HAND_SIZE[self.opp_hand_size])
+        if self.my_turn:
+            key ^= zobrist.MY_TURN
+        return key
 
     def __repr__(self):
         return ('%s\nHand: %s\nOppHandSize: %d\nScores: [%d, %d] (%d)\nMyTurn:%s'
@@ -0,0 +1,105 @@
+import math
+import time
+import random
+from round_state import RoundState, deal_hidden_tiles
+from rollout import RANDOM_ROLLOUT, GREEDY_ROLLOUT, rollout_move
+
+# Single-observer information set MCTS (Cowling, Powley & Whitehouse 2012).
+# One tree is searched from the point of view of the player to move. Every
+# iteration deals the tiles that player can't see (the opponent's hand and
+# the boneyard) at random, walks down the tree with the moves valid in that
+# deal, adds a node and plays the round out with a rollout policy. Nodes
+# count how often they were available, so moves that are rarely valid
+# aren't undervalued by UCB.
+
+class ISMCTSNode(object):
+    __slots__ = ('move', 'parent', 'seat', 'children', 'visits', 'reward',
+                 'availability')
+
+    # seat made move to reach this node
+    def __init__(self, move=None, parent=None, seat=None):
+        self.move = move
+        self.parent = parent
+        self.seat = seat
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.availability = 0
+
+    def ucb(self, exploration):
+        return (self.reward / self.visits +
+                exploration * math.sqrt(math.log(self.availability) / self.visits))
+
+    def __repr__(self):
+        return '%s: %.4f (%d/%d)' % (str(self.move), self.reward / max(self.visits, 1),
+                                     self.visits, self.availability)
+
+
+class ISMCTS(object):
+    def __init__(self, exploration=0.7, rollout=GREEDY_ROLLOUT, seed=None):
+        assert rollout in (RANDOM_ROLLOUT, GREEDY_ROLLOUT)
+        self.exploration = exploration
+        self.rollout = rollout
+        # Seeded from random unless seed is given
+        self.rng = random.Random(random.getrandbits(32) if seed is None else seed)
+        self.iterations = 0
+
+    # Random deal of the tiles the player to move can't see, following
+    # belief (a belief.Belief) if given
+    def determinize(self, game_state, belief=None):
+        opp_hand, boneyard = deal_hidden_tiles(game_state, self.rng, belief)
+        return RoundState.from_game_state(game_state, opp_hand, boneyard)
+
+    # Searches for iterations or time_limit secs, whichever ends first, and
+    # returns the root of the tree
+    def search(self, game_state, iterations=1000, time_limit=None, belief=None):
+        root = ISMCTSNode()
+        deadline = time.time() + time_limit if time_limit is not None else None
+        for i in range(iterations):
+            if deadline is not None and time.time() > deadline:
+                break
+            self._iterate(root, self.determinize(game_state, belief))
+            self.iterations += 1
+        return root
+
+    def best_move(self, game_state, iterations=1000, time_limit=None, belief=None):
+        root = self.search(game_state, iterations, time_limit, belief)
+        if not root.children:
+            # The game is already over, so any move will do
+            return self.determinize(game_state).legal_moves()[0]
+        return max(root.children.values(), key=lambda child: child.visits).move
+
+    def _iterate(self, root, state):
+        node = root
+        # Select, while every move valid in this deal has a node
+        while not state.is_terminal():
+            moves = state.legal_moves()
+            untried = [move for move in moves if move not in node.children]
+            if untried:
+                break
+            children = [node.children[move] for move in moves]
+            for child in children:
+                child.availability += 1
+            node = max(children, key=lambda child: child.ucb(self.exploration))
+            state.make_move(*node.move)
+        # Expand
+        if not state.is_terminal():
+            for move in moves:
+                if move in node.children:
+                    node.children[move].availability += 1
+            move = self.rng.choice(untried)
+            child = ISMCTSNode(move, node, state.turn)
+            child.availability = 1
+            node.children[move] = child
+            node = child
+            state.make_move(*move)
+        # Simulate
+        while not state.is_terminal():
+            state.make_move(*rollout_move(state, self.rollout, self.rng))
+        # Backpropagate
+        values = [state.value(0), state.value(1)]
+        while node is not None:
+            node.visits += 1
+            if node.seat is not None:
+                node.reward += values[node.seat]
+            node = node.parent
@@ -0,0 +1,68 @@
+import unittest
+import random
+import algos
+import tile_set
+from board import Board
+from game_state import GameState
+from ismcts import ISMCTS, RANDOM_ROLLOUT
+from tile import Tile
+from dominoes_util import Dir
+
+class TestISMCTS(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        moves = [
+            (Tile(6,6), Dir.RIGHT),
+            (Tile(6,3), Dir.RIGHT),
+            (Tile(6,4), Dir.LEFT),
+            (Tile(6,0), Dir.UP),
+            (Tile(3,3), Dir.RIGHT),
+            (Tile(4,5), Dir.LEFT),
+            (Tile(5,6), Dir.LEFT),
+        ]
+        for tile, direction in moves:
+            self.board.make_move(tile, direction)
+
+    def test_determinize(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        state = ISMCTS(seed=1).determinize(gs)
+        self.assertEqual(state.hands[0], gs.hand_mask())
+        self.assertEqual(tile_set.popcount(state.hands[1]), 4)
+        self.assertEqual(state.hands[0] & state.hands[1], 0)
+        self.assertEqual(len(state.boneyard), 28 - 7 - 3 - 4)
+        self.assertEqual(state.hands[1] & tile_set.tiles_to_mask(state.boneyard), 0)
+
+    def test_search(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        board_repr = repr(self.board)
+        engine = ISMCTS(rollout=RANDOM_ROLLOUT, seed=1)
+        root = engine.search(gs, iterations=200)
+        self.assertEqual(engine.iterations, 200)
+        self.assertEqual(root.visits, 200)
+        self.assertEqual(set(root.children),
+                         set(algos.get_valid_moves(self.board, hand)))
+        self.assertEqual(sum(c.visits for c in root.children.values()), 200)
+        self.assertEqual(repr(self.board), board_repr)
+
+    def test_unseeded(self):
+        # Follows random, as seeded tournament games do
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        visits = []
+        for i in range(2):
+            random.seed(3)
+            root = ISMCTS(rollout=RANDOM_ROLLOUT).search(gs, iterations=100)
+            visits.append(dict((move, child.visits) for move, child in root.children.items()))
+        self.assertTrue(visits[0] == visits[1])
+
+    def test_takes_winning_move(self):
+        # Playing [0|3] up scores 15 and wins
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 140, 140, 150, hand, 4)
+        self.assertEqual(ISMCTS(seed=2).best_move(gs, iterations=300),
+                         (Tile(0, 3), Dir.UP))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import sys, getopt
+import math
+import json
+import hashlib
+import inspect
+import itertools
+import multiprocessing
+import bots
+import tournament
+
+# Round-robin ladder: every pairing of the bots plays a match, as
+# tournament.play_games plays it, and the bots are rated by fitting a
+# Bradley-Terry model to the results, shown on the Elo scale. Each
+# pairing's result is cached on disk, keyed by the two bots, their code,
+# the match settings and CODE_VERSION, so adding a bot only plays its
+# pairings. A bot's code is the source of its class and the classes it
+# derives from; CODE_VERSION stands for everything else (the game, the
+# search) and should be bumped when that changes how bots play.
+
+CODE_VERSION = 1
+
+BOT_NAMES = ['RandomBot', 'GreedyBot', 'GreedyDefensiveBot', 'D0TreeBot', 'D1TreeBot',
+             'D2TreeBot', 'D3TreeBot', 'D4TreeBot']
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ladder_cache')
+
+# Pseudo-games each bot of a pairing is credited with winning, which keeps
+# the ratings of bots that won or lost every game finite
+PRIOR_WINS = 0.5
+
+def bot_code_hash(bot_name):
+    source = ''.join(inspect.getsource(cls) for cls in getattr(bots, bot_name).__mro__
+                     if cls is not object)
+    return hashlib.sha1(source).hexdigest()[:12]
+
+def pairing_key(bot1_name, bot2_name, num_games, play_to):
+    return '%s-%s_%s-%s_%d_%d_v%d' % (bot1_name, bot_code_hash(bot1_name), bot2_name,
+                                       bot_code_hash(bot2_name), num_games, play_to,
+                                       CODE_VERSION)
+
+# Master seed of a pairing's match, from its key, so a pairing plays the
+# same games whichever other bots are on the ladder
+def pairing_seed(key):
+    return int(hashlib.sha1(key).hexdigest()[:8], 16)
+
+
+class Ladder(object):
+    def __init__(self, bot_names=BOT_NAMES, num_games=100, play_to=150, processes=1,
+                 cache_dir=CACHE_DIR):
+        self.bot_names = list(bot_names)
+        self.num_games = num_games
+        self.play_to = play_to
+        self.processes = processes
+        self.cache_dir = cache_dir
+        # Pairings played (not found in the cache) by the last run
+        self.played = []
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    # Wins of each bot of a pairing, from the cache, or None
+    def cached_wins(self, bot1_name, bot2_name):
+        path = self._cache_path(pairing_key(bot1_name, bot2_name, self.num_games,
+                                            self.play_to))
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['wins']
+
+    def _save_wins(self, key, pairing, wins):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        with open(self._cache_path(key), 'w') as f:
+            json.dump({'bots': list(pairing), 'wins': wins}, f)
+
+    # Wins of each bot of every pairing, {(bot1_name, bot2_name): [wins1,
+    # wins2]}. Pairings not in the cache are played one after another, over
+    # one pool of worker processes, and each is cached as soon as it's
+    # done, so a run that stops early keeps the pairings it finished.
+    def run(self):
+        results = {}
+        missing = []
+        # Pairings in name order, whatever the order of the bots
+        for pairing in itertools.combinations(sorted(self.bot_names), 2):
+            wins = self.cached_wins(*pairing)
+            if wins is None:
+                missing.append(pairing)
+            else:
+                results[pairing] = wins
+        self.played = []
+        pool = None
+        if self.processes > 1 and missing:
+            pool = multiprocessing.Pool(self.processes)
+        try:
+            for pairing in missing:
+                bot1_name, bot2_name = pairing
+                key = pairing_key(bot1_name, bot2_name, self.num_games, self.play_to)
+                tasks = [(bot1_name, bot2_name, self.play_to, seed) for seed in
+                         tournament.game_seeds(pairing_seed(key), self.num_games)]
+                end_scores = tournament.map_games(pool, self.processes,
+                                                  tournament.play_seeded_game, tasks)
+                wins = tournament.summarize(end_scores, self.play_to)[0]
+                self._save_wins(key, pairing, wins)
+                results[pairing] = wins
+                self.played.append(pairing)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        return results
+
+# Bradley-Terry strengths of the bots from results as Ladder.run returns
+# them, fit by minorization-maximization (Hunter, 2004), as Elo ratings
+# with a mean of 0
+def fit_ratings(results, bot_names, iterations=1000, tolerance=1e-9):
+    wins = dict((name, 0.0) for name in bot_names)
+    games = dict((name, {}) for name in bot_names)
+    for (name1, name2), (wins1, wins2) in results.iteritems():
+        wins[name1] += wins1 + PRIOR_WINS
+        wins[name2] += wins2 + PRIOR_WINS
+        n = wins1 + wins2 + 2 * PRIOR_WINS
+        games[name1][name2] = games[name1].get(name2, 0.0) + n
+        games[name2][name1] = games[name2].get(name1, 0.0) + n
+    strengths = dict((name, 1.0) for name in bot_names)
+    for i in range(iterations):
+        new_strengths = {}
+        for name in bot_names:
+            denom = sum(n / (strengths[name] + strengths[other])
+                        for other, n in games[name].iteritems())
+            new_strengths[name] = wins[name] / denom if denom else strengths[name]
+        # Only ratios matter, so keep the geometric mean at 1
+        log_mean = sum(math.log(s) for s in new_strengths.itervalues()) / len(bot_names)
+        new_strengths = dict((name, s / math.exp(log_mean))
+                             for name, s in new_strengths.iteritems())
+        change = max(abs(new_strengths[name] - strengths[name]) for name in bot_names)
+        strengths = new_strengths
+        if change < tolerance:
+            break
+    return dict((name, 400.0 * math.log10(s)) for name, s in strengths.iteritems())
+
+def main(argv):
+    opts, args = getopt.getopt(argv, "", ["bots=", "games=", "play_to=", "processes=",
+                                          "cache="])
+    bot_names, num_games, play_to = BOT_NAMES, 100, 150
+    processes, cache_dir = multiprocessing.cpu_count(), CACHE_DIR
+    for opt, arg in opts:
+        if opt == "--bots":
+            bot_names = arg.split(',')
+        if opt == "--games":
+            num_games = int(arg)
+        if opt == "--play_to":
+            play_to = int(arg)
+        if opt == "--processes":
+            processes = int(arg)
+        if opt == "--cache":
+            cache_dir = arg
+
+    ladder = Ladder(bot_names, num_games, play_to, processes, cache_dir)
+    results = ladder.run()
+    print 'Played %d of %d pairings, %d games each' % (len(ladder.played), len(results),
+                                                       num_games)
+    for (name1, name2), (wins1, wins2) in sorted(results.iteritems()):
+        print '%s vs %s: %d-%d' % (name1, name2, wins1, wins2)
+    ratings = fit_ratings(results, bot_names)
+    print
+    for name in sorted(bot_names, key=ratings.get, reverse=True):
+        print '%-20s %6.0f' % (name, ratings[name])
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+import unittest
+import ladder
+from ladder import Ladder
+
+class TestLadder(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_run(self):
+        bot_names = ['RandomBot', 'GreedyBot']
+        results = Ladder(bot_names, num_games=4, cache_dir=self.cache_dir).run()
+        self.assertEqual(results.keys(), [('GreedyBot', 'RandomBot')])
+        self.assertEqual(sum(results[('GreedyBot', 'RandomBot')]), 4)
+        # Only the new bot's pairings are played
+        bot_names.append('GreedyDefensiveBot')
+        ladder_3 = Ladder(bot_names, num_games=4, cache_dir=self.cache_dir)
+        results_3 = ladder_3.run()
+        self.assertEqual(len(results_3), 3)
+        self.assertEqual(sorted(ladder_3.played), [('GreedyBot', 'GreedyDefensiveBot'),
+                                                   ('GreedyDefensiveBot', 'RandomBot')])
+        self.assertEqual(results_3[('GreedyBot', 'RandomBot')],
+                         results[('GreedyBot', 'RandomBot')])
+        ladder_3.run()
+        self.assertEqual(ladder_3.played, [])
+        # Other match settings are other pairings
+        ladder_3.num_games = 2
+        ladder_3.run()
+        self.assertEqual(len(ladder_3.played), 3)
+
+    def test_run_saves_each_pairing(self):
+        bot_names = ['RandomBot', 'GreedyBot', 'GreedyDefensiveBot']
+        ladder_3 = Ladder(bot_names, num_games=2, cache_dir=self.cache_dir)
+        save_wins = ladder_3._save_wins
+        def save_then_stop(key, pairing, wins):
+            save_wins(key, pairing, wins)
+            raise KeyboardInterrupt
+        ladder_3._save_wins = save_then_stop
+        self.assertRaises(KeyboardInterrupt, ladder_3.run)
+        # The pairing finished before stopping isn't played again
+        ladder_3 = Ladder(bot_names, num_games=2, cache_dir=self.cache_dir)
+        ladder_3.run()
+        self.assertEqual(ladder_3.played, [('GreedyBot', 'RandomBot'),
+                                           ('GreedyDefensiveBot', 'RandomBot')])
+
+    def test_fit_ratings(self):
+        results = {('a', 'b'): [74.5, 24.5]}
+        ratings = ladder.fit_ratings(results, ['a', 'b'])
+        # a is 3 times as strong as b
+        self.assertAlmostEqual(ratings['a'] - ratings['b'], 400 * 0.47712, places=2)
+        self.assertAlmostEqual(ratings['a'] + ratings['b'], 0.0)
+        results = {('a', 'b'): [10, 0], ('b', 'c'): [10, 0], ('a', 'c'): [10, 0]}
+        ratings = ladder.fit_ratings(results, ['a', 'b', 'c'])
+        self.assertGreater(ratings['a'], ratings['b'])
+        self.assertGreater(ratings['b'], ratings['c'])
+
+    def test_code_hash(self):
+        self.assertNotEqual(ladder.bot_code_hash('D1TreeBot'), ladder.bot_code_hash('D2TreeBot'))
+        self.assertEqual(ladder.bot_code_hash('GreedyBot'), ladder.bot_code_hash('GreedyBot'))
+
+
+if __name__ == '__main__':
+    unittest.main()
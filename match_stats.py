@@ -0,0 +1,98 @@
+import math
+
+# Early stopping for a match of bot A against bot B, from A's wins so far
+# (a game always has a winner). A stopping rule's decision is STRONGER or
+# WEAKER once A is significantly better or worse than B, EVEN if it can
+# tell A and B are within its margin of each other, or None to keep
+# playing.
+
+STRONGER = 'stronger'
+WEAKER = 'weaker'
+EVEN = 'even'
+
+# Normal quantile for the two-sided 95% interval
+Z_95 = 1.96
+
+# Wilson score interval of the probability A wins a game
+def wilson_interval(wins, games, z=Z_95):
+    if not games:
+        return 0.0, 1.0
+    p = float(wins) / games
+    z2 = z * z
+    denom = 1.0 + z2 / games
+    center = (p + z2 / (2.0 * games)) / denom
+    half_width = z * math.sqrt(p * (1.0 - p) / games + z2 / (4.0 * games * games)) / denom
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+# Normal interval of the mean of values, such as the win rates of the
+# pairs of a duplicate match
+def mean_interval(values, z=Z_95):
+    n = len(values)
+    if n < 2:
+        return 0.0, 1.0
+    mean = float(sum(values)) / n
+    variance = sum((value - mean) ** 2 for value in values) / (n - 1)
+    half_width = z * math.sqrt(variance / n)
+    return mean - half_width, mean + half_width
+
+
+class SPRT(object):
+    # Two of Wald's sequential probability ratio tests of A winning a game
+    # with probability 0.5, one against 0.5 + margin (STRONGER) and one
+    # against 0.5 - margin (WEAKER), each with false positive rate alpha / 2
+    # and false negative rate beta. The decision is a side once its test
+    # accepts it, and EVEN once both accept 0.5; each test is judged on the
+    # games so far. Bots about margin / 2 apart take the longest to tell
+    # apart, so matches should still have a maximum number of games.
+    def __init__(self, margin=0.05, alpha=0.05, beta=0.05):
+        assert 0.0 < margin < 0.5
+        self.margin = margin
+        self.upper = math.log((1.0 - beta) / (alpha / 2.0))
+        self.lower = math.log(beta / (1.0 - alpha / 2.0))
+
+    # Log likelihood ratio of A winning with probability p against 0.5
+    def llr(self, wins, games, p):
+        return wins * math.log(2.0 * p) + (games - wins) * math.log(2.0 * (1.0 - p))
+
+    def decision(self, wins, games):
+        stronger_llr = self.llr(wins, games, 0.5 + self.margin)
+        weaker_llr = self.llr(wins, games, 0.5 - self.margin)
+        if stronger_llr >= self.upper:
+            return STRONGER
+        if weaker_llr >= self.upper:
+            return WEAKER
+        if stronger_llr <= self.lower and weaker_llr <= self.lower:
+            return EVEN
+        return None
+
+
+class WilsonRule(object):
+    # Stops once the Wilson interval leaves 0.5 behind, or fits within 0.5
+    # +/- margin. Looking after every batch makes its error rates higher
+    # than the interval's, so it waits for min_games first.
+    def __init__(self, margin=0.05, z=Z_95, min_games=100):
+        self.margin = margin
+        self.z = z
+        self.min_games = min_games
+
+    def decision(self, wins, games):
+        if games < self.min_games:
+            return None
+        low, high = wilson_interval(wins, games, self.z)
+        if low > 0.5:
+            return STRONGER
+        if high < 0.5:
+            return WEAKER
+        if low > 0.5 - self.margin and high < 0.5 + self.margin:
+            return EVEN
+        return None
+
+# Win rate of A with its Wilson interval and the games played, and the
+# decision if there is one
+def report(wins, games, decision=None, z=Z_95):
+    low, high = wilson_interval(wins, games, z)
+    text = 'won %.1f%% of %d games, interval %.1f%%-%.1f%%' % (
+        100.0 * wins / max(games, 1), games, 100.0 * low, 100.0 * high)
+    if decision:
+        text += ', stopped: %s' % decision
+    return text
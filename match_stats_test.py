@@ -0,0 +1,49 @@
+import unittest
+import match_stats
+from match_stats import SPRT, WilsonRule, STRONGER, WEAKER, EVEN
+
+class TestMatchStats(unittest.TestCase):
+    def test_wilson_interval(self):
+        low, high = match_stats.wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        low, high = match_stats.wilson_interval(0, 10)
+        self.assertEqual(low, 0.0)
+        self.assertAlmostEqual(high, 0.2775, places=4)
+        self.assertEqual(match_stats.wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_mean_interval(self):
+        low, high = match_stats.mean_interval([0.0, 0.5, 0.5, 1.0])
+        self.assertAlmostEqual(low, 0.5 - 1.96 * 0.2041, places=3)
+        self.assertAlmostEqual(high, 0.5 + 1.96 * 0.2041, places=3)
+        self.assertEqual(match_stats.mean_interval([0.5, 0.5]), (0.5, 0.5))
+
+    def test_sprt(self):
+        sprt = SPRT(margin=0.05)
+        self.assertEqual(sprt.decision(71, 100), STRONGER)
+        self.assertEqual(sprt.decision(29, 100), WEAKER)
+        self.assertEqual(sprt.decision(60, 100), None)
+        self.assertEqual(sprt.decision(52, 100), None)
+        # Bounds of about 3.64 and -2.97, ~0.1 per win against 0.5
+        self.assertEqual(sprt.decision(39, 39), STRONGER)
+        self.assertEqual(sprt.decision(38, 38), None)
+        # Equal bots drift to 0.5 on both sides
+        self.assertEqual(sprt.decision(500, 1000), EVEN)
+        self.assertEqual(sprt.decision(520, 1000), None)
+        self.assertEqual(sprt.decision(480, 1000), None)
+
+    def test_wilson_rule(self):
+        rule = WilsonRule(margin=0.05, min_games=100)
+        self.assertEqual(rule.decision(60, 90), None)
+        self.assertEqual(rule.decision(65, 100), STRONGER)
+        self.assertEqual(rule.decision(35, 100), WEAKER)
+        self.assertEqual(rule.decision(55, 100), None)
+        self.assertEqual(rule.decision(1000, 2000), EVEN)
+
+    def test_report(self):
+        self.assertEqual(match_stats.report(60, 100, STRONGER),
+                         'won 60.0% of 100 games, interval 50.2%-69.1%, stopped: stronger')
+
+
+if __name__ == '__main__':
+    unittest.main()
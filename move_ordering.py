@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+# Orders the moves tree_search tries at a node, best first, so pruned and
+# budgeted searches find the best move early. Moves are ranked by, in order:
+# * their EV from a shallower search of the same position (hints)
+# * being a killer: a move that was best at the same remaining depth
+# * the points they score right away
+# * their history count, which grows every time they are best in the search
+# My moves and the opponent's are kept apart, as the best opponent reply is
+# the one with the lowest EV for me.
+class MoveOrderer(object):
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        # (mine, depth) -> killer moves, most recent first
+        self.killers = defaultdict(list)
+        # (mine, move) -> history count
+        self.history = defaultdict(int)
+        # mine -> rank of the best move in the order -> number of nodes
+        self.best_ranks = {True: defaultdict(int), False: defaultdict(int)}
+
+    # Returns the (move, score) pairs sorted best first. scores are the
+    # points each move scores, as Board.scores_if_played gives them.
+    def order_moves(self, moves, scores, depth, mine=True, hints=None):
+        killers = self.killers[mine, depth]
+        history = self.history
+
+        def sort_key(move_and_score):
+            move, score = move_and_score
+            hint = hints.get(move, 0.0) if hints else 0.0
+            if not mine:
+                hint = -hint
+            return (hint, move in killers, score, history[mine, move])
+
+        return sorted(zip(moves, scores), key=sort_key, reverse=True)
+
+    # Records that best_move, tried rank-th (from 0) in the order, was the
+    # best move of a node searched to depth
+    def record_best(self, best_move, rank, depth, mine=True):
+        killers = self.killers[mine, depth]
+        if best_move not in killers:
+            killers.insert(0, best_move)
+            del killers[self.num_killers:]
+        self.history[mine, best_move] += (depth + 1) ** 2
+        self.best_ranks[mine][rank] += 1
+
+    def clear(self):
+        self.killers.clear()
+        self.history.clear()
+        for ranks in self.best_ranks.values():
+            ranks.clear()
+
+    # Fraction of nodes whose best move was tried first, and the mean rank
+    # of the best move, for my nodes (mine) or the opponent's
+    def stats(self, mine=True):
+        ranks = self.best_ranks[mine]
+        num_nodes = sum(ranks.values())
+        if not num_nodes:
+            return {'nodes': 0, 'best_first': 0.0, 'mean_rank': 0.0}
+        return {'nodes': num_nodes,
+                'best_first': 1.0 * ranks[0] / num_nodes,
+                'mean_rank': 1.0 * sum(r * n for r, n in ranks.iteritems()) / num_nodes}
+
+    def __repr__(self):
+        my_stats, opp_stats = self.stats(True), self.stats(False)
+        return ('MoveOrderer(best first at %.0f%% of %d my nodes, %.0f%% of %d opp nodes)'
+                % (100 * my_stats['best_first'], my_stats['nodes'],
+                   100 * opp_stats['best_first'], opp_stats['nodes']))
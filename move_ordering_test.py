@@ -0,0 +1,55 @@
+import unittest
+from move_ordering import MoveOrderer
+
+class TestMoveOrderer(unittest.TestCase):
+    def test_orders_by_score(self):
+        orderer = MoveOrderer()
+        ordered = orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 2)
+        self.assertEqual(ordered, [('b', 15), ('a', 5), ('c', 0)])
+
+    def test_killers_before_score(self):
+        orderer = MoveOrderer()
+        orderer.record_best('c', 2, 2)
+        self.assertEqual([m for m, s in orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 2)],
+                         ['c', 'b', 'a'])
+        # Killers are kept per depth, and per side
+        self.assertEqual([m for m, s in orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 1)],
+                         ['b', 'a', 'c'])
+        self.assertEqual([m for m, s in orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 2,
+                                                             mine=False)],
+                         ['b', 'a', 'c'])
+
+    def test_num_killers(self):
+        orderer = MoveOrderer(num_killers=2)
+        for move in ['a', 'b', 'c']:
+            orderer.record_best(move, 0, 1)
+        self.assertEqual(orderer.killers[True, 1], ['c', 'b'])
+
+    def test_history_breaks_ties(self):
+        orderer = MoveOrderer()
+        orderer.record_best('a', 1, 3)
+        ordered = orderer.order_moves(['b', 'a'], [0, 0], 1)
+        self.assertEqual([m for m, s in ordered], ['a', 'b'])
+
+    def test_hints_first(self):
+        orderer = MoveOrderer()
+        hints = {'a': 0.7, 'b': 0.4, 'c': 0.5}
+        ordered = orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 2, hints=hints)
+        self.assertEqual([m for m, s in ordered], ['a', 'c', 'b'])
+        # The opponent's best moves have the lowest EV for me
+        ordered = orderer.order_moves(['a', 'b', 'c'], [5, 15, 0], 2, False, hints)
+        self.assertEqual([m for m, s in ordered], ['b', 'c', 'a'])
+
+    def test_stats(self):
+        orderer = MoveOrderer()
+        self.assertEqual(orderer.stats()['nodes'], 0)
+        for rank in [0, 0, 0, 2]:
+            orderer.record_best('a', rank, 1)
+        stats = orderer.stats()
+        self.assertEqual(stats['nodes'], 4)
+        self.assertEqual(stats['best_first'], 0.75)
+        self.assertEqual(stats['mean_rank'], 0.5)
+        self.assertEqual(orderer.stats(mine=False)['nodes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import multiprocessing
+import algos
+import tile_set
+from belief import Belief
+from board import Board
+from game_state import GameState
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+from dominoes_util import Dir
+
+# Root-parallel tree_search. My moves at the root are independent once the
+# board, hand and scores are restored after each, so each is searched by a
+# worker process on its own copy of the game state. When there are fewer
+# moves than workers, the opponent's replies to each move are split across
+# workers as well, and the parent combines their values the way
+# tree_search does.
+
+# Game states are sent to workers as tuples of ints: the moves that rebuild
+# the board, the hand as a tile mask and the scores
+def encode_move(move):
+    tile, direction = move
+    if tile is None:
+        return None
+    return (tile.id, direction.value)
+
+def decode_move(encoded):
+    if encoded is None:
+        return (None, None)
+    tile_id, direction = encoded
+    return (tile_set.ALL_TILES[tile_id], Dir(direction))
+
+def encode_game_state(game_state):
+    board_moves = tuple(encode_move(move) for move in
+                        game_state.board.get_moves_to_rebuild())
+    return (board_moves, game_state.hand_mask(), game_state.my_score,
+            game_state.opp_score, game_state.play_to, game_state.opp_hand_size)
+
+def decode_game_state(encoded):
+    board_moves, hand_mask, my_score, opp_score, play_to, opp_hand_size = encoded
+    board = Board()
+    for encoded_move in board_moves:
+        board.make_move(*decode_move(encoded_move))
+    hand = set(tile_set.mask_to_tiles(hand_mask))
+    return GameState(board, my_score, opp_score, play_to, hand, opp_hand_size)
+
+
+# Each worker keeps a transposition table across tasks
+_worker_table = None
+
+def _init_worker(table_size):
+    global _worker_table
+    _worker_table = TranspositionTable(table_size) if table_size else None
+
+# belief_state is a Belief's search_state(), or None
+def _worker_context(prune, belief_state, leaf_evaluator):
+    orderer = MoveOrderer() if prune else None
+    belief = Belief.from_search_state(belief_state) if belief_state else None
+    return algos.SearchContext(_worker_table, prune, orderer=orderer, belief=belief,
+                               leaf_evaluator=leaf_evaluator)
+
+def _search_move(task):
+    encoded_state, depth, encoded_move, prune, belief_state, leaf_evaluator = task
+    move = decode_move(encoded_move)
+    context = _worker_context(prune, belief_state, leaf_evaluator)
+    ev_dict = algos.tree_search(depth, decode_game_state(encoded_state), context=context,
+                                moves=[move])
+    return encoded_move, ev_dict[move], context.nodes + context.opp_nodes
+
+def _search_opp_reply(task):
+    (encoded_state, depth, encoded_move, encoded_opp_move, prob_draw,
+        draw_counts, held, prune, belief_state, leaf_evaluator) = task
+    game_state = decode_game_state(encoded_state)
+    _make_my_move(game_state, decode_move(encoded_move))
+    opp_move = decode_move(encoded_opp_move)
+    opp_move_score = 0
+    if opp_move[0]:
+        opp_move_score = game_state.board.score_if_played(*opp_move)
+    context = _worker_context(prune, belief_state, leaf_evaluator)
+    val, val_draw = algos._opp_reply_value(
+        depth - 1, game_state, opp_move, opp_move_score, prob_draw,
+        draw_counts, None, context, held)[:2]
+    return (encoded_move, encoded_opp_move, val, val_draw,
+            context.nodes + context.opp_nodes)
+
+def _make_my_move(game_state, move):
+    tile, direction = move
+    game_state.my_score += game_state.board.make_move(tile, direction)
+    game_state.hand.remove(tile)
+    game_state.my_turn = False
+
+
+class ParallelSearcher(object):
+    # processes=1 searches in this process, without a pool, as does a
+    # searcher made in a pool worker, which can't start processes of its
+    # own. The pool is started by the first search that needs it. table_size
+    # > 0 gives each worker a transposition table of that many positions.
+    # leaf_evaluator is the search context's, sent along with each task.
+    def __init__(self, processes=None, table_size=0, prune=False, split_opp_ply=True,
+                 leaf_evaluator=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        if multiprocessing.current_process().daemon:
+            self.processes = 1
+        self.table_size = table_size
+        self.prune = prune
+        self.leaf_evaluator = leaf_evaluator
+        self.split_opp_ply = split_opp_ply
+        self.nodes = 0
+        self.pool = None
+        if self.processes == 1:
+            _init_worker(table_size)
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def _map(self, func, tasks):
+        if self.processes == 1:
+            return map(func, tasks)
+        if not self.pool:
+            self.pool = multiprocessing.Pool(self.processes, _init_worker, (self.table_size,))
+        return self.pool.map(func, tasks, chunksize=1)
+
+    # Same EV dict as algos.tree_search(depth, game_state), from searching
+    # my moves (and the opponent's replies) in parallel. belief is the
+    # search context's belief.Belief, if any.
+    def tree_search(self, depth, game_state, belief=None):
+        valid_moves = algos.get_valid_moves(game_state.board, game_state.hand)
+        if len(valid_moves) < 2 or depth == 0:
+            context = algos.SearchContext(belief=belief, leaf_evaluator=self.leaf_evaluator)
+            return algos.tree_search(depth, game_state, context=context)
+        encoded_state = encode_game_state(game_state)
+        if self.split_opp_ply and len(valid_moves) < self.processes:
+            return self._search_opp_replies(depth, game_state, encoded_state, valid_moves,
+                                            belief)
+        belief_state = belief.search_state() if belief else None
+        tasks = [(encoded_state, depth, encode_move(move), self.prune, belief_state,
+                  self.leaf_evaluator) for move in valid_moves]
+        ev_dict = {}
+        for encoded_move, ev, nodes in self._map(_search_move, tasks):
+            ev_dict[decode_move(encoded_move)] = ev
+            self.nodes += nodes
+        return ev_dict
+
+    def _search_opp_replies(self, depth, game_state, encoded_state, valid_moves, belief):
+        belief_state = belief.search_state() if belief else None
+        ev_dict = {}
+        tasks = []
+        chances_from_move = {}
+        for move in valid_moves:
+            # Moves that end the search are valued here, as tree_search does
+            move_state = game_state.copy()
+            _make_my_move(move_state, move)
+            if len(move_state.hand) == 0 or move_state.my_score >= move_state.play_to:
+                ev_dict[move] = algos.game_state_value(move_state)
+                continue
+            elif algos.board_is_boxed_out(move_state.board):
+                ev_dict[move] = algos.boxed_out_value(move_state)
+                continue
+            other_mask = algos.get_other_tiles_mask(move_state.board, move_state.hand)
+            tile_probs = None
+            if belief:
+                tile_probs = belief.tile_probs(other_mask, move_state.opp_hand_size)
+            num_other_tiles, opp_valid_moves, prob_draw, draw_counts = \
+                algos._opp_reply_chances(move_state.board, other_mask,
+                                         move_state.opp_hand_size, tile_probs)
+            chances_from_move[move] = (num_other_tiles, prob_draw, tile_probs)
+            for opp_move in opp_valid_moves or [(None, None)]:
+                held = (tile_probs is None or not opp_move[0] or
+                        tile_probs[opp_move[0].id] > 0)
+                if not held and prob_draw == 0:
+                    continue
+                tasks.append((encoded_state, depth, encode_move(move), encode_move(opp_move),
+                              prob_draw, draw_counts, held, self.prune, belief_state,
+                              self.leaf_evaluator))
+
+        opp_move_vals = dict((move, {}) for move in chances_from_move)
+        opp_move_vals_draw = dict((move, {}) for move in chances_from_move)
+        for encoded_move, encoded_opp_move, val, val_draw, nodes in self._map(
+                _search_opp_reply, tasks):
+            move, opp_move = decode_move(encoded_move), decode_move(encoded_opp_move)
+            if val is not None:
+                opp_move_vals[move][opp_move] = val
+            if val_draw is not None:
+                opp_move_vals_draw[move][opp_move] = val_draw
+            self.nodes += nodes
+        for move, (num_other_tiles, prob_draw, tile_probs) in chances_from_move.iteritems():
+            ev_dict[move] = algos._opp_replies_ev(
+                opp_move_vals[move], opp_move_vals_draw[move], prob_draw,
+                game_state.opp_hand_size, num_other_tiles, tile_probs)[0]
+        return ev_dict
@@ -0,0 +1,51 @@
+import unittest
+import algos
+from board import Board
+from game_state import GameState
+from parallel_search import ParallelSearcher, encode_game_state, decode_game_state
+from tile import Tile
+from dominoes_util import Dir
+
+class TestParallelSearch(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        moves = [
+            (Tile(6,6), Dir.RIGHT),
+            (Tile(6,3), Dir.RIGHT),
+            (Tile(6,4), Dir.LEFT),
+            (Tile(6,0), Dir.UP),
+            (Tile(3,3), Dir.RIGHT),
+            (Tile(4,5), Dir.LEFT),
+            (Tile(5,6), Dir.LEFT),
+        ]
+        for tile, direction in moves:
+            self.board.make_move(tile, direction)
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        self.game_state = GameState(self.board, 10, 5, 150, hand, 4)
+
+    def test_encode_decode(self):
+        encoded = encode_game_state(self.game_state)
+        game_state = decode_game_state(encoded)
+        self.assertEqual(game_state.key(), self.game_state.key())
+        self.assertEqual(repr(game_state.board), repr(self.board))
+        self.assertEqual(game_state.hand, self.game_state.hand)
+        self.assertEqual(encode_game_state(game_state), encoded)
+
+    def test_same_evs_as_tree_search(self):
+        for split_opp_ply in [True, False]:
+            searcher = ParallelSearcher(1, split_opp_ply=split_opp_ply)
+            for depth in [0, 1, 2]:
+                ev_dict = algos.tree_search(depth, self.game_state)
+                self.assertEqual(searcher.tree_search(depth, self.game_state), ev_dict)
+
+    def test_process_pool(self):
+        searcher = ParallelSearcher(2)
+        try:
+            self.assertEqual(searcher.tree_search(2, self.game_state),
+                             algos.tree_search(2, self.game_state))
+            self.assertGreater(searcher.nodes, 0)
+        finally:
+            searcher.close()
+
+if __name__ == '__main__':
+    unittest.main()
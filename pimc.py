@@ -0,0 +1,130 @@
+import math
+import random
+import multiprocessing
+import algos
+import tile_set
+import parallel_search
+from round_state import RoundState, deal_hidden_tiles
+
+# Perfect information Monte Carlo: deals the tiles the player to move can't
+# see many times, solves each deal as a full information game with
+# alpha-beta, and plays the move with the highest mean value over the
+# deals. Deals are solved in batches, across a process pool, until the best
+# move is ahead of every other move by z standard errors (paired over the
+# deals) or max_deals are solved.
+
+# Value for seat 0 of state searched to depth plies. Drawing and knocking
+# don't count as plies.
+def alpha_beta(state, depth, alpha=0.0, beta=1.0):
+    if depth == 0 or state.is_terminal():
+        return state.value(0)
+    moves = state.legal_moves()
+    if len(moves) > 1:
+        scores = state.board.scores_if_played(moves)
+        moves = [move for score, move in sorted(zip(scores, moves), key=lambda x: -x[0])]
+    maximizing = state.turn == 0
+    for move in moves:
+        undo = state.make_move(*move)
+        value = alpha_beta(state, depth - 1 if move[0] else depth, alpha, beta)
+        state.undo_move(undo)
+        if maximizing:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return alpha if maximizing else beta
+
+# Values of each of moves (of seat 0, to move) in state
+def solve_deal(state, moves, depth):
+    values = []
+    for move in moves:
+        undo = state.make_move(*move)
+        values.append(alpha_beta(state, depth - 1))
+        state.undo_move(undo)
+    return values
+
+def _solve_deals(task):
+    encoded_state, encoded_moves, deals, depth = task
+    game_state = parallel_search.decode_game_state(encoded_state)
+    moves = [parallel_search.decode_move(move) for move in encoded_moves]
+    values = []
+    for opp_hand, boneyard_ids in deals:
+        boneyard = [tile_set.ALL_TILES[i] for i in boneyard_ids]
+        state = RoundState.from_game_state(game_state, opp_hand, boneyard)
+        values.append(solve_deal(state, moves, depth))
+    return values
+
+def _mean_and_std_err(xs):
+    n = len(xs)
+    mean = 1.0 * sum(xs) / n
+    var = sum((x - mean) ** 2 for x in xs) / max(n - 1, 1)
+    return mean, math.sqrt(var / n)
+
+
+class PIMC(object):
+    # processes=1 solves deals in this process, without a pool, as does an
+    # engine made in a pool worker. The pool is started by the first batch.
+    def __init__(self, depth=3, min_deals=16, max_deals=64, batch_size=16, z=2.0,
+                 processes=1, seed=None):
+        self.depth = depth
+        self.min_deals = min_deals
+        self.max_deals = max_deals
+        self.batch_size = batch_size
+        self.z = z
+        self.processes = 1 if multiprocessing.current_process().daemon else processes
+        # Seeded from random unless seed is given
+        self.rng = random.Random(random.getrandbits(32) if seed is None else seed)
+        self.pool = None
+        self.num_deals = 0
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def _solve_batch(self, encoded_state, encoded_moves, deals):
+        chunk_size = -(-len(deals) // self.processes)
+        tasks = [(encoded_state, encoded_moves, deals[i:i + chunk_size], self.depth)
+                 for i in range(0, len(deals), chunk_size)]
+        if self.processes > 1:
+            if not self.pool:
+                self.pool = multiprocessing.Pool(self.processes)
+            results = self.pool.map(_solve_deals, tasks, chunksize=1)
+        else:
+            results = map(_solve_deals, tasks)
+        return [values for chunk_values in results for values in chunk_values]
+
+    # Whether the move with the highest mean is ahead of every other move
+    # by at least z standard errors of the paired differences
+    def _best_is_clear(self, deal_values, best):
+        for i in range(len(deal_values[0])):
+            if i == best:
+                continue
+            # Moves with the same value in every deal are as good as each other
+            diff, std_err = _mean_and_std_err([v[best] - v[i] for v in deal_values])
+            if std_err > 0 and diff < self.z * std_err:
+                return False
+        return True
+
+    # Mean value of each move over the deals solved, dealt following belief
+    # (a belief.Belief) if given
+    def move_values(self, game_state, belief=None):
+        moves = algos.get_valid_moves(game_state.board, game_state.hand)
+        encoded_state = parallel_search.encode_game_state(game_state)
+        encoded_moves = [parallel_search.encode_move(move) for move in moves]
+        deal_values = []
+        while len(deal_values) < self.max_deals:
+            deals = []
+            for i in range(min(self.batch_size, self.max_deals - len(deal_values))):
+                opp_hand, boneyard = deal_hidden_tiles(game_state, self.rng, belief)
+                deals.append((opp_hand, tuple(tile.id for tile in boneyard)))
+            deal_values += self._solve_batch(encoded_state, encoded_moves, deals)
+            means = [sum(v[i] for v in deal_values) / len(deal_values)
+                     for i in range(len(moves))]
+            best = means.index(max(means))
+            if len(deal_values) >= self.min_deals and self._best_is_clear(deal_values, best):
+                break
+        self.num_deals += len(deal_values)
+        return dict(zip(moves, means))
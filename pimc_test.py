@@ -0,0 +1,96 @@
+import unittest
+import random
+import algos
+import tile_set
+from board import Board
+from game_state import GameState
+from pimc import PIMC, alpha_beta, solve_deal
+from round_state import RoundState
+from tile import Tile
+from dominoes_util import Dir
+
+# Value for seat 0 of state searched to depth without pruning
+def minimax(state, depth):
+    if depth == 0 or state.is_terminal():
+        return state.value(0)
+    values = []
+    for move in state.legal_moves():
+        undo = state.make_move(*move)
+        values.append(minimax(state, depth - 1 if move[0] else depth))
+        state.undo_move(undo)
+    return max(values) if state.turn == 0 else min(values)
+
+class TestPIMC(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        moves = [
+            (Tile(6,6), Dir.RIGHT),
+            (Tile(6,3), Dir.RIGHT),
+            (Tile(6,4), Dir.LEFT),
+            (Tile(6,0), Dir.UP),
+            (Tile(3,3), Dir.RIGHT),
+            (Tile(4,5), Dir.LEFT),
+            (Tile(5,6), Dir.LEFT),
+        ]
+        for tile, direction in moves:
+            self.board.make_move(tile, direction)
+
+    def test_alpha_beta_matches_minimax(self):
+        rng = random.Random(3)
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 100, 110, 150, hand, 4)
+        other_tiles = tile_set.mask_to_tiles(algos.get_other_tiles_mask(self.board, hand))
+        for deal in range(5):
+            rng.shuffle(other_tiles)
+            state = RoundState.from_game_state(
+                gs, tile_set.tiles_to_mask(other_tiles[:4]), other_tiles[4:])
+            for depth in [1, 2, 3, 4]:
+                self.assertAlmostEqual(alpha_beta(state, depth), minimax(state, depth))
+
+    def test_solve_deal_leaves_state(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 2)
+        state = RoundState.from_game_state(
+            gs, tile_set.tiles_to_mask([Tile(1, 1), Tile(2, 2)]), [Tile(5, 5)])
+        board_repr = repr(state.board)
+        moves = algos.get_valid_moves(self.board, hand)
+        values = solve_deal(state, moves, 3)
+        self.assertEqual(len(values), len(moves))
+        self.assertEqual(repr(state.board), board_repr)
+        self.assertEqual(state.boneyard, [Tile(5, 5)])
+        self.assertEqual(state.hands, [gs.hand_mask(),
+                                       tile_set.tiles_to_mask([Tile(1, 1), Tile(2, 2)])])
+
+    def test_takes_winning_move(self):
+        # Playing [0|3] up scores 15 and wins, in every deal
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 140, 140, 150, hand, 4)
+        engine = PIMC(depth=2, min_deals=8, batch_size=8, seed=1)
+        ev_dict = engine.move_values(gs)
+        self.assertEqual(ev_dict[(Tile(0, 3), Dir.UP)], 1.0)
+        self.assertEqual(max(ev_dict.iteritems(), key=lambda x: x[1])[0],
+                         (Tile(0, 3), Dir.UP))
+        # The lead is clear after the first batch
+        self.assertEqual(engine.num_deals, 8)
+
+    def test_unseeded(self):
+        # Follows random, as seeded tournament games do
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        random.seed(6)
+        ev_dict = PIMC(depth=2, max_deals=16).move_values(gs)
+        random.seed(6)
+        self.assertTrue(PIMC(depth=2, max_deals=16).move_values(gs) == ev_dict)
+
+    def test_process_pool(self):
+        hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+        gs = GameState(self.board, 0, 0, 150, hand, 4)
+        engine = PIMC(depth=2, max_deals=16, seed=5)
+        pooled_engine = PIMC(depth=2, max_deals=16, processes=2, seed=5)
+        try:
+            self.assertEqual(pooled_engine.move_values(gs), engine.move_values(gs))
+        finally:
+            pooled_engine.close()
+
+if __name__ == '__main__':
+    unittest.main()
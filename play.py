@@ -43,20 +43,20 @@ class BoardWidget(Widget):
         for tile_widget in self.tile_widgets:
            self.remove_widget(tile_widget)
 
-    def add_tile(self, tile, x, y, direction, is_spinner=False):
+    def add_tile(self, tile, orientation, x, y, direction, is_spinner=False):
         tile_widget = TileWidget()
         tile_widget.image_file = tile.get_image_file()
         x_offset, y_offset = 0, 0
         vertical = direction in ['UP', 'DOWN']
-        if tile.orientation == Orientation.BIG_LEFT:
+        if orientation == Orientation.BIG_LEFT:
             tile_widget.angle = 270
             x_offset = tile_widget.width
-        elif tile.orientation == Orientation.BIG_RIGHT:
+        elif orientation == Orientation.BIG_RIGHT:
             tile_widget.angle = 90
             x_offset = TILE_WIDTH
-        elif tile.orientation == Orientation.BIG_UP:
+        elif orientation == Orientation.BIG_UP:
             tile_widget.angle = 180
-        elif tile.orientation == Orientation.DOUBLE and vertical:
+        elif orientation == Orientation.DOUBLE and vertical:
             tile_widget.angle = 90
             if direction == 'UP':
                 y_offset = -TILE_WIDTH
@@ -77,15 +77,18 @@ class BoardWidget(Widget):
         y = self.y + self.height / 2 - TILE_HEIGHT /2
         for tile in board.main_row:
             is_spinner = board.spinner and tile == board.spinner
-            x_shift = TILE_WIDTH + self.add_tile(tile, x, y, 'RIGHT', is_spinner)
+            x_shift = TILE_WIDTH + self.add_tile(
+                tile, board.get_orientation(tile), x, y, 'RIGHT', is_spinner)
             if board.spinner and is_spinner:
                 bottom = y
                 top = bottom + TILE_HEIGHT
                 for up_tile in board.up:
-                    top += TILE_HEIGHT + self.add_tile(up_tile, x, top, 'UP')
+                    top += TILE_HEIGHT + self.add_tile(
+                        up_tile, board.get_orientation(up_tile), x, top, 'UP')
                 for down_tile in board.down:
                     bottom -= TILE_HEIGHT - self.add_tile(
-                        down_tile, x, bottom - TILE_HEIGHT, 'DOWN')
+                        down_tile, board.get_orientation(down_tile), x,
+                        bottom - TILE_HEIGHT, 'DOWN')
             x += x_shift
 
 
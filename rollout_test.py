@@ -0,0 +1,72 @@
+import unittest
+import random
+import algos
+import tile_set
+from board import Board
+from game_state import GameState
+from round_state import RoundState, deal_hidden_tiles
+from rollout import RolloutEvaluator, RANDOM_ROLLOUT, play_out
+from tile import Tile
+from dominoes_util import Dir
+
+class TestRollout(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        moves = [
+            (Tile(6,6), Dir.RIGHT),
+            (Tile(6,3), Dir.RIGHT),
+            (Tile(6,4), Dir.LEFT),
+            (Tile(6,0), Dir.UP),
+            (Tile(3,3), Dir.RIGHT),
+            (Tile(4,5), Dir.LEFT),
+            (Tile(5,6), Dir.LEFT),
+        ]
+        for tile, direction in moves:
+            self.board.make_move(tile, direction)
+        self.hand = set([Tile(3, 4), Tile(0, 3), Tile(6, 1)])
+
+    def test_play_out(self):
+        rng = random.Random(1)
+        gs = GameState(self.board, 0, 0, 150, self.hand, 4)
+        states = [RoundState.from_game_state(gs, *deal_hidden_tiles(gs, rng))
+                  for i in range(10)]
+        play_out(states, RANDOM_ROLLOUT, rng)
+        for state in states:
+            self.assertTrue(state.round_over)
+            self.assertIn(state.next_starter, [0, 1])
+        self.assertEqual(self.board.get_num_tiles_on_board(), 7)
+
+    def test_value(self):
+        gs = GameState(self.board, 100, 100, 150, self.hand, 4)
+        evaluator = RolloutEvaluator(num_playouts=20, seed=2)
+        value = evaluator.value(gs)
+        self.assertGreater(value, 0.0)
+        self.assertLess(value, 1.0)
+        self.assertEqual(evaluator.playouts, 20)
+        self.assertEqual(RolloutEvaluator(num_playouts=20, seed=2).value(gs), value)
+        # Unseeded evaluators follow random
+        random.seed(4)
+        value = RolloutEvaluator(num_playouts=20).value(gs)
+        random.seed(4)
+        self.assertEqual(RolloutEvaluator(num_playouts=20).value(gs), value)
+        # Going out wins the game
+        gs = GameState(self.board, 145, 100, 150, set([Tile(3, 4)]), 7)
+        self.assertEqual(evaluator.value(gs), 1.0)
+
+    def test_tree_search(self):
+        gs = GameState(self.board, 100, 110, 150, self.hand, 4)
+        board_repr = repr(self.board)
+        evaluator = RolloutEvaluator(num_playouts=4, seed=3)
+        context = algos.SearchContext(leaf_evaluator=evaluator)
+        ev_dict = algos.tree_search(1, gs, context=context)
+        self.assertEqual(set(ev_dict), set(algos.get_valid_moves(self.board, self.hand)))
+        for ev in ev_dict.values():
+            self.assertGreaterEqual(ev, 0.0)
+            self.assertLessEqual(ev, 1.0)
+        self.assertGreater(evaluator.playouts, 0)
+        self.assertEqual(repr(self.board), board_repr)
+        self.assertEqual(gs.hand, self.hand)
+
+
+if __name__ == '__main__':
+    unittest.main()
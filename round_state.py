@@ -0,0 +1,119 @@
+import algos
+import sampler
+import tile_set
+
+# A round with everything known: both hands, the boneyard in draw order,
+# the scores and whose turn it is. Players are seats 0 and 1. Moves follow
+# Game: a player with no valid move draws, or knocks if the boneyard is
+# empty; going out scores the domino points and a block out scores the
+# block out points for the player with the fewest points in hand (seat 0
+# if tied). Used to play out determinizations of a GameState.
+class RoundState(object):
+    def __init__(self, board, hands, boneyard, scores, play_to, turn=0):
+        self.board = board
+        # Tile masks
+        self.hands = list(hands)
+        # Drawn from the end
+        self.boneyard = list(boneyard)
+        self.scores = list(scores)
+        self.play_to = play_to
+        self.turn = turn
+        self.round_over = False
+        # Seat that starts the next round, if the round is over
+        self.next_starter = None
+
+    @classmethod
+    def from_game_state(cls, game_state, opp_hand, boneyard):
+        # Seat 0 is the player to move in game_state
+        return cls(game_state.board.copy(), [game_state.hand_mask(), opp_hand], boneyard,
+                   [game_state.my_score, game_state.opp_score], game_state.play_to)
+
+    def copy(self):
+        state = RoundState(self.board.copy(), self.hands, self.boneyard, self.scores,
+                           self.play_to, self.turn)
+        state.round_over = self.round_over
+        state.next_starter = self.next_starter
+        return state
+
+    def game_over(self):
+        return max(self.scores) >= self.play_to
+
+    def is_terminal(self):
+        return self.round_over or self.game_over()
+
+    def valid_moves(self, seat=None):
+        if seat is None:
+            seat = self.turn
+        return self.board.get_unique_valid_moves(self.hands[seat])
+
+    # Valid moves of the player to move, or the draw/knock move (None, None)
+    def legal_moves(self):
+        return self.valid_moves() or [(None, None)]
+
+    # Returns what undo_move needs to take the move back
+    def make_move(self, tile, direction):
+        seat = self.turn
+        undo = (tile, direction, tuple(self.hands), tuple(self.scores), seat,
+                self.round_over, self.next_starter)
+        if tile is None:
+            if self.boneyard:
+                self.hands[seat] |= self.boneyard.pop().bit
+            elif not self.valid_moves(1 - seat):
+                self._score_block_out()
+            else:
+                self.turn = 1 - seat
+            return undo
+        self.hands[seat] &= ~tile.bit
+        self.scores[seat] += self.board.make_move(tile, direction)
+        if not self.hands[seat]:
+            domino_points = tile_set.mask_points(self.hands[1 - seat])
+            self.scores[seat] += domino_points - domino_points % 5
+            self.round_over = True
+            self.next_starter = seat
+        else:
+            self.turn = 1 - seat
+        return undo
+
+    def undo_move(self, undo):
+        tile, direction, hands, scores, seat, round_over, next_starter = undo
+        if tile is not None:
+            self.board.undo_move(tile, direction)
+        elif hands[seat] != self.hands[seat]:
+            # Put the drawn tile back on the boneyard
+            drawn_mask = self.hands[seat] & ~hands[seat]
+            self.boneyard.append(tile_set.mask_to_tiles(drawn_mask)[0])
+        self.hands = list(hands)
+        self.scores = list(scores)
+        self.turn = seat
+        self.round_over = round_over
+        self.next_starter = next_starter
+
+    def _score_block_out(self):
+        points = [tile_set.mask_points(hand) for hand in self.hands]
+        winner = 0 if points[0] <= points[1] else 1
+        block_out_points = points[1 - winner]
+        self.scores[winner] += block_out_points - block_out_points % 5
+        self.round_over = True
+        self.next_starter = winner
+
+    # Probability seat wins the game from here. Rounds in play are valued
+    # as game_state_value would value the position.
+    def value(self, seat):
+        my_score, opp_score = self.scores[seat], self.scores[1 - seat]
+        if self.round_over:
+            # The player starting the next round is on serve
+            on_serve = self.next_starter == seat
+        else:
+            hand_sizes = [tile_set.popcount(hand) for hand in self.hands]
+            on_serve = algos.i_am_on_serve(hand_sizes[seat], hand_sizes[1 - seat],
+                                           self.turn == seat)
+        return algos.prob_winning(my_score, opp_score, on_serve, self.play_to)
+
+
+# Random deal of the tiles the player to move in game_state can't see: the
+# opponent's hand, as a mask, and the boneyard in draw order. With a belief
+# (a belief.Belief), the hand follows its voids and tile weights.
+def deal_hidden_tiles(game_state, rng, belief=None):
+    other_mask = algos.get_other_tiles_mask(game_state.board, game_state.hand)
+    weights = belief.tile_weights(other_mask, game_state.opp_hand_size) if belief else None
+    return sampler.deal(rng, other_mask, game_state.opp_hand_size, weights=weights)
@@ -0,0 +1,96 @@
+import unittest
+import tile_set
+from board import Board
+from round_state import RoundState
+from tile import Tile
+from dominoes_util import Dir
+
+def mask(*tiles):
+    return tile_set.tiles_to_mask(tiles)
+
+class TestRoundState(unittest.TestCase):
+    def setUp(self):
+        self.board = Board()
+        self.board.make_move(Tile(6, 6), Dir.RIGHT)
+        self.board.make_move(Tile(6, 3), Dir.RIGHT)
+
+    def test_move_scores_and_passes_turn(self):
+        state = RoundState(self.board, [mask(Tile(6, 2), Tile(1, 1)), mask(Tile(2, 2))],
+                           [], [0, 0], 150)
+        state.make_move(Tile(6, 2), Dir.LEFT)
+        self.assertEqual(state.scores, [5, 0])
+        self.assertEqual(state.turn, 1)
+        self.assertEqual(state.hands[0], mask(Tile(1, 1)))
+        self.assertFalse(state.is_terminal())
+
+    def test_draw(self):
+        state = RoundState(self.board, [mask(Tile(1, 1)), mask(Tile(2, 2))],
+                           [Tile(5, 5), Tile(3, 4)], [0, 0], 150)
+        self.assertEqual(state.legal_moves(), [(None, None)])
+        state.make_move(None, None)
+        self.assertEqual(state.hands[0], mask(Tile(1, 1), Tile(3, 4)))
+        self.assertEqual(state.boneyard, [Tile(5, 5)])
+        self.assertEqual(state.turn, 0)
+
+    def test_knock(self):
+        state = RoundState(self.board, [mask(Tile(1, 1)), mask(Tile(2, 3))],
+                           [], [0, 0], 150)
+        state.make_move(None, None)
+        self.assertEqual(state.turn, 1)
+        self.assertFalse(state.round_over)
+
+    def test_domino(self):
+        state = RoundState(self.board, [mask(Tile(6, 2)), mask(Tile(5, 6), Tile(2, 1))],
+                           [], [0, 0], 150)
+        state.make_move(Tile(6, 2), Dir.LEFT)
+        # 5 for the move, 14 rounded down to 10 for going out
+        self.assertEqual(state.scores, [15, 0])
+        self.assertTrue(state.round_over)
+        self.assertEqual(state.next_starter, 0)
+
+    def test_block_out(self):
+        state = RoundState(self.board, [mask(Tile(1, 1)), mask(Tile(2, 4), Tile(5, 4))],
+                           [], [0, 0], 150)
+        state.make_move(None, None)
+        self.assertEqual(state.scores, [15, 0])
+        self.assertTrue(state.round_over)
+        self.assertEqual(state.next_starter, 0)
+
+    def test_value(self):
+        state = RoundState(self.board, [mask(Tile(1, 1)), mask(Tile(2, 2))],
+                           [], [145, 100], 150)
+        self.assertGreater(state.value(0), 0.5)
+        self.assertAlmostEqual(state.value(0) + state.value(1), 1.0)
+        state.scores[0] = 150
+        self.assertEqual(state.value(0), 1.0)
+        self.assertEqual(state.value(1), 0.0)
+
+    def test_copy(self):
+        state = RoundState(self.board, [mask(Tile(6, 4)), mask(Tile(2, 2))],
+                           [Tile(5, 5)], [0, 0], 150)
+        copy = state.copy()
+        copy.make_move(Tile(6, 4), Dir.LEFT)
+        self.assertEqual(state.hands[0], mask(Tile(6, 4)))
+        self.assertEqual(state.scores, [0, 0])
+        self.assertEqual(self.board.get_num_tiles_on_board(), 2)
+
+    def test_undo_move(self):
+        state = RoundState(self.board, [mask(Tile(6, 2), Tile(1, 1)), mask(Tile(2, 1))],
+                           [Tile(5, 5), Tile(4, 4)], [0, 0], 150)
+        board_repr = repr(self.board)
+        undos = []
+        for move in [(Tile(6, 2), Dir.LEFT), (None, None), (None, None), (Tile(2, 1), Dir.LEFT),
+                     (Tile(1, 1), Dir.LEFT)]:
+            undos.append(state.make_move(*move))
+        self.assertTrue(state.round_over)
+        for undo in reversed(undos):
+            state.undo_move(undo)
+        self.assertEqual(repr(self.board), board_repr)
+        self.assertEqual(state.hands, [mask(Tile(6, 2), Tile(1, 1)), mask(Tile(2, 1))])
+        self.assertEqual(state.boneyard, [Tile(5, 5), Tile(4, 4)])
+        self.assertEqual(state.scores, [0, 0])
+        self.assertEqual(state.turn, 0)
+        self.assertFalse(state.round_over)
+
+if __name__ == '__main__':
+    unittest.main()
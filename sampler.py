@@ -0,0 +1,50 @@
+import random
+import tile_set
+
+# Deals of the tiles the player to move can't see: the opponent's hand, as a
+# tile mask, and the boneyard, in draw order (drawn from the end, as in
+# RoundState). The opponent's hand never holds a tile they are void in, and
+# with weights (see Belief.tile_weights) its tiles are picked one at a time,
+# each with probability in proportion to its weight. Every deal is then
+# consistent with the round without retrying: the hand is picked from the
+# tiles allowed, and the rest go to the boneyard. Weighted hands follow
+# Efraimidis & Spirakis' sampling without replacement: each tile gets the
+# key u ** (1 / weight) for a uniform u, and the hand is the tiles with the
+# largest keys.
+
+# Tile ids of the opponent's hand: opp_hand_size of the tiles of other_mask
+# not in void_mask, or of other_mask if the voids leave too few
+def _deal_hand_ids(rng, other_mask, opp_hand_size, void_mask, weights):
+    if weights is not None:
+        ids = [i for i in tile_set.mask_to_ids(other_mask & ~void_mask) if weights[i] > 0]
+        if len(ids) >= opp_hand_size:
+            keys = [(rng.random() ** (1.0 / weights[i]), i) for i in ids]
+            keys.sort(reverse=True)
+            return [i for key, i in keys[:opp_hand_size]]
+    ids = tile_set.mask_to_ids(other_mask & ~void_mask)
+    if len(ids) < opp_hand_size:
+        ids = tile_set.mask_to_ids(other_mask)
+    return rng.sample(ids, opp_hand_size)
+
+# Random deal of other_mask: (opp_hand mask, boneyard tiles list)
+def deal(rng, other_mask, opp_hand_size, void_mask=0, weights=None):
+    opp_hand = 0
+    for i in _deal_hand_ids(rng, other_mask, opp_hand_size, void_mask, weights):
+        opp_hand |= 1 << i
+    boneyard = tile_set.mask_to_tiles(other_mask & ~opp_hand)
+    rng.shuffle(boneyard)
+    return opp_hand, boneyard
+
+
+class DealSampler(object):
+    # Deals from its own generator, seeded with seed
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def deal(self, other_mask, opp_hand_size, void_mask=0, weights=None):
+        return deal(self.rng, other_mask, opp_hand_size, void_mask, weights)
+
+    # The next num_deals deals
+    def deals(self, num_deals, other_mask, opp_hand_size, void_mask=0, weights=None):
+        return [deal(self.rng, other_mask, opp_hand_size, void_mask, weights)
+                for i in range(num_deals)]
@@ -0,0 +1,57 @@
+import unittest
+import random
+import tile_set
+import sampler
+from sampler import DealSampler
+from tile import Tile
+
+class TestSampler(unittest.TestCase):
+    def setUp(self):
+        # Every tile but the 6s
+        self.other_mask = tile_set.FULL_MASK & ~tile_set.PIP_MASKS[6]
+
+    def test_deal(self):
+        rng = random.Random(1)
+        for i in range(50):
+            opp_hand, boneyard = sampler.deal(rng, self.other_mask, 7)
+            self.assertEqual(tile_set.popcount(opp_hand), 7)
+            self.assertEqual(opp_hand & ~self.other_mask, 0)
+            boneyard_mask = tile_set.tiles_to_mask(boneyard)
+            self.assertEqual(len(boneyard), 21 - 7)
+            self.assertEqual(opp_hand & boneyard_mask, 0)
+            self.assertEqual(opp_hand | boneyard_mask, self.other_mask)
+
+    def test_voids(self):
+        rng = random.Random(2)
+        void_mask = tile_set.PIP_MASKS[0] | tile_set.PIP_MASKS[1]
+        for i in range(50):
+            opp_hand, boneyard = sampler.deal(rng, self.other_mask, 7, void_mask)
+            self.assertEqual(opp_hand & void_mask, 0)
+            self.assertEqual(len(boneyard), 14)
+        # Voids that leave too few tiles are ignored
+        opp_hand, boneyard = sampler.deal(rng, self.other_mask, 7, tile_set.FULL_MASK)
+        self.assertEqual(tile_set.popcount(opp_hand), 7)
+
+    def test_weights(self):
+        rng = random.Random(3)
+        other_mask = tile_set.tiles_to_mask([Tile(0,0), Tile(0,1), Tile(1,1)])
+        weights = [1.0] * tile_set.NUM_TILES
+        weights[Tile(0,0).id] = 8.0
+        weights[Tile(1,1).id] = 0.0
+        held = 0
+        for i in range(1000):
+            opp_hand, boneyard = sampler.deal(rng, other_mask, 1, weights=weights)
+            self.assertFalse(opp_hand & Tile(1,1).bit)
+            held += bool(opp_hand & Tile(0,0).bit)
+        # 8 / 9 of the time
+        self.assertGreater(held, 850)
+        self.assertLess(held, 930)
+
+    def test_seeded(self):
+        deals = DealSampler(seed=4).deals(20, self.other_mask, 7)
+        self.assertEqual(deals, DealSampler(seed=4).deals(20, self.other_mask, 7))
+        self.assertNotEqual(deals, DealSampler(seed=5).deals(20, self.other_mask, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import sys, getopt, random, time
+import algos
+import tile_set
+import bots
+import operator as op
+from player import Player
+from game import Game
+from move_ordering import MoveOrderer
+
+# Fixed set of positions to compare search variants on: the game states
+# seen by the player to move in seeded GreedyBot self-play, where that
+# player has more than one move.
+def benchmark_positions(num_positions, seed=0):
+    rng_state = random.getstate()
+    random.seed(seed)
+    positions = []
+    bot = bots.GreedyBot()
+    game = Game([Player('P1'), Player('P2')], 150)
+    game.start_first_game()
+    while len(positions) < num_positions:
+        if game.game_over:
+            game = Game([Player('P1'), Player('P2')], 150)
+            game.start_first_game()
+        if game.round_over:
+            game.deal_tiles()
+            game.round_over = False
+        game_state = game.create_game_state()
+        if len(algos.get_valid_moves(game_state.board, game_state.hand)) > 1:
+            positions.append(game_state.copy())
+        game.make_move_or_knock(*bot.pick_move(game_state))
+    random.setstate(rng_state)
+    return positions
+
+def best_move(ev_dict):
+    return max(ev_dict.iteritems(), key=op.itemgetter(1))[0]
+
+def run_search(depth, game_state, context):
+    start = time.time()
+    ev_dict = algos.tree_search(depth, game_state.copy(), context=context)
+    return ev_dict, time.time() - start
+
+# Searches each position without pruning and with the pruned search made
+# by make_context. Returns a row per position of the number of nodes and
+# secs of each search and whether they picked the same move.
+def compare_pruning(depth, positions, make_context=lambda: algos.SearchContext(prune=True)):
+    rows = []
+    for game_state in positions:
+        full = algos.SearchContext()
+        pruned = make_context()
+        full_evs, full_secs = run_search(depth, game_state, full)
+        pruned_evs, pruned_secs = run_search(depth, game_state, pruned)
+        rows.append((full.nodes + full.opp_nodes, pruned.nodes + pruned.opp_nodes,
+                     full_secs, pruned_secs,
+                     best_move(full_evs) == best_move(pruned_evs)))
+    return rows
+
+def print_rows(rows):
+    print 'pos  full nodes  pruned nodes  full secs  pruned secs  same move'
+    for i, (full_nodes, pruned_nodes, full_secs, pruned_secs, same) in enumerate(rows):
+        print '%3d  %10d  %12d  %9.3f  %11.3f  %s' % (
+            i, full_nodes, pruned_nodes, full_secs, pruned_secs, same)
+    print 'Total nodes: %d full, %d pruned (%.1f%%), same move in %d/%d' % (
+        sum(r[0] for r in rows), sum(r[1] for r in rows),
+        100.0 * sum(r[1] for r in rows) / sum(r[0] for r in rows),
+        sum(r[4] for r in rows), len(rows))
+    print 'Per node: %.1f us full, %.1f us pruned' % (
+        1e6 * sum(r[2] for r in rows) / sum(r[0] for r in rows),
+        1e6 * sum(r[3] for r in rows) / sum(r[1] for r in rows))
+
+# Arguments of the draw and reply probabilities, as (name, function,
+# cache, args): every count of tiles the search can ask them for. The
+# cache is None for ncr, whose table is built at import and which is
+# timed against computing it with _ncr instead.
+def lookup_cases():
+    ncr_args = [(n, r) for n in range(tile_set.NUM_TILES + 1) for r in range(n + 1)]
+    draw_args = [(num_valid, hand_size, num_total)
+                 for num_total in range(1, 22) for hand_size in range(1, 8)
+                 for num_valid in range(min(num_total, 14) + 1) if hand_size <= num_total]
+    boneyard_args = [(num_valid, boneyard_size, algos.OPP_DRAW_OUTCOMES)
+                     for boneyard_size in range(1, 15)
+                     for num_valid in range(boneyard_size + 1)]
+    max_probs_args = [(hand_size, num_total)
+                      for num_total in range(1, 22) for hand_size in range(1, 8)]
+    return [('ncr', algos.ncr, None, ncr_args),
+            ('compute_prob_draw', algos.compute_prob_draw, algos._PROB_DRAW, draw_args),
+            ('draw_count_probs', algos.draw_count_probs, algos._DRAW_COUNT_PROBS,
+             boneyard_args),
+            ('prob_opp_moves table', algos._uniform_max_probs, algos._UNIFORM_MAX_PROBS,
+             max_probs_args)]
+
+# Average secs per call of func over args, clearing cache before each
+# call if it's given
+def time_calls(func, args, repeats, cache=None):
+    start = time.time()
+    for i in range(repeats):
+        for arg in args:
+            if cache is not None:
+                cache.clear()
+            func(*arg)
+    return (time.time() - start) / (repeats * len(args))
+
+# Each lookup computed afresh and read from its table, per call
+def compare_lookups(repeats=20):
+    rows = []
+    for name, func, cache, args in lookup_cases():
+        if cache is None:
+            computed = time_calls(algos._ncr, args, repeats)
+        else:
+            computed = time_calls(func, args, repeats, cache)
+        for arg in args:
+            func(*arg)
+        rows.append((name, len(args), computed, time_calls(func, args, repeats)))
+    return rows
+
+def print_lookup_rows(rows):
+    print 'lookup                  args  computed us  looked up us'
+    for name, num_args, computed, looked_up in rows:
+        print '%-20s  %6d  %11.2f  %12.2f' % (name, num_args, 1e6 * computed, 1e6 * looked_up)
+
+def main(argv):
+    opts, args = getopt.getopt(argv, "", ["depth=", "positions=", "order", "lookups"])
+    depth, num_positions = 2, 20
+    order = lookups = False
+    for opt, arg in opts:
+        if opt == "--depth":
+            depth = int(arg)
+        if opt == "--positions":
+            num_positions = int(arg)
+        if opt == "--order":
+            order = True
+        if opt == "--lookups":
+            lookups = True
+
+    if lookups:
+        print_lookup_rows(compare_lookups())
+        return
+
+    positions = benchmark_positions(num_positions)
+    print 'Pruned:'
+    print_rows(compare_pruning(depth, positions))
+    if order:
+        orderers = []
+        def make_context():
+            orderers.append(MoveOrderer())
+            return algos.SearchContext(prune=True, orderer=orderers[-1])
+        rows = compare_pruning(depth, positions, make_context)
+        print
+        print 'Pruned with move ordering:'
+        print_rows(rows)
+        for mine, whose in [(True, 'My'), (False, 'Opp')]:
+            stats = [orderer.stats(mine) for orderer in orderers]
+            num_nodes = sum(stat['nodes'] for stat in stats)
+            print '%s nodes: %d, best move first in %.1f%%, mean rank %.2f' % (
+                whose, num_nodes,
+                100.0 * sum(stat['best_first'] * stat['nodes'] for stat in stats) / num_nodes,
+                sum(stat['mean_rank'] * stat['nodes'] for stat in stats) / num_nodes)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
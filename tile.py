@@ -3,11 +3,44 @@ from dominoes_util import Orientation
 
 MAX_SIDE_VALUE = 6
 
-class Tile:
+class Tile(object):
+  # Tiles are interned: Tile(a, b) always returns the same immutable
+  # instance, so tiles compare by identity and hash by their id. How a
+  # tile is placed (its Orientation) is kept by the Board, not the tile.
+  __slots__ = ('small_side', 'big_side', 'id', 'bit')
+
+  def __new__(cls, side_1, side_2):
+    return _TILES[side_1][side_2]
+
   def __init__(self, side_1, side_2):
-    self.small_side = min(side_1, side_2)
-    self.big_side = max(side_1, side_2)
-    self.orientation = Orientation.NOT_ON_BOARD
+    pass
+
+  @classmethod
+  def _create(cls, side_1, side_2, tile_id):
+    tile = object.__new__(cls)
+    object.__setattr__(tile, 'small_side', min(side_1, side_2))
+    object.__setattr__(tile, 'big_side', max(side_1, side_2))
+    object.__setattr__(tile, 'id', tile_id)
+    object.__setattr__(tile, 'bit', 1 << tile_id)
+    return tile
+
+  def __setattr__(self, name, value):
+    raise AttributeError('Tile is immutable')
+
+  def __delattr__(self, name):
+    raise AttributeError('Tile is immutable')
+
+  def __reduce__(self):
+    return (Tile, (self.small_side, self.big_side))
+
+  def __copy__(self):
+    return self
+
+  def __deepcopy__(self, memo):
+    return self
+
+  def __hash__(self):
+    return self.id
 
   def get_image_file(self):
     num_to_word_map = {
@@ -25,72 +58,78 @@ class Tile:
   def total_points(self):
     return self.small_side + self.big_side
 
-  def _dir_side(self, big_orientation, small_orientation):
-    if self.orientation == big_orientation:
+  def _dir_side(self, orientation, big_orientation, small_orientation):
+    if orientation == big_orientation:
       return self.big_side
-    elif self.orientation == small_orientation:
+    elif orientation == small_orientation:
       return self.small_side
-    elif self.orientation == Orientation.DOUBLE:
+    elif orientation == Orientation.DOUBLE:
       return self.small_side
     else:
       assert False
 
-  def _dir_points(self, big_orientation, small_orientation):
+  def _dir_points(self, orientation, big_orientation, small_orientation):
     if self.is_double():
       return self.total_points()
-    return self._dir_side(big_orientation, small_orientation)
+    return self._dir_side(orientation, big_orientation, small_orientation)
 
-  def left_points(self):
-    return self._dir_points(Orientation.BIG_LEFT, Orientation.BIG_RIGHT)
+  def left_points(self, orientation):
+    return self._dir_points(orientation, Orientation.BIG_LEFT, Orientation.BIG_RIGHT)
 
-  def left_side(self):
-    return self._dir_side(Orientation.BIG_LEFT, Orientation.BIG_RIGHT)
+  def left_side(self, orientation):
+    return self._dir_side(orientation, Orientation.BIG_LEFT, Orientation.BIG_RIGHT)
 
-  def right_points(self):
-    return self._dir_points(Orientation.BIG_RIGHT, Orientation.BIG_LEFT)
+  def right_points(self, orientation):
+    return self._dir_points(orientation, Orientation.BIG_RIGHT, Orientation.BIG_LEFT)
 
-  def right_side(self):
-    return self._dir_side(Orientation.BIG_RIGHT, Orientation.BIG_LEFT)
+  def right_side(self, orientation):
+    return self._dir_side(orientation, Orientation.BIG_RIGHT, Orientation.BIG_LEFT)
 
-  def up_points(self):
-    return self._dir_points(Orientation.BIG_UP, Orientation.BIG_DOWN)
+  def up_points(self, orientation):
+    return self._dir_points(orientation, Orientation.BIG_UP, Orientation.BIG_DOWN)
 
-  def up_side(self):
-    return self._dir_side(Orientation.BIG_UP, Orientation.BIG_DOWN)
+  def up_side(self, orientation):
+    return self._dir_side(orientation, Orientation.BIG_UP, Orientation.BIG_DOWN)
 
-  def down_points(self):
-    return self._dir_points(Orientation.BIG_DOWN, Orientation.BIG_UP)
+  def down_points(self, orientation):
+    return self._dir_points(orientation, Orientation.BIG_DOWN, Orientation.BIG_UP)
 
-  def down_side(self):
-    return self._dir_side(Orientation.BIG_DOWN, Orientation.BIG_UP)
+  def down_side(self, orientation):
+    return self._dir_side(orientation, Orientation.BIG_DOWN, Orientation.BIG_UP)
 
   def __repr__(self):
     return '[%d|%d]' % self.ordered_sides()
 
-  def ordered_sides(self):
+  def ordered_sides(self, orientation=Orientation.NOT_ON_BOARD):
     ordered_sides = (self.small_side, self.big_side)
-    if self.orientation == Orientation.BIG_LEFT or self.orientation == Orientation.BIG_DOWN:
+    if orientation == Orientation.BIG_LEFT or orientation == Orientation.BIG_DOWN:
       ordered_sides = (self.big_side, self.small_side)
     return ordered_sides
 
-  def switched_sides(self):
-    ordered_sides = self.ordered_sides()
-    return ordered_sides[1], ordered_sides[0]
+  def oriented_repr(self, orientation):
+    return '[%d|%d]' % self.ordered_sides(orientation)
 
-  def switched_repr(self):
-    return '[%d|%d]' % self.switched_sides()
+  def switched_sides(self, orientation=Orientation.NOT_ON_BOARD):
+    ordered_sides = self.ordered_sides(orientation)
+    return ordered_sides[1], ordered_sides[0]
 
-  def __eq__(self, tile):
-    return self.small_side == tile.small_side and self.big_side == tile.big_side
+  def switched_repr(self, orientation=Orientation.NOT_ON_BOARD):
+    return '[%d|%d]' % self.switched_sides(orientation)
 
-  def __hash__(self):
-    return hash((self.small_side, self.big_side))
 
-
-def get_all_tiles():
+def _intern_tiles():
   all_tiles = []
+  tiles = [[None] * (MAX_SIDE_VALUE + 1) for i in range(MAX_SIDE_VALUE + 1)]
   for i in range(MAX_SIDE_VALUE + 1):
     for j in range(i, MAX_SIDE_VALUE + 1):
-      tile = Tile(i, j)
+      tile = Tile._create(i, j, len(all_tiles))
+      tiles[i][j] = tile
+      tiles[j][i] = tile
       all_tiles.append(tile)
-  return all_tiles
+  return tiles, all_tiles
+
+_TILES, _ALL_TILES = _intern_tiles()
+
+
+def get_all_tiles():
+  return list(_ALL_TILES)
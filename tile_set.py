@@ -0,0 +1,75 @@
+# Tile sets as 28-bit integers. Bit i is set iff the tile with id i
+# (Tile.id, the order of tile.get_all_tiles()) is in the set. Unions,
+# intersections and differences are then single bitwise operations.
+from tile import get_all_tiles, MAX_SIDE_VALUE
+
+ALL_TILES = get_all_tiles()
+NUM_TILES = len(ALL_TILES)
+FULL_MASK = (1 << NUM_TILES) - 1
+EMPTY_MASK = 0
+
+# TILE_IDS[side_1][side_2] is the id of the tile with those sides
+TILE_IDS = [[None] * (MAX_SIDE_VALUE + 1) for i in range(MAX_SIDE_VALUE + 1)]
+for _id, _tile in enumerate(ALL_TILES):
+  TILE_IDS[_tile.small_side][_tile.big_side] = _id
+  TILE_IDS[_tile.big_side][_tile.small_side] = _id
+
+TILE_POINTS = [t.total_points() for t in ALL_TILES]
+
+# PIP_MASKS[side] holds every tile with at least one side equal to side
+PIP_MASKS = [0] * (MAX_SIDE_VALUE + 1)
+for _id, _tile in enumerate(ALL_TILES):
+  PIP_MASKS[_tile.small_side] |= 1 << _id
+  PIP_MASKS[_tile.big_side] |= 1 << _id
+
+DOUBLES_MASK = 0
+for _id, _tile in enumerate(ALL_TILES):
+  if _tile.is_double():
+    DOUBLES_MASK |= 1 << _id
+
+# Lookups from a single set bit to its tile id and tile
+_BIT_TO_ID = dict((1 << i, i) for i in range(NUM_TILES))
+_BIT_TO_TILE = dict((t.bit, t) for t in ALL_TILES)
+
+
+def tile_id(tile):
+  return tile.id
+
+def tile_bit(tile):
+  return tile.bit
+
+def tiles_to_mask(tiles):
+  mask = 0
+  for tile in tiles:
+    mask |= tile.bit
+  return mask
+
+def mask_to_ids(mask):
+  ids = []
+  while mask:
+    low_bit = mask & -mask
+    ids.append(_BIT_TO_ID[low_bit])
+    mask ^= low_bit
+  return ids
+
+def mask_to_tiles(mask):
+  tiles = []
+  while mask:
+    low_bit = mask & -mask
+    tiles.append(_BIT_TO_TILE[low_bit])
+    mask ^= low_bit
+  return tiles
+
+def popcount(mask):
+  return bin(mask).count('1')
+
+def mask_points(mask):
+  total = 0
+  while mask:
+    low_bit = mask & -mask
+    total += TILE_POINTS[_BIT_TO_ID[low_bit]]
+    mask ^= low_bit
+  return total
+
+def has_tile(mask, tile):
+  return bool(mask & tile_bit(tile))
@@ -1,8 +1,17 @@
 import sys, getopt
+import random
+import multiprocessing
+from collections import Counter
 import bots
+import match_stats
 from player import Player
 from game import Game
 
+# Games can be played from seeds: each game's seed is derived from a master
+# seed, and the game is played with fresh bots and players after seeding
+# random with it, so a match is reproduced exactly by its master seed
+# however its games are spread over worker processes.
+
 def play_game(game, bot1, bot2):
     game.start_first_game()
     i = 0
@@ -29,44 +38,130 @@ def play_game(game, bot1, bot2):
     print game
     assert False
 
+# Seeds of num_games games, from master_seed
+def game_seeds(master_seed, num_games):
+    rng = random.Random(master_seed)
+    return [rng.getrandbits(32) for i in range(num_games)]
+
+def create_bots(bot1_name, bot2_name):
+    player1_name, player2_name = bot1_name, bot2_name
+    if bot1_name == bot2_name:
+        player1_name, player2_name = bot1_name + '1', bot2_name + '2'
+    return getattr(bots, bot1_name)(player1_name), getattr(bots, bot2_name)(player2_name)
+
+# End scores of a game between new bots, from task = (bot1_name, bot2_name,
+# play_to, seed)
+def play_seeded_game(task):
+    bot1_name, bot2_name, play_to, seed = task
+    random.seed(seed)
+    bot1, bot2 = create_bots(bot1_name, bot2_name)
+    players = [Player(bot1.player_name), Player(bot2.player_name)]
+    try:
+        return play_game(Game(players, play_to), bot1, bot2)
+    finally:
+        bot1.close()
+        bot2.close()
+
+# play_game_func over the game tasks, in pool (of processes workers) if
+# not None
+def map_games(pool, processes, play_game_func, tasks):
+    if not pool:
+        return map(play_game_func, tasks)
+    # Chunks small enough to keep every worker busy to the end
+    chunksize = max(1, len(tasks) // (processes * 8))
+    return pool.map(play_game_func, tasks, chunksize)
+
+# End scores of num_games games, in order, from master_seed. processes > 1
+# plays them in that many worker processes.
+def play_games(bot1_name, bot2_name, num_games, play_to=150, master_seed=0, processes=1):
+    return play_match(bot1_name, bot2_name, num_games, play_to, master_seed, processes)[0]
+
+# End scores of the games of a match of up to num_games, as play_games
+# plays them, and stop_rule's decision about bot1 (see match_stats.py).
+# With a stop_rule the games are played batch_size at a time, until it
+# makes a decision.
+def play_match(bot1_name, bot2_name, num_games, play_to=150, master_seed=0, processes=1,
+               stop_rule=None, batch_size=100):
+    tasks = [(bot1_name, bot2_name, play_to, seed)
+             for seed in game_seeds(master_seed, num_games)]
+    if not stop_rule:
+        batch_size = num_games
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    end_scores = []
+    decision = None
+    try:
+        while len(end_scores) < num_games and not decision:
+            batch = tasks[len(end_scores):len(end_scores) + batch_size]
+            end_scores += map_games(pool, processes, play_seeded_game, batch)
+            if stop_rule:
+                wins = summarize(end_scores, play_to)[0][0]
+                decision = stop_rule.decision(wins, len(end_scores))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return end_scores, decision
+
+# Wins of each bot, and how many games each won by how much (in buckets of
+# bucket points)
+def summarize(end_scores, play_to, bucket=25):
+    wins = [0, 0]
+    margins = [Counter(), Counter()]
+    for scores in end_scores:
+        winner_idx = 0 if scores[0] >= play_to else 1
+        wins[winner_idx] += 1
+        margin = scores[winner_idx] - scores[1 - winner_idx]
+        margins[winner_idx][margin // bucket * bucket] += 1
+    return wins, margins
+
 def main(argv):
     # Get inputs from command line
     if len(argv) < 1:
         print 'tournament.py <num_games>'
         return 1
     num_games = int(argv[0])
-    opts, args = getopt.getopt(argv[1:], "", ["bot1=","bot2=","play_to="])
+    opts, args = getopt.getopt(argv[1:], "", ["bot1=","bot2=","play_to=","seed=",
+                                              "processes=","stop=","margin=","batch="])
     bot1_name, bot2_name = "RandomBot", "RandomBot"
     play_to = 150
+    master_seed = random.getrandbits(32)
+    processes = 1
+    stop, margin, batch_size = None, 0.05, 100
     for opt, arg in opts:
         if opt == "--bot1":
             bot1_name = arg
         if opt == "--bot2":
             bot2_name = arg
         if opt == "--play_to":
-            play_to = arg
+            play_to = int(arg)
+        if opt == "--seed":
+            master_seed = int(arg)
+        if opt == "--processes":
+            processes = int(arg)
+        if opt == "--stop":
+            stop = arg
+        if opt == "--margin":
+            margin = float(arg)
+        if opt == "--batch":
+            batch_size = int(arg)
+    print bot1_name, bot2_name, 'seed %d' % master_seed
 
-    # Set up bots
-    player1_name, player2_name = bot1_name, bot2_name
-    if bot1_name == bot2_name:
-        player1_name, player2_name = bot1_name + '1', bot2_name + '2'
-    bot1 = getattr(bots, bot1_name)(player1_name)
-    bot2 = getattr(bots, bot2_name)(player2_name)
-    print bot1, bot2
+    # Stop early when bot1 is clearly stronger or weaker than bot2
+    stop_rule = None
+    if stop == 'sprt':
+        stop_rule = match_stats.SPRT(margin)
+    elif stop == 'wilson':
+        stop_rule = match_stats.WilsonRule(margin)
 
     # Play
-    players = [Player(player1_name), Player(player2_name)]
-    wins = [0 for p in players]
-    for i in range(num_games):
-        game = Game(players, play_to)
-        end_scores = play_game(game, bot1, bot2)
-        for i, score in enumerate(end_scores):
-          if score >= play_to:
-            winner_idx = i
-        winner = players[winner_idx]
-        wins[winner_idx] += 1
-
+    end_scores, decision = play_match(bot1_name, bot2_name, num_games, play_to, master_seed,
+                                      processes, stop_rule, batch_size)
+    wins, margins = summarize(end_scores, play_to)
     print(wins)
+    print '%s %s' % (bot1_name, match_stats.report(wins[0], len(end_scores), decision))
+    for name, won_by in zip([bot1_name, bot2_name], margins):
+        print '%s won by: %s' % (name, ', '.join('%d+: %d' % (margin, count)
+                                                 for margin, count in sorted(won_by.items())))
 
 if __name__ == "__main__":
     main(sys.argv[1:])
@@ -0,0 +1,39 @@
+import unittest
+import match_stats
+import tournament
+
+class TestTournament(unittest.TestCase):
+    def test_seeded_games(self):
+        end_scores = tournament.play_games('GreedyBot', 'RandomBot', 6, master_seed=1)
+        self.assertEqual(len(end_scores), 6)
+        for scores in end_scores:
+            self.assertEqual(len([s for s in scores if s >= 150]), 1)
+        self.assertEqual(tournament.play_games('GreedyBot', 'RandomBot', 6, master_seed=1),
+                         end_scores)
+        self.assertNotEqual(tournament.play_games('GreedyBot', 'RandomBot', 6, master_seed=2),
+                            end_scores)
+        # The same games however they are spread over processes
+        self.assertEqual(tournament.play_games('GreedyBot', 'RandomBot', 6, master_seed=1,
+                                               processes=2), end_scores)
+
+    def test_early_stop(self):
+        end_scores, decision = tournament.play_match('GreedyDefensiveBot', 'RandomBot', 1000,
+                                                     master_seed=3,
+                                                     stop_rule=match_stats.SPRT(0.1),
+                                                     batch_size=10)
+        self.assertEqual(decision, match_stats.STRONGER)
+        self.assertLess(len(end_scores), 1000)
+        self.assertEqual(len(end_scores) % 10, 0)
+        # The first games of the full match
+        self.assertEqual(tournament.play_games('GreedyDefensiveBot', 'RandomBot',
+                                               len(end_scores), master_seed=3), end_scores)
+
+    def test_summarize(self):
+        wins, margins = tournament.summarize([[150, 20], [155, 140], [40, 160]], 150)
+        self.assertEqual(wins, [2, 1])
+        self.assertEqual(margins[0], {0: 1, 125: 1})
+        self.assertEqual(margins[1], {100: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
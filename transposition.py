@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+LRU = 'lru'
+DEPTH_PREFERRED = 'depth'
+
+class TTEntry(object):
+    __slots__ = ('depth', 'ev_dict')
+
+    def __init__(self, depth, ev_dict):
+        self.depth = depth
+        self.ev_dict = ev_dict
+
+# Caches tree_search EV dicts by GameState.key(). An entry searched to some
+# depth answers lookups for that depth or shallower.
+# At most max_entries are kept. When full, LRU replacement evicts the least
+# recently used entry; depth-preferred replacement evicts the shallowest of
+# the eviction_sample least recently used entries, so deep (expensive)
+# results survive longer.
+# NOTE: EVs depend on play_to, which is not part of the key, so a table
+# should only be shared by searches with the same play_to.
+class TranspositionTable(object):
+    def __init__(self, max_entries=50000, replacement=LRU, eviction_sample=8):
+        assert replacement in (LRU, DEPTH_PREFERRED)
+        self.max_entries = max_entries
+        self.replacement = replacement
+        self.eviction_sample = eviction_sample
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _touch(self, key, entry):
+        # Move to the most recently used end
+        del self.entries[key]
+        self.entries[key] = entry
+
+    def get_entry(self, key):
+        # Entry for key at any depth, without counting a hit or miss
+        return self.entries.get(key)
+
+    def lookup(self, key, depth):
+        entry = self.entries.get(key)
+        if entry is None or entry.depth < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key, entry)
+        return dict(entry.ev_dict)
+
+    def _evict(self):
+        if self.replacement == LRU:
+            self.entries.popitem(last=False)
+        else:
+            oldest_key, oldest_depth = None, None
+            for i, (key, entry) in enumerate(self.entries.iteritems()):
+                if i >= self.eviction_sample:
+                    break
+                if oldest_key is None or entry.depth < oldest_depth:
+                    oldest_key, oldest_depth = key, entry.depth
+            del self.entries[oldest_key]
+        self.evictions += 1
+
+    def store(self, key, depth, ev_dict):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.depth > depth and self.replacement == DEPTH_PREFERRED:
+                return
+            del self.entries[key]
+        elif len(self.entries) >= self.max_entries:
+            self._evict()
+        self.entries[key] = TTEntry(depth, dict(ev_dict))
+        self.stores += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return 1.0 * self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits,
+                'misses': self.misses, 'stores': self.stores,
+                'evictions': self.evictions}
+
+    def __repr__(self):
+        return ('TranspositionTable(%d/%d entries, %d hits, %d misses, %d evictions)'
+                % (len(self.entries), self.max_entries, self.hits, self.misses,
+                   self.evictions))
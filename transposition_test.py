@@ -0,0 +1,44 @@
+import unittest
+from transposition import TranspositionTable, LRU, DEPTH_PREFERRED
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_lookup_depth(self):
+        table = TranspositionTable(10)
+        self.assertIsNone(table.lookup(1, 0))
+        table.store(1, 2, {'a': 0.5})
+        self.assertEqual(table.lookup(1, 2), {'a': 0.5})
+        self.assertEqual(table.lookup(1, 1), {'a': 0.5})
+        self.assertIsNone(table.lookup(1, 3))
+        self.assertEqual((table.hits, table.misses), (2, 2))
+
+    def test_lookup_returns_copy(self):
+        table = TranspositionTable(10)
+        table.store(1, 0, {'a': 0.5})
+        table.lookup(1, 0)['a'] = 0.0
+        self.assertEqual(table.lookup(1, 0), {'a': 0.5})
+
+    def test_lru_eviction(self):
+        table = TranspositionTable(3, LRU)
+        for key in range(3):
+            table.store(key, 0, {})
+        table.lookup(0, 0)
+        table.store(3, 0, {})
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.evictions, 1)
+        self.assertIsNone(table.get_entry(1))
+        self.assertIsNotNone(table.get_entry(0))
+
+    def test_depth_preferred_eviction(self):
+        table = TranspositionTable(3, DEPTH_PREFERRED)
+        table.store(0, 4, {})
+        table.store(1, 0, {})
+        table.store(2, 2, {})
+        table.store(3, 1, {})
+        self.assertIsNone(table.get_entry(1))
+        self.assertEqual(table.get_entry(0).depth, 4)
+        # A shallower result does not replace a deeper one
+        table.store(0, 1, {'a': 1.0})
+        self.assertEqual(table.get_entry(0).depth, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,386 @@
+import sys, getopt, time
+import numpy as np
+import tile_set
+from tile import MAX_SIDE_VALUE
+from dominoes_util import Dir
+
+# Plays thousands of rounds or games at once, one lane each, as NumPy
+# arrays: hand and board tile masks, the pips, points and doubles at the
+# four ends, where the spinner is, and the scores. Every step, each lane
+# still playing makes one move, draw or knock, chosen by the random, greedy
+# or defensive policy of the player to move. The rules follow Board and
+# Game, and the policies pick the same move as pick_random_move,
+# pick_greedy_move and pick_defensive_move would: the moves are laid out
+# in the order Board.get_unique_valid_moves lists them, and ties go to the
+# first. One difference: a game ends as soon as a player reaches play_to,
+# even by a block out, where Game only notices after the next move.
+
+RANDOM = 'random'
+GREEDY = 'greedy'
+DEFENSIVE = 'defensive'
+
+NUM_TILES = tile_set.NUM_TILES
+HAND_SIZE = 7
+NUM_SIDES = MAX_SIDE_VALUE + 1
+
+# Ends, in the order Board.get_unique_valid_moves tries them
+RIGHT, LEFT, UP, DOWN = range(4)
+END_DIRS = [Dir.RIGHT, Dir.LEFT, Dir.UP, Dir.DOWN]
+
+SMALL = np.array([t.small_side for t in tile_set.ALL_TILES])
+BIG = np.array([t.big_side for t in tile_set.ALL_TILES])
+POINTS = SMALL + BIG
+IS_DOUBLE = SMALL == BIG
+TILE_IDS = np.array(tile_set.TILE_IDS)
+SIDES = np.arange(NUM_SIDES)
+TILE_BITS = np.int64(1) << np.arange(NUM_TILES, dtype=np.int64)
+
+# Moves on a board with tiles are laid out by end, then by the other side
+# of the tile played there (so by tile id); moves on an empty board by
+# tile id, all to the right
+NUM_SLOTS = 4 * NUM_SIDES
+SLOT_ENDS = np.repeat(np.arange(4), NUM_SIDES)
+
+def mask_points(masks):
+    return ((masks[:, None] & TILE_BITS) != 0).dot(POINTS)
+
+def _score(count):
+    return np.where((count > 0) & (count % 5 == 0), count, 0)
+
+
+class Boards(object):
+    # One board per lane. side, points and double hold the pip, the points
+    # counted and whether the tile is a double at each end (-1, 0 and True
+    # for an end with no tile, as Board has it).
+    def __init__(self, num_lanes):
+        self.mask = np.zeros(num_lanes, dtype=np.int64)
+        self.row_len = np.zeros(num_lanes, dtype=np.int64)
+        self.arm_len = np.zeros((num_lanes, 2), dtype=np.int64)
+        self.side = np.full((num_lanes, 4), -1, dtype=np.int64)
+        self.points = np.zeros((num_lanes, 4), dtype=np.int64)
+        self.double = np.ones((num_lanes, 4), dtype=bool)
+        self.spinner = np.zeros(num_lanes, dtype=bool)
+        # Whether the spinner is the tile at the right, left end of the row
+        self.spinner_on_end = np.zeros((num_lanes, 2), dtype=bool)
+
+    def reset(self, lanes):
+        self.mask[lanes] = 0
+        self.row_len[lanes] = 0
+        self.arm_len[lanes] = 0
+        self.side[lanes] = -1
+        self.points[lanes] = 0
+        self.double[lanes] = True
+        self.spinner[lanes] = False
+        self.spinner_on_end[lanes] = False
+
+    def take(self, lanes):
+        boards = Boards.__new__(Boards)
+        for name, array in self.__dict__.items():
+            setattr(boards, name, array[lanes])
+        return boards
+
+    # Ends that can be played on, as get_unique_valid_moves tries them:
+    # only one side of a lone spinner, and only up until an arm has a tile
+    def open_ends(self):
+        played = self.row_len > 0
+        up_or_down = self.spinner & ~self.spinner_on_end.any(axis=1)
+        return np.stack([played,
+                         played & ~((self.row_len == 1) & self.spinner),
+                         up_or_down,
+                         up_or_down & (self.arm_len > 0).any(axis=1)], axis=1)
+
+    # Moves of each lane's hand, as (valid, tile id, end, count) by slot,
+    # count being what the board would count after the move. Ends with the
+    # same pip as an end tried before, neither a double, are skipped, as
+    # get_unique_valid_moves does.
+    def moves(self, hands):
+        num_lanes = len(hands)
+        ends = self.open_ends()
+        single = ends & ~self.double
+        repeated = np.zeros_like(ends)
+        for end in range(1, 4):
+            repeated[:, end] = (single[:, end] & (
+                single[:, :end] & (self.side[:, :end] == self.side[:, end:end + 1])).any(axis=1))
+        ends &= ~repeated
+        sides = np.maximum(self.side, 0)
+        tiles = TILE_IDS[sides[:, :, None], SIDES[None, None, :]]
+        valid = ((hands[:, None, None] >> tiles) & 1).astype(bool) & ends[:, :, None]
+        played = np.where(SIDES == sides[:, :, None], 2 * sides[:, :, None], SIDES)
+        others = self.points.sum(axis=1)[:, None] - self.points
+        counts = others[:, :, None] + played
+        tiles = tiles.reshape(num_lanes, NUM_SLOTS)
+        valid = valid.reshape(num_lanes, NUM_SLOTS)
+        counts = counts.reshape(num_lanes, NUM_SLOTS)
+        end_of = np.tile(SLOT_ENDS, (num_lanes, 1))
+        empty = self.row_len == 0
+        if empty.any():
+            tiles[empty] = np.arange(NUM_TILES)
+            valid[empty] = ((hands[empty, None] & TILE_BITS) != 0)
+            counts[empty] = POINTS
+            end_of[empty] = RIGHT
+        return valid, tiles, end_of, counts
+
+    # Plays tiles[i] at ends[i] on the board of lanes[i], which must be
+    # valid, and returns the scores
+    def play(self, lanes, tiles, ends):
+        self.mask[lanes] |= TILE_BITS[tiles]
+        first = self.row_len[lanes] == 0
+        if first.any():
+            self._play_first(lanes[first], tiles[first])
+        if not first.all():
+            self._play_on_end(lanes[~first], tiles[~first], ends[~first])
+        return self.scores(lanes)
+
+    def _play_first(self, lanes, tiles):
+        small, big, double = SMALL[tiles], BIG[tiles], IS_DOUBLE[tiles]
+        self.row_len[lanes] = 1
+        self.side[lanes, RIGHT] = big
+        self.side[lanes, LEFT] = small
+        self.points[lanes, RIGHT] = np.where(double, POINTS[tiles], big)
+        self.points[lanes, LEFT] = np.where(double, POINTS[tiles], small)
+        self.double[lanes, RIGHT] = double
+        self.double[lanes, LEFT] = double
+        self._set_spinner(lanes[double], small[double])
+        self.spinner_on_end[lanes[double]] = True
+
+    def _play_on_end(self, lanes, tiles, ends):
+        small, big, double = SMALL[tiles], BIG[tiles], IS_DOUBLE[tiles]
+        new_side = np.where(small == self.side[lanes, ends], big, small)
+        self.side[lanes, ends] = new_side
+        self.points[lanes, ends] = np.where(double, 2 * small, new_side)
+        self.double[lanes, ends] = double
+        on_row = ends <= LEFT
+        self.row_len[lanes[on_row]] += 1
+        # The tile covers the spinner if it was on that end
+        self.spinner_on_end[lanes[on_row], ends[on_row]] = False
+        self.arm_len[lanes[~on_row], ends[~on_row] - UP] += 1
+        new_spinner = on_row & double & ~self.spinner[lanes]
+        self._set_spinner(lanes[new_spinner], small[new_spinner])
+        self.spinner_on_end[lanes[new_spinner], ends[new_spinner]] = True
+
+    def _set_spinner(self, lanes, sides):
+        self.spinner[lanes] = True
+        self.side[lanes, UP] = sides
+        self.side[lanes, DOWN] = sides
+
+    # Score of the boards of lanes: their count, if a multiple of 5. The
+    # count of a lone tile is its points, though it is at both ends.
+    def scores(self, lanes):
+        points = self.points[lanes]
+        lone = self.row_len[lanes] == 1
+        count = np.where(lone & self.double[lanes, RIGHT], points[:, RIGHT], points.sum(axis=1))
+        return _score(count)
+
+    # Most the tiles of masks could score with one move on each board
+    def best_scores(self, masks):
+        valid, tiles, ends, counts = self.moves(masks)
+        return np.where(valid, _score(counts), 0).max(axis=1)
+
+
+class VectorSim(object):
+    # policies[seat] is the policy of the player in that seat. Lanes are
+    # dealt from seed.
+    def __init__(self, num_lanes, policies=(GREEDY, GREEDY), play_to=150, seed=None):
+        for policy in policies:
+            assert policy in (RANDOM, GREEDY, DEFENSIVE)
+        self.num_lanes = num_lanes
+        self.policies = policies
+        self.play_to = play_to
+        self.rng = np.random.RandomState(seed)
+        self.boards = Boards(num_lanes)
+        self.hands = np.zeros((num_lanes, 2), dtype=np.int64)
+        # Tiles in the order dealt: 7 to each seat, then the boneyard
+        self.decks = np.zeros((num_lanes, NUM_TILES), dtype=np.int64)
+        self.num_dealt = np.zeros(num_lanes, dtype=np.int64)
+        self.scores = np.zeros((num_lanes, 2), dtype=np.int64)
+        self.turn = np.zeros(num_lanes, dtype=np.int64)
+        self.in_round = np.zeros(num_lanes, dtype=bool)
+        self.game_over = np.zeros(num_lanes, dtype=bool)
+        self.next_starter = np.zeros(num_lanes, dtype=np.int64)
+        self.steps = 0
+
+    def deal(self, lanes, starters):
+        self.decks[lanes] = np.argsort(self.rng.rand(len(lanes), NUM_TILES), axis=1)
+        dealt = self.decks[lanes]
+        self.hands[lanes, 0] = TILE_BITS[dealt[:, :HAND_SIZE]].sum(axis=1)
+        self.hands[lanes, 1] = TILE_BITS[dealt[:, HAND_SIZE:2 * HAND_SIZE]].sum(axis=1)
+        self.num_dealt[lanes] = 2 * HAND_SIZE
+        self.boards.reset(lanes)
+        self.turn[lanes] = starters
+        self.in_round[lanes] = True
+
+    # Starts a game in every lane as Game.start_first_game does: the
+    # player with the highest double plays it, after redealing if nobody
+    # has one
+    def start_games(self):
+        self.scores[:] = 0
+        self.game_over[:] = False
+        lanes = np.arange(self.num_lanes)
+        while len(lanes):
+            self.deal(lanes, 0)
+            holders = np.full(len(lanes), -1)
+            doubles = np.full(len(lanes), -1)
+            for side in range(MAX_SIDE_VALUE, -1, -1):
+                double = TILE_IDS[side, side]
+                for seat in [0, 1]:
+                    has = ((self.hands[lanes, seat] >> double) & 1).astype(bool) & (holders < 0)
+                    holders[has] = seat
+                    doubles[has] = double
+            dealt = holders >= 0
+            self.turn[lanes[dealt]] = holders[dealt]
+            self._make_moves(lanes[dealt], doubles[dealt], np.full(dealt.sum(), RIGHT))
+            lanes = lanes[~dealt]
+
+    # Starts a round in every lane, from the scores they have, with seat
+    # starter moving first on an empty board
+    def start_rounds(self, starter=0):
+        self.deal(np.arange(self.num_lanes), starter)
+
+    # One move, draw or knock in each lane in a round. Returns the lanes,
+    # and the tile id and end of the move made in each, -1 for a draw or
+    # knock.
+    def step(self):
+        lanes = np.flatnonzero(self.in_round)
+        self.steps += 1
+        seats = self.turn[lanes]
+        hands = self.hands[lanes, seats]
+        boards = self.boards.take(lanes)
+        valid, tiles, ends, counts = boards.moves(hands)
+        can_move = valid.any(axis=1)
+        slots = np.zeros(len(lanes), dtype=np.int64)
+        for seat, policy in enumerate(self.policies):
+            picking = can_move & (seats == seat)
+            if picking.any():
+                slots[picking] = self._pick(policy, boards.take(picking), hands[picking],
+                                            self.boards.mask[lanes[picking]],
+                                            valid[picking], tiles[picking], ends[picking],
+                                            counts[picking])
+        moved = np.arange(len(lanes))
+        moved_tiles = np.where(can_move, tiles[moved, slots], -1)
+        moved_ends = np.where(can_move, ends[moved, slots], -1)
+        self._make_moves(lanes[can_move], moved_tiles[can_move], moved_ends[can_move])
+        stuck = lanes[~can_move]
+        can_draw = self.num_dealt[stuck] < NUM_TILES
+        self._draw(stuck[can_draw])
+        self._knock(stuck[~can_draw])
+        return lanes, moved_tiles, moved_ends
+
+    # Slot of the move policy picks in each lane, from the lanes' boards,
+    # hands, tiles on the boards and moves
+    def _pick(self, policy, boards, hands, board_masks, valid, tiles, ends, counts):
+        if policy == RANDOM:
+            return np.where(valid, self.rng.rand(*valid.shape), -1.0).argmax(axis=1)
+        scores = np.where(valid, _score(counts), -1)
+        slots = scores.argmax(axis=1)
+        if policy == GREEDY:
+            return slots
+        # Defensive: with no score to make, the move leaving the tiles I
+        # can't see the lowest best score
+        lanes = np.flatnonzero(scores.max(axis=1) == 0)
+        if not len(lanes):
+            return slots
+        other_masks = tile_set.FULL_MASK & ~board_masks[lanes] & ~hands[lanes]
+        best_scores = np.full((len(lanes), NUM_SLOTS), np.iinfo(np.int64).max)
+        for slot in np.flatnonzero(valid[lanes].any(axis=0)):
+            movable = np.flatnonzero(valid[lanes, slot])
+            after = boards.take(lanes[movable])
+            after.play(np.arange(len(movable)), tiles[lanes[movable], slot],
+                       ends[lanes[movable], slot])
+            best_scores[movable, slot] = after.best_scores(other_masks[movable])
+        slots[lanes] = best_scores.argmin(axis=1)
+        return slots
+
+    def _make_moves(self, lanes, tiles, ends):
+        seats = self.turn[lanes]
+        self.hands[lanes, seats] &= ~TILE_BITS[tiles]
+        self.scores[lanes, seats] += self.boards.play(lanes, tiles, ends)
+        out = self.hands[lanes, seats] == 0
+        # Going out scores the other hand, rounded down to a multiple of 5
+        out_lanes, out_seats = lanes[out], seats[out]
+        points = mask_points(self.hands[out_lanes, 1 - out_seats])
+        self.scores[out_lanes, out_seats] += points - points % 5
+        self._end_rounds(out_lanes, out_seats)
+        self.turn[lanes[~out]] = 1 - seats[~out]
+        self._check_for_wins(lanes)
+
+    def _draw(self, lanes):
+        seats = self.turn[lanes]
+        self.hands[lanes, seats] |= TILE_BITS[self.decks[lanes, self.num_dealt[lanes]]]
+        self.num_dealt[lanes] += 1
+
+    def _knock(self, lanes):
+        others = 1 - self.turn[lanes]
+        valid = self.boards.take(lanes).moves(self.hands[lanes, others])[0]
+        blocked = ~valid.any(axis=1)
+        self.turn[lanes[~blocked]] = others[~blocked]
+        # Block out: the player with fewer points in hand (seat 0 if tied)
+        # scores the other's, rounded down to a multiple of 5
+        lanes = lanes[blocked]
+        points = [mask_points(self.hands[lanes, seat]) for seat in [0, 1]]
+        winners = np.where(points[0] <= points[1], 0, 1)
+        block_out_points = np.where(winners == 0, points[1], points[0])
+        self.scores[lanes, winners] += block_out_points - block_out_points % 5
+        self._end_rounds(lanes, winners)
+        self._check_for_wins(lanes)
+
+    def _end_rounds(self, lanes, next_starters):
+        self.in_round[lanes] = False
+        self.next_starter[lanes] = next_starters
+
+    def _check_for_wins(self, lanes):
+        won = lanes[self.scores[lanes].max(axis=1) >= self.play_to]
+        self.game_over[won] = True
+        self.in_round[won] = False
+
+    # Plays every lane's round to its end
+    def play_rounds(self):
+        while self.in_round.any():
+            self.step()
+
+    # Plays a game in every lane, dealing each next round to the player who
+    # starts it, and returns the final scores
+    def play_games(self):
+        self.start_games()
+        while not self.game_over.all():
+            self.play_rounds()
+            lanes = np.flatnonzero(~self.game_over)
+            if len(lanes):
+                self.deal(lanes, self.next_starter[lanes])
+        return self.scores.copy()
+
+def main(argv):
+    if len(argv) < 1:
+        print 'vector_sim.py <num_games>'
+        return 1
+    num_games = int(argv[0])
+    opts, args = getopt.getopt(argv[1:], "", ["policy1=", "policy2=", "play_to=", "lanes=",
+                                              "seed="])
+    policies, play_to, num_lanes, seed = [GREEDY, GREEDY], 150, 10000, None
+    for opt, arg in opts:
+        if opt == "--policy1":
+            policies[0] = arg
+        if opt == "--policy2":
+            policies[1] = arg
+        if opt == "--play_to":
+            play_to = int(arg)
+        if opt == "--lanes":
+            num_lanes = int(arg)
+        if opt == "--seed":
+            seed = int(arg)
+
+    sim = VectorSim(min(num_lanes, num_games), policies, play_to, seed)
+    wins = [0, 0]
+    start = time.time()
+    games_left = num_games
+    while games_left > 0:
+        scores = sim.play_games()[:games_left]
+        wins[0] += int((scores[:, 0] >= play_to).sum())
+        wins[1] += int((scores[:, 1] >= play_to).sum())
+        games_left -= len(scores)
+    elapsed = time.time() - start
+    print policies
+    print(wins)
+    print '%d games in %.1f s, %.0f games/s' % (num_games, elapsed, num_games / elapsed)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+import unittest
+import algos
+import tile_set
+from board import Board
+from round_state import RoundState
+
+try:
+    import numpy
+    import vector_sim
+    from vector_sim import VectorSim, RANDOM, GREEDY, DEFENSIVE
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class TestVectorSim(unittest.TestCase):
+    # RoundState of each lane of sim at the start of a round
+    def round_states(self, sim):
+        states = []
+        for lane in range(sim.num_lanes):
+            boneyard = [tile_set.ALL_TILES[t] for t in reversed(sim.decks[lane, 14:])]
+            states.append(RoundState(Board(), [int(h) for h in sim.hands[lane]], boneyard,
+                                     [int(s) for s in sim.scores[lane]], sim.play_to,
+                                     int(sim.turn[lane])))
+        return states
+
+    # Plays a round in every lane of sim and the same round in a RoundState,
+    # checking each move is the one the policy of algos picks
+    def check_round(self, policies, seed):
+        sim = VectorSim(40, policies, play_to=1000, seed=seed)
+        sim.start_rounds()
+        states = self.round_states(sim)
+        while sim.in_round.any():
+            lanes, tiles, ends = sim.step()
+            for lane, tile_id, end in zip(lanes, tiles, ends):
+                state = states[lane]
+                moves = state.valid_moves()
+                if tile_id < 0:
+                    self.assertEqual(moves, [])
+                    state.make_move(None, None)
+                    continue
+                move = (tile_set.ALL_TILES[tile_id], vector_sim.END_DIRS[end])
+                self.assertIn(move, moves)
+                hand = tile_set.mask_to_tiles(state.hands[state.turn])
+                policy = policies[state.turn]
+                if policy == GREEDY:
+                    self.assertEqual(move, algos.pick_greedy_move(state.board, hand)[0])
+                elif policy == DEFENSIVE:
+                    self.assertEqual(move, algos.pick_defensive_move(state.board, hand))
+                state.make_move(*move)
+        for lane, state in enumerate(states):
+            self.assertTrue(state.round_over)
+            self.assertEqual(list(sim.scores[lane]), state.scores)
+            self.assertEqual(list(sim.hands[lane]), state.hands)
+            self.assertEqual(sim.next_starter[lane], state.next_starter)
+
+    def test_random(self):
+        self.check_round((RANDOM, RANDOM), 1)
+
+    def test_greedy(self):
+        self.check_round((GREEDY, GREEDY), 2)
+
+    def test_defensive(self):
+        self.check_round((DEFENSIVE, GREEDY), 3)
+        self.check_round((DEFENSIVE, DEFENSIVE), 4)
+
+    def test_play_games(self):
+        sim = VectorSim(100, (GREEDY, DEFENSIVE), play_to=150, seed=5)
+        scores = sim.play_games()
+        self.assertTrue(sim.game_over.all())
+        self.assertTrue((scores.max(axis=1) >= 150).all())
+        self.assertTrue((scores % 5 == 0).all())
+        self.assertTrue((VectorSim(100, (GREEDY, DEFENSIVE), seed=5).play_games() == scores).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import sys
+import getopt
+import array
+import random
+from collections import Counter, defaultdict
+from player import Player
+from game import Game
+
+# Probability of winning the game from the scores at the start of a round,
+# for the player on serve (starting the round). Built offline by dynamic
+# programming over the score changes of whole rounds, measured in bot
+# self-play as starting_value.py does, and saved to win_table_<play_to>.dat
+# next to this file. Scores are always multiples of 5, so the table has an
+# entry per pair of scores under play_to, by score / 5. The player not on
+# serve wins when the other, on serve, doesn't.
+
+POINTS_PER_UNIT = 5
+
+# Self-play rounds never end the game, so whole rounds are measured
+_NO_LIMIT = 10 ** 9
+
+# play_to -> table, or None if it has no file
+_tables = {}
+
+def table_path(play_to):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'win_table_%d.dat' % play_to)
+
+# Probability the player with my_score wins against opp_score, both under
+# play_to, at the start of a round, or None if there is no table for
+# play_to
+def lookup(my_score, opp_score, on_serve, play_to):
+    table = _tables.get(play_to, False)
+    if table is False:
+        table = _tables[play_to] = load(play_to)
+    if table is None:
+        return None
+    n = play_to // POINTS_PER_UNIT
+    if on_serve:
+        return table[my_score // POINTS_PER_UNIT * n + opp_score // POINTS_PER_UNIT]
+    return 1.0 - table[opp_score // POINTS_PER_UNIT * n + my_score // POINTS_PER_UNIT]
+
+def load(play_to, path=None):
+    path = path or table_path(play_to)
+    if not os.path.exists(path):
+        return None
+    n = play_to // POINTS_PER_UNIT
+    table = array.array('d')
+    with open(path, 'rb') as f:
+        table.fromfile(f, n * n)
+    if sys.byteorder == 'big':
+        table.byteswap()
+    return table
+
+# Saves table as little endian doubles
+def save(table, play_to, path=None):
+    table = array.array('d', table)
+    if sys.byteorder == 'big':
+        table.byteswap()
+    with open(path or table_path(play_to), 'wb') as f:
+        table.tofile(f)
+
+# Plays num_rounds rounds of bot against itself and counts their outcomes
+# from the side of the player on serve: the points scored, in units of 5,
+# as a tuple of (by_server, units) in the order scored, and whether the
+# server starts the next round too.
+def measure_rounds(bot, num_rounds):
+    outcomes = Counter()
+    for i in range(num_rounds):
+        server, receiver = players = [Player('P1'), Player('P2')]
+        game = Game(players, _NO_LIMIT)
+        game.deal_tiles()
+        game.turn_index = 0
+        events = []
+        while not game.round_over:
+            scores = server.total_score, receiver.total_score
+            game.make_move_or_knock(*bot.pick_move(game.create_game_state()))
+            for by_server, player, score in [(True, server, scores[0]),
+                                             (False, receiver, scores[1])]:
+                if player.total_score > score:
+                    events.append((by_server, (player.total_score - score) // POINTS_PER_UNIT))
+        outcomes[(tuple(events), game.current_player() == server)] += 1
+    return outcomes
+
+# Whether the server reaches need_server units before the receiver reaches
+# need_receiver, scoring events in order
+def _server_first(events, need_server, need_receiver):
+    gains = {True: 0, False: 0}
+    for by_server, units in events:
+        gains[by_server] += units
+        if gains[True] >= need_server:
+            return True
+        if gains[False] >= need_receiver:
+            return False
+    assert False
+
+# Table of the probability the server wins, by (server units * n +
+# receiver units) for n = play_to / 5, from round outcomes as
+# measure_rounds counts them. Rounds from a pair of scores lead to pairs
+# with higher totals, so pairs are solved from the highest total down.
+# Rounds where nobody scores only swap or keep the serve, so each pair is
+# solved together with its mirror.
+def build(outcomes, play_to):
+    n = play_to // POINTS_PER_UNIT
+    num_rounds = float(sum(outcomes.itervalues()))
+    # (server units, receiver units, kept serve) -> (prob, [(events, prob)])
+    groups = defaultdict(lambda: [0.0, []])
+    for (events, kept_serve), count in outcomes.iteritems():
+        key = (sum(u for s, u in events if s), sum(u for s, u in events if not s), kept_serve)
+        groups[key][0] += count / num_rounds
+        groups[key][1].append((events, count / num_rounds))
+    prob_keep_nothing = groups.pop((0, 0, True), [0.0])[0]
+    prob_swap_nothing = groups.pop((0, 0, False), [0.0])[0]
+    groups = [(key, prob, rounds) for key, (prob, rounds) in groups.iteritems()]
+    table = [None] * (n * n)
+
+    # Value of the rounds that score something, for the server on a,
+    # receiver on b
+    def scoring_value(a, b):
+        value = 0.0
+        for (server_units, receiver_units, kept_serve), prob, rounds in groups:
+            server_wins = a + server_units >= n
+            receiver_wins = b + receiver_units >= n
+            if server_wins and receiver_wins:
+                value += sum(p for events, p in rounds
+                             if _server_first(events, n - a, n - b))
+            elif server_wins:
+                value += prob
+            elif not receiver_wins:
+                a_next, b_next = a + server_units, b + receiver_units
+                if kept_serve:
+                    value += prob * table[a_next * n + b_next]
+                else:
+                    value += prob * (1.0 - table[b_next * n + a_next])
+        return value
+
+    keep, swap = prob_keep_nothing, prob_swap_nothing
+    for total in range(2 * n - 2, -1, -1):
+        for a in range(max(0, total - n + 1), total // 2 + 1):
+            b = total - a
+            # x = W(a, b) = c1 + keep * x + swap * (1 - y), and y = W(b, a) likewise
+            c1 = scoring_value(a, b) + swap
+            if a == b:
+                table[a * n + b] = c1 / (1.0 - keep + swap)
+                continue
+            c2 = scoring_value(b, a) + swap
+            det = (1.0 - keep) ** 2 - swap ** 2
+            table[a * n + b] = ((1.0 - keep) * c1 - swap * c2) / det
+            table[b * n + a] = ((1.0 - keep) * c2 - swap * c1) / det
+    return table
+
+def main(argv):
+    opts, args = getopt.getopt(argv, "", ["rounds=", "bot=", "play_to=", "seed="])
+    num_rounds, bot_name, play_to, seed = 50000, 'GreedyDefensiveBot', 150, 0
+    for opt, arg in opts:
+        if opt == "--rounds":
+            num_rounds = int(arg)
+        if opt == "--bot":
+            bot_name = arg
+        if opt == "--play_to":
+            play_to = int(arg)
+        if opt == "--seed":
+            seed = int(arg)
+
+    # Imported here, as bots imports algos, which looks tables up here
+    import bots
+    random.seed(seed)
+    outcomes = measure_rounds(getattr(bots, bot_name)(), num_rounds)
+    table = build(outcomes, play_to)
+    save(table, play_to)
+    print 'Saved %s from %d rounds of %s' % (table_path(play_to), num_rounds, bot_name)
+    print 'Win prob on serve at 0-0: %.3f' % table[0]
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
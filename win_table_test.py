@@ -0,0 +1,80 @@
+import unittest
+import os
+import shutil
+import tempfile
+from collections import Counter
+import win_table
+
+# Rounds from the server's side: (by_server, units) events and whether the
+# server keeps the serve
+OUTCOMES = Counter({
+    (((True, 1),), True): 4,
+    (((False, 2),), False): 3,
+    (((True, 1), (False, 1)), False): 2,
+    (((False, 1), (True, 3)), True): 2,
+    ((), True): 1,
+    ((), False): 2,
+})
+
+# Probability the server wins, by value iteration over the same rounds
+def iterate_values(outcomes, n, iterations=500):
+    total = float(sum(outcomes.values()))
+    values = [[0.5] * n for a in range(n)]
+    for i in range(iterations):
+        new_values = [[0.0] * n for a in range(n)]
+        for a in range(n):
+            for b in range(n):
+                for (events, kept_serve), count in outcomes.items():
+                    scores = [a, b]
+                    value = None
+                    for by_server, units in events:
+                        scores[0 if by_server else 1] += units
+                        if scores[0] >= n:
+                            value = 1.0
+                            break
+                        if scores[1] >= n:
+                            value = 0.0
+                            break
+                    if value is None:
+                        if kept_serve:
+                            value = values[scores[0]][scores[1]]
+                        else:
+                            value = 1.0 - values[scores[1]][scores[0]]
+                    new_values[a][b] += count / total * value
+        values = new_values
+    return values
+
+class TestWinTable(unittest.TestCase):
+    def test_build(self):
+        n = 6
+        table = win_table.build(OUTCOMES, n * win_table.POINTS_PER_UNIT)
+        values = iterate_values(OUTCOMES, n)
+        for a in range(n):
+            for b in range(n):
+                self.assertAlmostEqual(table[a * n + b], values[a][b])
+
+    def test_build_always_scoring(self):
+        # The server always scores and keeps the serve, so always wins
+        table = win_table.build(Counter({(((True, 1),), True): 1}), 20)
+        self.assertEqual(table, [1.0] * 16)
+
+    def test_save_and_load(self):
+        table = win_table.build(OUTCOMES, 30)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'table.dat')
+            win_table.save(table, 30, path)
+            self.assertEqual(list(win_table.load(30, path)), table)
+            self.assertIsNone(win_table.load(30, os.path.join(tmp_dir, 'missing.dat')))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_lookup(self):
+        self.assertIsNone(win_table.lookup(0, 0, True, 101))
+        on_serve = win_table.lookup(100, 120, True, 150)
+        self.assertAlmostEqual(win_table.lookup(120, 100, False, 150), 1.0 - on_serve)
+        self.assertGreater(win_table.lookup(0, 0, True, 150), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
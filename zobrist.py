@@ -0,0 +1,96 @@
+# Zobrist hashing: every feature of a position gets a fixed pseudo-random
+# 64-bit key and a position hashes to the XOR of the keys of its features.
+# Adding or removing a feature is then a single XOR, which lets Board keep
+# its hash up to date in add_tile_to_board/remove_from_board.
+import tile_set
+from tile import MAX_SIDE_VALUE
+from dominoes_util import Dir, all_dirs
+
+MASK_64 = (1 << 64) - 1
+
+# Feature kinds, mixed into the key so features never share keys
+_TILE_ON_ARM, _END_SIDE, _SPINNER, _HAND_TILE, _MY_SCORE, _OPP_SCORE, \
+    _OPP_HAND_SIZE, _MY_TURN, _END_DOUBLE = range(9)
+
+def _mix(x):
+  # splitmix64 finalizer: keys only depend on the feature, so hashes are
+  # the same in every process and run
+  x = (x + 0x9e3779b97f4a7c15) & MASK_64
+  x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & MASK_64
+  x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & MASK_64
+  return x ^ (x >> 31)
+
+def feature_key(kind, *args):
+  x = kind
+  for arg in args:
+    x = _mix((x << 8) ^ arg)
+  return _mix(x)
+
+# TILE_ON_ARM[direction][tile_id]: tile placed on the arm of that
+# direction. Left and right are both the main row.
+_ARMS = {Dir.LEFT: 0, Dir.RIGHT: 0, Dir.UP: 1, Dir.DOWN: 2}
+TILE_ON_ARM = dict(
+    (d, [feature_key(_TILE_ON_ARM, _ARMS[d], i) for i in range(tile_set.NUM_TILES)])
+    for d in all_dirs())
+# END_SIDE[direction][side]: open end pip in that direction. Closed ends
+# (None) have no key.
+END_SIDE = dict(
+    (d, [feature_key(_END_SIDE, d.value, side) for side in range(MAX_SIDE_VALUE + 1)])
+    for d in all_dirs())
+# END_DOUBLE[direction]: the tile at the end in that direction is a double,
+# which the end pip alone doesn't tell (it counts twice, and repeats of its
+# pip aren't skipped as move choices)
+END_DOUBLE = dict((d, feature_key(_END_DOUBLE, d.value)) for d in all_dirs())
+SPINNER = [feature_key(_SPINNER, i) for i in range(tile_set.NUM_TILES)]
+HAND_TILE = [feature_key(_HAND_TILE, i) for i in range(tile_set.NUM_TILES)]
+OPP_HAND_SIZE = [feature_key(_OPP_HAND_SIZE, n) for n in range(tile_set.NUM_TILES + 1)]
+MY_TURN = feature_key(_MY_TURN)
+
+# Hand hashes looked up 7 tile ids at a time
+_CHUNK_BITS = 7
+_HAND_CHUNKS = []
+for _chunk in range(tile_set.NUM_TILES // _CHUNK_BITS):
+  _table = []
+  for _value in range(1 << _CHUNK_BITS):
+    _key = 0
+    for _bit in range(_CHUNK_BITS):
+      if _value & (1 << _bit):
+        _key ^= HAND_TILE[_chunk * _CHUNK_BITS + _bit]
+    _table.append(_key)
+  _HAND_CHUNKS.append(_table)
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+
+
+def end_side_key(direction, side):
+  if side is None:
+    return 0
+  return END_SIDE[direction][side]
+
+def hand_hash(mask):
+  h = 0
+  for table in _HAND_CHUNKS:
+    h ^= table[mask & _CHUNK_MASK]
+    mask >>= _CHUNK_BITS
+  return h
+
+def score_hash(my_score, opp_score):
+  return feature_key(_MY_SCORE, my_score) ^ feature_key(_OPP_SCORE, opp_score)
+
+def board_hash(board):
+  # Hash of board computed from scratch, as Board maintains it
+  h = 0
+  for direction, arm in [(Dir.RIGHT, board.main_row), (Dir.UP, board.up),
+                         (Dir.DOWN, board.down)]:
+    for tile in arm:
+      h ^= TILE_ON_ARM[direction][tile.id]
+  for direction in all_dirs():
+    h ^= end_side_key(direction, board.end_sides[direction])
+  ends = {Dir.LEFT: board.main_row and board.main_row[0],
+          Dir.RIGHT: board.main_row and board.main_row[-1],
+          Dir.UP: board.up and board.up[-1], Dir.DOWN: board.down and board.down[-1]}
+  for direction, tile in ends.items():
+    if tile and tile.is_double():
+      h ^= END_DOUBLE[direction]
+  if board.spinner:
+    h ^= SPINNER[board.spinner.id]
+  return h